@@ -1,10 +1,32 @@
-# billing/admin.py
-from django.contrib import admin
-from .models import Dish, Order, OrderItem
-
-@admin.register(Dish)
-class DishAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'image')
-
-admin.site.register(Order)
-admin.site.register(OrderItem)
\ No newline at end of file
+# billing/admin.py
+from django.contrib import admin
+from .models import CategoryMealRestriction, DisplayOrderCounter, Dish, IdempotencyKey, KitchenStation, Order, OrderItem, PrintJob
+
+@admin.register(Dish)
+class DishAdmin(admin.ModelAdmin):
+    list_display = ('name', 'price', 'is_sold_out', 'image')
+
+admin.site.register(Order)
+admin.site.register(OrderItem)
+
+@admin.register(CategoryMealRestriction)
+class CategoryMealRestrictionAdmin(admin.ModelAdmin):
+    list_display = ('category', 'meal_type')
+
+@admin.register(DisplayOrderCounter)
+class DisplayOrderCounterAdmin(admin.ModelAdmin):
+    list_display = ('meal_type', 'category', 'next_order')
+
+@admin.register(KitchenStation)
+class KitchenStationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'categories', 'backend', 'printer', 'is_active')
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'kind', 'station', 'backend', 'status', 'attempts', 'created_at')
+    list_filter = ('status', 'kind')
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'status_code', 'created_at', 'expires_at')
+    search_fields = ('key',)
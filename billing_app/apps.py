@@ -1,6 +1,16 @@
-from django.apps import AppConfig
-
-
-class BillingAppConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'billing_app'
+from django.apps import AppConfig
+
+
+class BillingAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'billing_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .menu_rules import compile_rules, mark_rules_stale, rules_from_db
+
+        # No queries during app loading: compile the code defaults now and
+        # load database rules on first use
+        compile_rules()
+        if rules_from_db():
+            mark_rules_stale()
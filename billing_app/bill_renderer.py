@@ -0,0 +1,379 @@
+"""
+Backend-agnostic bill renderer
+
+print_utils draws bills with win32ui fonts and TextOut coordinates, which
+only works through Windows GDI. This module lays a bill out once, in a
+device-independent form, and renders that layout to:
+
+  'escpos' - raw ESC/POS bytes for 80mm thermal printers (network or USB)
+  'text'   - plain text, 48 columns
+  'png'    - image preview, 576 dots wide like the printed roll
+
+Kitchen order tickets (KOTs) use the same renderers with a shorter layout:
+the station, bill number, time and each dish with its quantity, no prices.
+
+Tamil names cannot be sent as ESC/POS text (thermal printers have no
+Tamil code page), so those rows are rasterized with Pillow when
+settings.BILL_FONT_PATH points to a font with Tamil glyphs, and fall back
+to the English name otherwise.
+
+Fonts and text measurements are cached per process, and rendered bills
+are kept in a small LRU keyed by order id (and updated_at), so reprints
+and tickets are served without laying out or rasterizing again.
+"""
+import io
+import threading
+import unicodedata
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+
+
+LINE_CHARS = 48          # Font A on 80mm paper
+PAPER_DOTS = 576         # 72mm printable at 203 dpi
+NAME_CHARS, QTY_CHARS, PRICE_CHARS = 28, 6, 14
+
+RENDER_CACHE_MAX_ENTRIES = 256
+
+# kind: 'rule' | 'text' | 'item' | 'total'
+#   rule:  text is the repeated character
+#   text:  text, align ('left' / 'center'), style ('normal' / 'bold' / 'large' / 'small')
+#   item:  text = display name, fallback = English name, qty, price
+#   total: text = label, price = value
+BillLine = namedtuple('BillLine', 'kind text align style fallback qty price')
+
+
+def _line(kind, text='', align='left', style='normal', fallback=None, qty=None, price=None):
+    return BillLine(kind, text, align, style, fallback, qty, price)
+
+
+# ---------------------------------------------
+# Layout
+# ---------------------------------------------
+def layout_bill(order, items):
+    """Lay out an order and its OrderItems (dishes loaded) as BillLines"""
+    created_at = timezone.localtime(order.created_at)
+    lines = [
+        _line('rule', '='),
+        _line('text', 'APPATHA RESTAURANT', align='center', style='large'),
+        _line('text', 'Mannargudi', align='center'),
+        _line('rule', '='),
+        _line('text', f"Bill No : {order.id}", style='bold'),
+        _line('text', f"Date    : {created_at:%d-%m-%Y %I:%M %p}", style='small'),
+        _line('text', f"Type    : {order.get_order_type_display()}", style='small'),
+        _line('rule', '-'),
+        _line('item', 'Item Name', fallback='Item Name', qty='Qty', price='Price', style='bold'),
+        _line('rule', '-'),
+    ]
+    for item in items:
+        lines.append(_line(
+            'item',
+            item.dish.secondary_name or item.dish.name,
+            fallback=item.dish.name,
+            qty=str(item.quantity),
+            price=f"Rs.{item.price:.2f}",
+        ))
+    lines += [
+        _line('rule', '-'),
+        _line('total', 'TOTAL :', style='large', price=f"Rs.{order.total_amount:.2f}"),
+        _line('rule', '='),
+    ]
+    return lines
+
+
+def layout_kot(order, station, items):
+    """Lay out a station's kitchen order ticket: dishes and quantities only"""
+    created_at = timezone.localtime(order.created_at)
+    lines = [
+        _line('rule', '='),
+        _line('text', f"KOT - {station.name}", align='center', style='large'),
+        _line('rule', '='),
+        _line('text', f"Bill No : {order.id}", style='bold'),
+        _line('text', f"Time    : {created_at:%d-%m-%Y %I:%M %p}", style='small'),
+        _line('text', f"Type    : {order.get_order_type_display()}", style='small'),
+        _line('rule', '-'),
+        _line('item', 'Item Name', fallback='Item Name', qty='Qty', price='', style='bold'),
+        _line('rule', '-'),
+    ]
+    for item in items:
+        lines.append(_line(
+            'item',
+            item.dish.secondary_name or item.dish.name,
+            fallback=item.dish.name,
+            qty=str(item.quantity),
+            price='',
+            style='large',
+        ))
+    lines.append(_line('rule', '='))
+    return lines
+
+
+# ---------------------------------------------
+# Width metrics
+# ---------------------------------------------
+@lru_cache(maxsize=1024)
+def char_width(char):
+    """
+    Columns one character takes: none for combining marks (Tamil vowel
+    signs and virama, categories Mn / Mc) and format characters, two for
+    wide East Asian characters, one otherwise
+    """
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Mc', 'Me', 'Cf'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+@lru_cache(maxsize=4096)
+def display_width(text):
+    """Monospace columns taken by text"""
+    return sum(char_width(char) for char in text)
+
+
+def fit(text, width, align='left'):
+    """Cut text to `width` columns and pad it; align is 'left', 'right' or 'center'"""
+    used = 0
+    end = len(text)
+    for index, char in enumerate(text):
+        # Marks stay with their base character; a base that does not fit
+        # ends the text together with its marks
+        if used + char_width(char) > width:
+            end = index
+            break
+        used += char_width(char)
+    out = text[:end]
+    padding = width - used
+    if align == 'right':
+        return ' ' * padding + out
+    if align == 'center':
+        return ' ' * (padding // 2) + out + ' ' * (padding - padding // 2)
+    return out + ' ' * padding
+
+
+def _text_row(line, name):
+    if line.kind == 'rule':
+        return line.text * LINE_CHARS
+    if line.kind == 'item':
+        return fit(name, NAME_CHARS) + fit(line.qty, QTY_CHARS, 'right') + fit(line.price, PRICE_CHARS, 'right')
+    if line.kind == 'total':
+        return fit(line.text, NAME_CHARS) + fit(line.price, LINE_CHARS - NAME_CHARS, 'right')
+    return fit(line.text, LINE_CHARS, line.align)
+
+
+# ---------------------------------------------
+# Plain text
+# ---------------------------------------------
+def render_text(lines):
+    return "\n".join(_text_row(line, line.text).rstrip() for line in lines) + "\n"
+
+
+# ---------------------------------------------
+# ESC/POS
+# ---------------------------------------------
+ESC_INIT = b'\x1b@'
+ESC_ALIGN = {'left': b'\x1ba\x00', 'center': b'\x1ba\x01'}
+ESC_BOLD_ON, ESC_BOLD_OFF = b'\x1bE\x01', b'\x1bE\x00'
+GS_SIZE_NORMAL, GS_SIZE_DOUBLE_HEIGHT = b'\x1d!\x00', b'\x1d!\x01'
+ESC_FEED_AND_CUT = b'\x1bd\x04' + b'\x1dVA\x00'
+ESCPOS_ENCODING = 'cp437'
+
+
+def render_escpos(lines):
+    out = bytearray(ESC_INIT)
+    for line in lines:
+        if line.kind == 'item' and not _encodable(line.text):
+            raster = _raster_row(line) if raster_font_available() else None
+            if raster is not None:
+                out += ESC_ALIGN['left'] + raster
+                continue
+            line = line._replace(text=line.fallback)
+
+        out += ESC_ALIGN.get(line.align if line.kind == 'text' else 'left', ESC_ALIGN['left'])
+        if line.style == 'large':
+            out += GS_SIZE_DOUBLE_HEIGHT + ESC_BOLD_ON
+        elif line.style == 'bold':
+            out += ESC_BOLD_ON
+
+        out += _text_row(line, line.text).rstrip().encode(ESCPOS_ENCODING, 'replace') + b'\n'
+
+        if line.style in ('large', 'bold'):
+            out += ESC_BOLD_OFF + GS_SIZE_NORMAL
+    out += ESC_FEED_AND_CUT
+    return bytes(out)
+
+
+@lru_cache(maxsize=4096)
+def _encodable(text):
+    try:
+        text.encode(ESCPOS_ENCODING)
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def _raster_row(line):
+    """One item row as a GS v 0 raster image (1 bit per dot, MSB first)"""
+    image = _draw_lines([line], background=1, mode='1')
+    if image is None:
+        return None
+    width_bytes = (image.width + 7) // 8
+    # Pillow packs mode '1' rows MSB first with 1 = white; printers want 1 = black
+    data = bytes(byte ^ 0xFF for byte in image.tobytes())
+    return (
+        b'\x1dv0\x00'
+        + width_bytes.to_bytes(2, 'little')
+        + image.height.to_bytes(2, 'little')
+        + data
+    )
+
+
+# ---------------------------------------------
+# PNG
+# ---------------------------------------------
+FONT_SIZES = {'small': 20, 'normal': 24, 'bold': 24, 'large': 30}
+LINE_SPACING = 8
+QTY_RIGHT_DOTS, PRICE_RIGHT_DOTS = 420, PAPER_DOTS - 8
+LEFT_DOTS = 8
+
+
+def font_path():
+    return getattr(settings, 'BILL_FONT_PATH', None)
+
+
+def raster_font_available():
+    """True when BILL_FONT_PATH loads, so Tamil rows can be rasterized"""
+    path = font_path()
+    return bool(path) and _truetype(path, FONT_SIZES['normal']) is not None
+
+
+@lru_cache(maxsize=32)
+def _truetype(path, size):
+    try:
+        from PIL import ImageFont
+        return ImageFont.truetype(path, size)
+    except (ImportError, OSError):
+        return None
+
+
+@lru_cache(maxsize=32)
+def _load_font(path, size):
+    font = _truetype(path, size) if path else None
+    if font is not None:
+        return font
+    from PIL import ImageFont
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()  # Pillow < 10.1 has no sized default
+
+
+@lru_cache(maxsize=8192)
+def _text_length(path, size, text):
+    return _load_font(path, size).getlength(text)
+
+
+def _draw_lines(lines, background=255, mode='L'):
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return None
+
+    path = font_path()
+    heights = [FONT_SIZES[line.style] + LINE_SPACING for line in lines]
+    image = Image.new(mode, (PAPER_DOTS, sum(heights) + LINE_SPACING), background)
+    draw = ImageDraw.Draw(image)
+    ink = 0
+
+    y = LINE_SPACING // 2
+    for line, height in zip(lines, heights):
+        size = FONT_SIZES[line.style]
+        font = _load_font(path, size)
+
+        def right(text, edge):
+            draw.text((edge - _text_length(path, size, text), y), text, font=font, fill=ink)
+
+        if line.kind == 'rule':
+            middle = y + height // 2 - LINE_SPACING // 2
+            draw.line((LEFT_DOTS, middle, PAPER_DOTS - LEFT_DOTS, middle), fill=ink, width=2 if line.text == '=' else 1)
+        elif line.kind == 'item':
+            draw.text((LEFT_DOTS, y), line.text, font=font, fill=ink)
+            right(line.qty, QTY_RIGHT_DOTS)
+            right(line.price, PRICE_RIGHT_DOTS)
+        elif line.kind == 'total':
+            draw.text((LEFT_DOTS, y), line.text, font=font, fill=ink)
+            right(line.price, PRICE_RIGHT_DOTS)
+        elif line.align == 'center':
+            draw.text(((PAPER_DOTS - _text_length(path, size, line.text)) / 2, y), line.text, font=font, fill=ink)
+        else:
+            draw.text((LEFT_DOTS, y), line.text, font=font, fill=ink)
+        y += height
+
+    return image
+
+
+def render_png(lines):
+    image = _draw_lines(lines)
+    if image is None:
+        raise RuntimeError("PNG previews need Pillow")
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------
+# Cached entry point
+# ---------------------------------------------
+RENDERERS = {
+    'escpos': render_escpos,
+    'text': render_text,
+    'png': render_png,
+}
+
+_rendered = OrderedDict()
+_rendered_lock = threading.Lock()
+
+
+def render_bill(order, fmt='escpos', items=None):
+    """
+    Render an order's bill as bytes ('escpos', 'png') or str ('text')
+
+    Results are cached by (order id, updated_at, format); pass items when
+    the caller already has them loaded to skip the items query on a miss.
+    """
+    def build():
+        bill_items = order.items.select_related('dish') if items is None else items
+        return layout_bill(order, bill_items)
+
+    return _render(('bill', order.id, order.updated_at), fmt, build)
+
+
+def render_kot(order, station, items, fmt='escpos'):
+    """
+    Render a station's kitchen order ticket; items are the order's
+    OrderItems for that station (see print_queue.station_items)
+    """
+    return _render(
+        ('kot', order.id, order.updated_at, station.id, station.updated_at),
+        fmt,
+        lambda: layout_kot(order, station, items)
+    )
+
+
+def _render(key, fmt, build):
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown bill format '{fmt}'. Must be one of: {', '.join(RENDERERS)}")
+
+    key += (fmt, font_path())
+    with _rendered_lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            return _rendered[key]
+
+    rendered = RENDERERS[fmt](build())
+
+    with _rendered_lock:
+        _rendered[key] = rendered
+        while len(_rendered) > RENDER_CACHE_MAX_ENTRIES:
+            _rendered.popitem(last=False)
+    return rendered
@@ -0,0 +1,182 @@
+"""
+Display-order integrity check and compaction
+
+Months of reorders, moves, deactivations and category edits leave the
+DishDisplayOrder table with rows for inactive dishes, rows whose
+meal_type/category no longer match their dish and groups whose gaps are
+used up. Gaps themselves are expected (DishDisplayOrder.ORDER_GAP); only
+duplicate and negative orders are anomalies. check_display_orders()
+reads dishes and display orders once, reports every anomaly and, with
+fix=True, repairs them in one transaction:
+
+- rows of inactive dishes and of extras are deleted
+- rows are moved to their dish's current meal_type + category
+- active dishes without a row get one at the end of their group
+- every group is respaced to ORDER_GAP multiples, keeping its current order
+- DisplayOrderCounter rows are reset past the new highest orders
+
+Used by the check_display_orders management command and the admin
+endpoint in views.py.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import DisplayOrderCounter, Dish, DishDisplayOrder
+
+
+def check_display_orders(fix=False):
+    """
+    Scan all display-order groups and return a report dict; with fix=True
+    also repair the anomalies found
+    """
+    with transaction.atomic():
+        if fix:
+            # Hold every counter so no dish is created mid-compaction
+            counters = {
+                (counter.meal_type, counter.category): counter
+                for counter in DisplayOrderCounter.objects.select_for_update().order_by('meal_type', 'category')
+            }
+        else:
+            counters = {
+                (counter.meal_type, counter.category): counter
+                for counter in DisplayOrderCounter.objects.all()
+            }
+
+        dishes = {
+            dish_id: (meal_type, category, is_active)
+            for dish_id, meal_type, category, is_active in Dish.objects.values_list(
+                'id', 'meal_type', 'category', 'is_active'
+            )
+        }
+        rows = list(DishDisplayOrder.objects.values_list('id', 'dish_id', 'meal_type', 'category', 'order'))
+
+        report, groups, stale_row_ids = _scan(dishes, rows, counters)
+
+        if fix:
+            assignments = []
+            for (meal_type, category), members in groups.items():
+                for index, (_, dish_id, current_order) in enumerate(sorted(members)):
+                    order = DishDisplayOrder.spaced_order(index)
+                    if current_order != order:
+                        assignments.append((dish_id, meal_type, category, order))
+
+            deleted = 0
+            if stale_row_ids:
+                deleted, _ = DishDisplayOrder.objects.filter(id__in=stale_row_ids).delete()
+            updated, created = DishDisplayOrder.apply_orders(assignments)
+            _reset_counters(counters, groups)
+            report['fixed'] = {"deleted": deleted, "updated": updated, "created": created}
+
+    return report
+
+
+def _scan(dishes, rows, counters):
+    """
+    Return (report, {group: [(sort key, dish_id, current order), ...]},
+    stale row ids)
+
+    Each group lists the dishes that belong to it after repair, with a key
+    that preserves their current relative order: rows already in the group
+    by order, then rows moved in from another group, then dishes that had
+    no row (by id). current order is None when the row has to move groups
+    or be created.
+    """
+    inactive = []
+    extras = []
+    mismatched = []
+    stale_row_ids = []
+    groups = defaultdict(list)
+    has_row = set()
+
+    for row_id, dish_id, meal_type, category, order in rows:
+        dish_meal_type, dish_category, is_active = dishes[dish_id]
+        if not is_active:
+            inactive.append(dish_id)
+            stale_row_ids.append(row_id)
+            continue
+        if dish_category == 'extras':
+            extras.append(dish_id)
+            stale_row_ids.append(row_id)
+            continue
+
+        has_row.add(dish_id)
+        group = (dish_meal_type, dish_category)
+        if (meal_type, category) != group:
+            mismatched.append({
+                "dish_id": dish_id,
+                "row": {"meal_type": meal_type, "category": category},
+                "dish": {"meal_type": dish_meal_type, "category": dish_category}
+            })
+            groups[group].append(((1, order, dish_id), dish_id, None))
+        else:
+            groups[group].append(((0, order, dish_id), dish_id, order))
+
+    missing = []
+    for dish_id, (meal_type, category, is_active) in sorted(dishes.items()):
+        if is_active and category != 'extras' and dish_id not in has_row:
+            missing.append(dish_id)
+            groups[(meal_type, category)].append(((2, 0, dish_id), dish_id, None))
+
+    duplicates = []
+    negatives = []
+    counters_behind = []
+    for (meal_type, category), members in sorted(groups.items()):
+        orders = sorted(order for _, _, order in members if order is not None)
+        repeated = sorted({order for previous, order in zip(orders, orders[1:]) if order == previous})
+        if repeated:
+            duplicates.append({
+                "meal_type": meal_type,
+                "category": category,
+                "orders": repeated
+            })
+        if orders and orders[0] < 0:
+            negatives.append({
+                "meal_type": meal_type,
+                "category": category,
+                "orders": [order for order in orders if order < 0]
+            })
+        counter = counters.get((meal_type, category))
+        if counter is not None and orders and counter.next_order <= orders[-1]:
+            counters_behind.append({
+                "meal_type": meal_type,
+                "category": category,
+                "next_order": counter.next_order,
+                "max_order": orders[-1]
+            })
+
+    report = {
+        "groups": len(groups),
+        "rows": len(rows),
+        "anomalies": {
+            "inactive": sorted(inactive),
+            "extras": sorted(extras),
+            "mismatched": mismatched,
+            "missing": missing,
+            "duplicate_orders": duplicates,
+            "negative_orders": negatives,
+            "counters_behind": counters_behind,
+        },
+        "fixed": None,
+    }
+    report["anomaly_count"] = sum(len(items) for items in report["anomalies"].values())
+    return report, groups, stale_row_ids
+
+
+def _reset_counters(counters, groups):
+    """Point each group's counter just past its respaced orders"""
+    to_update = []
+    to_create = []
+    for group, members in groups.items():
+        next_order = DishDisplayOrder.spaced_order(len(members) - 1) + 1
+        counter = counters.get(group)
+        if counter is None:
+            to_create.append(DisplayOrderCounter(meal_type=group[0], category=group[1], next_order=next_order))
+        else:
+            counter.next_order = next_order
+            to_update.append(counter)
+
+    if to_update:
+        DisplayOrderCounter.objects.bulk_update(to_update, ['next_order'])
+    if to_create:
+        DisplayOrderCounter.objects.bulk_create(to_create)
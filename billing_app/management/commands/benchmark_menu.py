@@ -0,0 +1,114 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from billing_app.menu_cache import get_menu_snapshot, invalidate_menu
+from billing_app.models import Dish, DishDisplayOrder
+from billing_app.views import GetDishesForOrderingView
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the dishes-for-ordering tree against a seeded menu. "
+        "Seed data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dishes', type=int, default=2000, help='Number of dishes to seed')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per variant')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['dishes'])
+            invalidate_menu()
+
+            results = [
+                ('legacy fan-out (query per meal x category)', self.legacy_tree),
+                ('snapshot, cold (reload + build)', self.cold_tree),
+                ('snapshot, warm (build only)', self.warm_tree),
+                ('view, warm (cached bytes)', self.view_tree),
+            ]
+            for label, func in results:
+                self.report(label, func, options['runs'])
+
+            transaction.set_rollback(True)
+
+        invalidate_menu()
+
+    def seed(self, count):
+        meal_categories = [
+            (meal_code, category_code)
+            for meal_code, _ in Dish.MEAL_TYPE_CHOICES if meal_code != 'all'
+            for category_code, _ in Dish.CATEGORY_CHOICES
+            if category_code != 'extras' and Dish.is_category_available_for_meal(category_code, meal_code)
+        ]
+
+        dishes = Dish.objects.bulk_create([
+            Dish(
+                name=f"Benchmark dish {i}",
+                price=Decimal('50.00') + i % 200,
+                meal_type=meal_categories[i % len(meal_categories)][0],
+                category=meal_categories[i % len(meal_categories)][1],
+            )
+            for i in range(count)
+        ])
+
+        next_order = {}
+        orders = []
+        for dish in dishes:
+            key = (dish.meal_type, dish.category)
+            order = next_order.get(key, DishDisplayOrder.get_next_order(*key))
+            next_order[key] = order + 1
+            orders.append(DishDisplayOrder(
+                dish=dish, meal_type=dish.meal_type, category=dish.category, order=order
+            ))
+        DishDisplayOrder.objects.bulk_create(orders)
+
+        self.stdout.write(f"Seeded {count} dishes across {len(meal_categories)} meal/category groups")
+
+    def report(self, label, func, runs):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f"{label:<45} median {statistics.median(timings):8.2f} ms  "
+            f"min {min(timings):8.2f} ms  queries {len(queries)}"
+        )
+
+    def legacy_tree(self):
+        """The previous implementation: distinct() per meal type, then a query per (meal, category)"""
+        tree = []
+        for meal_code, _ in Dish.MEAL_TYPE_CHOICES:
+            if meal_code == 'all':
+                continue
+            categories = Dish.objects.filter(
+                meal_type=meal_code, is_active=True
+            ).exclude(category='extras').values_list('category', flat=True).distinct().order_by('category')
+            for category in categories:
+                dishes = Dish.objects.filter(
+                    meal_type=meal_code, category=category, is_active=True
+                ).select_related('display_order_info').order_by('display_order_info__order', 'id')
+                tree.append([(dish.id, dish.display_order_info.order, str(dish.price)) for dish in dishes])
+        return tree
+
+    def cold_tree(self):
+        invalidate_menu()
+        return GetDishesForOrderingView().ordering_data(get_menu_snapshot())
+
+    def warm_tree(self):
+        return GetDishesForOrderingView().ordering_data(get_menu_snapshot())
+
+    def view_tree(self):
+        request = RequestFactory().get('/bill/dishes/for-ordering/')
+        return GetDishesForOrderingView.as_view()(request)
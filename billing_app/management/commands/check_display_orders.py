@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.display_orders import check_display_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Report DishDisplayOrder anomalies (duplicate or negative orders, "
+        "inactive/extras rows, rows in the wrong meal_type/category, dishes without "
+        "a row). --fix repairs them and respaces every group to ORDER_GAP multiples. "
+        "--at HH:MM keeps running and fixes daily at that local time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Repair anomalies and respace orders')
+        parser.add_argument('--at', metavar='HH:MM', help='Run daily at this local time (implies --fix)')
+
+    def handle(self, *args, **options):
+        if not options['at']:
+            self.run(fix=options['fix'])
+            return
+
+        try:
+            at = datetime.strptime(options['at'], '%H:%M').time()
+        except ValueError:
+            raise CommandError("--at must be HH:MM (24-hour)")
+
+        self.stdout.write(f"Scheduled display-order compaction daily at {at:%H:%M}")
+        while True:
+            now = datetime.now()
+            next_run = datetime.combine(now.date(), at)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            time.sleep((next_run - now).total_seconds())
+
+            try:
+                self.run(fix=True)
+            except Exception as e:
+                # Keep the schedule alive; the next run retries
+                self.stderr.write(f"Display-order compaction failed: {e}")
+
+    def run(self, fix):
+        report = check_display_orders(fix=fix)
+        anomalies = report['anomalies']
+
+        self.stdout.write(
+            f"{report['rows']} display order rows in {report['groups']} groups, "
+            f"{report['anomaly_count']} anomalies"
+        )
+        for name, items in anomalies.items():
+            if items:
+                self.stdout.write(f"  {name.replace('_', ' ')}: {len(items)}")
+                for item in items[:20]:
+                    self.stdout.write(f"    {item}")
+                if len(items) > 20:
+                    self.stdout.write(f"    ... {len(items) - 20} more")
+
+        if report['fixed'] is not None:
+            fixed = report['fixed']
+            self.stdout.write(self.style.SUCCESS(
+                f"Fixed: {fixed['deleted']} deleted, {fixed['updated']} updated, {fixed['created']} created"
+            ))
+        elif report['anomaly_count']:
+            self.stdout.write("Run with --fix to repair")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired order Idempotency-Keys in one bulk DELETE. "
+        "--interval SECONDS keeps running and purges on that schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, metavar='SECONDS', help='Purge every SECONDS seconds')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is None:
+            self.run()
+            return
+
+        if interval <= 0:
+            raise CommandError("--interval must be a positive number of seconds")
+
+        self.stdout.write(f"Purging expired idempotency keys every {interval}s")
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                # Keep the schedule alive; the next run retries
+                self.stderr.write(f"Idempotency key purge failed: {e}")
+            time.sleep(interval)
+
+    def run(self):
+        deleted = IdempotencyKey.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency keys"))
@@ -0,0 +1,382 @@
+"""
+In-process menu snapshot cache
+
+The menu changes a few times a day but is read on every POS tap, so the
+active dishes and their display orders are loaded once into memory and
+served from there until a Dish / DishDisplayOrder change bumps the menu
+version (see signals.py).
+
+Rendered responses are cached on top of the snapshot: the final JSON
+bytes (and a gzip'd copy) for each menu query variant are built once per
+menu version and then served as-is.
+
+The menu version also drives conditional GETs: menu endpoints send an
+ETag built from it and a Last-Modified of the last bump, so idle POS
+polls get a 304 without any rendering.
+
+Every version bump is also recorded in a short change log (which dish
+ids changed) so POS terminals can fetch deltas and long-poll for the next
+change instead of re-downloading the menu.
+
+Sold-out ("86'd") dishes are a separate shared set with its own
+availability version. Toggling one during service leaves the snapshot
+alone: responses read the set when they are rendered, and the
+availability version is part of the ETag and of the rendered-payload
+key, so the next poll re-renders from the same snapshot and long-polling
+terminals wake immediately.
+
+The cache is per process. Waitress runs a single process with several
+threads, so one snapshot is shared by all worker threads.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+
+# Seeded from the wall clock so versions keep increasing across restarts
+_version = int(time.time() * 1000)
+_changed_at = datetime.now(timezone.utc)
+_version_lock = threading.Lock()
+_version_changed = threading.Condition(_version_lock)
+
+# (version, frozenset of dish ids, or None when the change touched the
+# whole menu); versions in the log are consecutive
+CHANGE_LOG_MAX_ENTRIES = 1000
+_change_log = deque(maxlen=CHANGE_LOG_MAX_ENTRIES)
+
+_snapshot = None
+_load_lock = threading.Lock()
+
+# Sold-out dish ids (loaded on first use) and their version, also seeded
+# from the wall clock; guarded by _version_lock
+_sold_out = None
+_availability_version = int(time.time() * 1000)
+_sold_out_load_lock = threading.Lock()
+
+# Rendered payloads for the current version: {key: (json_bytes, gzip_bytes)}
+RENDER_CACHE_MAX_ENTRIES = 256
+_render_cache = {}
+_render_version = None
+_render_lock = threading.Lock()
+
+re_accepts_gzip = _lazy_re_compile(r"\bgzip\b")
+
+
+def display_order_key(dish):
+    """
+    Sort key matching ORDER BY display_order_info__order, id
+    Dishes without a display order sort last, as in PostgreSQL
+    """
+    order = dish['order']
+    return (order is None, order or 0, dish['id'])
+
+
+class MenuSnapshot:
+    """
+    Immutable view of the active menu at a given version
+
+    dishes:         tuple of dish dicts (active dishes only), ordered by id
+    ordered:        the same dishes in display order (order, id)
+    display_orders: {dish_id: order} from DishDisplayOrder
+    categories:     tuple of category codes that have active dishes
+    """
+    __slots__ = ('version', 'dishes', 'ordered', 'dishes_by_id', 'display_orders', 'categories', '_memo')
+
+    def __init__(self, version, dishes, display_orders):
+        self.version = version
+        self.dishes = tuple(dishes)
+        self.ordered = tuple(sorted(self.dishes, key=display_order_key))
+        self.dishes_by_id = {dish['id']: dish for dish in self.dishes}
+        self.display_orders = display_orders
+        present = {dish['category'] for dish in self.dishes}
+        from .models import Dish
+        self.categories = tuple(
+            code for code, _ in Dish.CATEGORY_CHOICES if code in present
+        )
+        self._memo = {}
+
+    def memoize(self, key, build):
+        """Cache a value derived from this snapshot (e.g. a sorted dish list)"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = build()
+            return value
+
+    def filter(self, meal_type=None, category=None, exclude_extras=False):
+        """Return dishes matching an exact meal_type / category"""
+        return [
+            dish for dish in self.dishes
+            if (meal_type is None or dish['meal_type'] == meal_type)
+            and (category is None or dish['category'] == category)
+            and not (exclude_extras and dish['category'] == 'extras')
+        ]
+
+    def grouped(self, field, meal_types=None):
+        """
+        Group the non-extras dishes by `field` ('category' or 'meal_type')
+        in a single pass over the display-ordered dishes
+
+        meal_types optionally restricts the dishes to those meal types.
+        Returns {value: [dish, ...]} with each group in display order.
+        """
+        groups = {}
+        for dish in self.ordered:
+            if dish['category'] == 'extras':
+                continue
+            if meal_types is not None and dish['meal_type'] not in meal_types:
+                continue
+            groups.setdefault(dish[field], []).append(dish)
+        return groups
+
+
+def get_menu_version():
+    return _version
+
+
+def invalidate_menu(dish_ids=None):
+    """
+    Bump the menu version so the next read reloads the snapshot
+
+    dish_ids names the dishes that changed; None means the change may have
+    touched any dish and delta clients must resync fully.
+    """
+    global _version
+    with _version_lock:
+        _version += 1
+        _touch()
+        _change_log.append((_version, frozenset(dish_ids) if dish_ids is not None else None))
+        _version_changed.notify_all()
+    return _version
+
+
+def _touch():
+    """Set Last-Modified to now; call with _version_lock held"""
+    global _changed_at
+    # Never ahead of the clock, or a client could hold a future
+    # If-Modified-Since and miss later changes. Changes within the same
+    # second are told apart by the versioned ETag
+    _changed_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def wait_for_menu_change(since, timeout, availability_since=None):
+    """
+    Block until the menu version differs from `since` (or the availability
+    version from `availability_since`, when given) or `timeout` seconds
+    pass. Returns the current menu version.
+    """
+    def changed():
+        return _version != since or (
+            availability_since is not None and _availability_version != availability_since
+        )
+
+    with _version_changed:
+        _version_changed.wait_for(changed, timeout=timeout)
+        return _version
+
+
+def get_availability_version():
+    return _availability_version
+
+
+def get_sold_out():
+    """Frozenset of sold-out dish ids"""
+    global _sold_out
+    sold_out = _sold_out
+    if sold_out is not None:
+        return sold_out
+
+    with _sold_out_load_lock:
+        if _sold_out is None:
+            from .models import Dish
+            loaded = frozenset(Dish.objects.filter(is_sold_out=True).values_list('id', flat=True))
+            with _version_lock:
+                if _sold_out is None:
+                    _sold_out = loaded
+        return _sold_out
+
+
+def mark_sold_out(dish_ids, sold_out=True):
+    """
+    Apply committed sold-out changes to the shared set; bumps the
+    availability version (and wakes long-polls) only if the set changed
+    """
+    global _sold_out, _availability_version
+    get_sold_out()
+    dish_ids = frozenset(dish_ids)
+    with _version_lock:
+        updated = _sold_out | dish_ids if sold_out else _sold_out - dish_ids
+        if updated != _sold_out:
+            _sold_out = updated
+            _availability_version += 1
+            _touch()
+            _version_changed.notify_all()
+        return _availability_version
+
+
+def changed_dish_ids(since, until):
+    """
+    Return the ids of dishes changed in versions (since, until]
+
+    Returns None when the change log cannot answer - `since` is older than
+    the retained history, comes from another process, or a change in the
+    range touched the whole menu - and the client must resync fully.
+    """
+    if since == until:
+        return set()
+
+    with _version_lock:
+        entries = list(_change_log)
+
+    if since > until or not entries or entries[0][0] > since + 1:
+        return None
+
+    dish_ids = set()
+    for version, ids in entries:
+        if since < version <= until:
+            if ids is None:
+                return None
+            dish_ids.update(ids)
+    return dish_ids
+
+
+def menu_etag(request, *args, **kwargs):
+    # Weak: the same version is served both plain and gzip'd
+    return f'W/"menu-{_version}-{_availability_version}"'
+
+
+def menu_last_modified(request, *args, **kwargs):
+    return _changed_at
+
+
+# Decorators for menu GET handlers: clients must revalidate on every poll,
+# and a matching If-None-Match / If-Modified-Since returns 304 before the
+# view body runs
+menu_conditional_get = [
+    cache_control(no_cache=True),
+    condition(etag_func=menu_etag, last_modified_func=menu_last_modified),
+]
+
+
+def get_menu_snapshot():
+    """
+    Return the current menu snapshot, reloading it if the menu version moved
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == _version:
+        return snapshot
+
+    with _load_lock:
+        if _snapshot is not None and _snapshot.version == _version:
+            return _snapshot
+        # Read the version before loading: a change committed while we load
+        # bumps it again and the next reader reloads
+        version = _version
+        _snapshot = _load_snapshot(version)
+        return _snapshot
+
+
+def _load_snapshot(version):
+    """
+    Load the active menu with a single values() query, joining each dish's
+    display order through the display_order_info relation
+    """
+    from .menu_rules import get_menu_rules
+    from .models import Dish
+
+    rules = get_menu_rules()
+    meal_type_display = rules.meal_type_display
+    category_display = rules.category_display
+
+    dishes = []
+    display_orders = {}
+    rows = Dish.objects.filter(is_active=True).order_by('id').values(
+        'id', 'name', 'secondary_name', 'price', 'meal_type', 'category',
+        'image', 'is_active', 'created_at', 'updated_at',
+        order=F('display_order_info__order'),
+    )
+    for row in rows:
+        if row['order'] is not None:
+            display_orders[row['id']] = row['order']
+
+        dishes.append({
+            'id': row['id'],
+            'name': row['name'],
+            'secondary_name': row['secondary_name'],
+            'price': row['price'],
+            'meal_type': row['meal_type'],
+            'meal_type_display': meal_type_display.get(row['meal_type'], row['meal_type']),
+            'category': row['category'],
+            'category_display': category_display.get(row['category'], row['category']),
+            'image': default_storage.url(row['image']) if row['image'] else None,
+            'is_active': row['is_active'],
+            'created_at': row['created_at'].isoformat(),
+            'updated_at': row['updated_at'].isoformat(),
+            'order': row['order'],
+        })
+
+    return MenuSnapshot(version, dishes, display_orders)
+
+
+def render_menu_payload(key, build):
+    """
+    Return (json_bytes, gzip_bytes) for a menu query variant
+
+    build(snapshot) returns the JSON-serializable payload; it only runs the
+    first time a variant is requested for a given menu and availability
+    version.
+    """
+    global _render_version
+    snapshot = get_menu_snapshot()
+    version = (snapshot.version, _availability_version)
+
+    with _render_lock:
+        if _render_version != version:
+            _render_cache.clear()
+            _render_version = version
+        entry = _render_cache.get(key)
+
+    if entry is None:
+        body = json.dumps(build(snapshot), cls=DjangoJSONEncoder).encode('utf-8')
+        entry = (body, gzip.compress(body, mtime=0))
+        with _render_lock:
+            if _render_version == version:
+                # Unknown query values can create new keys; keep memory bounded
+                if len(_render_cache) >= RENDER_CACHE_MAX_ENTRIES:
+                    _render_cache.clear()
+                _render_cache[key] = entry
+
+    return entry
+
+
+def menu_response(request, key, build):
+    """
+    Serve a cached menu payload as raw bytes, gzip'd when the client accepts it
+    """
+    # Image URLs are absolute, so the rendered bytes depend on scheme and host
+    body, gzipped = render_menu_payload(
+        (request.scheme, request.get_host()) + tuple(key), build
+    )
+
+    if re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response = HttpResponse(gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(body, content_type='application/json')
+
+    response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,150 @@
+"""
+Compiled meal/category availability rules
+
+Dish.CATEGORY_MEAL_RESTRICTIONS (or, with settings.MENU_RULES_FROM_DB, the
+CategoryMealRestriction table) is compiled once into frozen lookup tables:
+a bitmask of allowed meal types per category, a frozenset of available
+categories per meal type and the choice dicts/tuples the views validate
+against. Lookups are then dict/set operations instead of loops over the
+choice lists.
+
+Rules are compiled from code at app ready. When loading from the database,
+the first lookup after a CategoryMealRestriction change recompiles them.
+"""
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+
+
+class CompiledMenuRules:
+    """
+    Frozen lookup tables for one set of restriction rules
+
+    meal_types / categories:      choice codes, in declaration order
+    meal_type_display / category_display:  read-only {code: label}
+    valid_meal_types / valid_categories:   frozensets of codes
+    orderable_meal_types / orderable_categories:  codes that take display
+        orders ('all' and 'extras' excluded)
+    meal_bits:                    {meal_type: bit}
+    category_masks:               {category: bitmask of allowed meal types}
+                                  (restricted categories only)
+    available_by_meal:            {meal_type: frozenset of categories}
+    """
+
+    def __init__(self, meal_type_choices, category_choices, restrictions):
+        self.meal_types = tuple(code for code, _ in meal_type_choices)
+        self.categories = tuple(code for code, _ in category_choices)
+        self.meal_type_display = MappingProxyType(dict(meal_type_choices))
+        self.category_display = MappingProxyType(dict(category_choices))
+        self.valid_meal_types = frozenset(self.meal_types)
+        self.valid_categories = frozenset(self.categories)
+        self.orderable_meal_types = tuple(code for code in self.meal_types if code != 'all')
+        self.orderable_categories = tuple(code for code in self.categories if code != 'extras')
+
+        # 'all' is allowed by every restriction
+        self.meal_bits = MappingProxyType({
+            code: 1 << index for index, code in enumerate(self.meal_types)
+        })
+        all_bit = self.meal_bits.get('all', 0)
+
+        masks = {}
+        restricted_meal_types = {}
+        for category, meal_types in restrictions.items():
+            # Extras bypass all meal restrictions
+            if category == 'extras':
+                continue
+            allowed = tuple(mt for mt in self.meal_types if mt in meal_types)
+            mask = all_bit
+            for meal_type in allowed:
+                mask |= self.meal_bits[meal_type]
+            masks[category] = mask
+            restricted_meal_types[category] = allowed
+        self.category_masks = MappingProxyType(masks)
+        self.restricted_meal_types = MappingProxyType(restricted_meal_types)
+
+        # Categories with no restriction, for meal types outside the choices
+        self.unrestricted_categories = tuple(
+            code for code in self.categories if code not in masks
+        )
+
+        self.available_by_meal = MappingProxyType({
+            meal_type: frozenset(self._available(meal_type))
+            for meal_type in self.meal_types
+        })
+        self._available_ordered = {
+            meal_type: tuple(self._available(meal_type))
+            for meal_type in self.meal_types
+        }
+
+    def _available(self, meal_type):
+        return [
+            code for code in self.categories
+            if self.is_category_available_for_meal(code, meal_type)
+        ]
+
+    def is_category_available_for_meal(self, category, meal_type):
+        mask = self.category_masks.get(category)
+        if mask is None:
+            return True  # No restrictions means available
+        return bool(mask & self.meal_bits.get(meal_type, 0))
+
+    def available_categories_for_meal(self, meal_type):
+        """Categories available for a meal type, in CATEGORY_CHOICES order"""
+        available = self._available_ordered.get(meal_type)
+        if available is None:
+            return self.unrestricted_categories
+        return available
+
+
+_rules = None
+_stale = False
+_lock = threading.Lock()
+
+
+def compile_rules(restrictions=None):
+    """
+    Compile and install rules; restrictions defaults to
+    Dish.CATEGORY_MEAL_RESTRICTIONS
+    """
+    global _rules
+    from .models import Dish
+
+    if restrictions is None:
+        restrictions = Dish.CATEGORY_MEAL_RESTRICTIONS
+    _rules = CompiledMenuRules(Dish.MEAL_TYPE_CHOICES, Dish.CATEGORY_CHOICES, restrictions)
+    return _rules
+
+
+def mark_rules_stale():
+    """Recompile from the database on the next lookup"""
+    global _stale
+    _stale = True
+
+
+def rules_from_db():
+    return getattr(settings, 'MENU_RULES_FROM_DB', False)
+
+
+def get_menu_rules():
+    """Return the compiled rules, recompiling from the database if stale"""
+    global _stale
+    if _rules is None or (_stale and rules_from_db()):
+        with _lock:
+            if _rules is None or (_stale and rules_from_db()):
+                _stale = False
+                compile_rules(_load_db_restrictions() if rules_from_db() else None)
+    return _rules
+
+
+def _load_db_restrictions():
+    """
+    {category: [meal_type, ...]} from CategoryMealRestriction, or None to
+    fall back to the code defaults when the table is empty
+    """
+    from .models import CategoryMealRestriction
+
+    restrictions = {}
+    for category, meal_type in CategoryMealRestriction.objects.values_list('category', 'meal_type'):
+        restrictions.setdefault(category, []).append(meal_type)
+    return restrictions or None
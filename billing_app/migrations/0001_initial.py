@@ -1,148 +1,148 @@
-# Generated by Django 5.2.7 on 2025-12-28 12:26
-
-import django.core.validators
-import django.db.models.deletion
-import django.utils.timezone
-from decimal import Decimal
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    initial = True
-
-    dependencies = [
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='Dish',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=200)),
-                ('secondary_name', models.CharField(blank=True, max_length=200, null=True)),
-                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
-                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], default='afternoon', max_length=20)),
-                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], default='rice', max_length=20)),
-                ('image', models.ImageField(blank=True, null=True, upload_to='dishes/')),
-                ('is_active', models.BooleanField(default=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('updated_at', models.DateTimeField(auto_now=True)),
-            ],
-            options={
-                'verbose_name_plural': 'Dishes',
-                'ordering': ['category', 'name'],
-            },
-        ),
-        migrations.CreateModel(
-            name='Expense',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('expense_type', models.CharField(choices=[('worker', 'Worker Expense'), ('material', 'Material Expense')], default='worker', max_length=20)),
-                ('worker_category', models.CharField(blank=True, choices=[('wage', 'Daily Wage'), ('bonus', 'Bonus'), ('transport', 'Transport'), ('food', 'Food'), ('advance', 'Advance Payment'), ('other', 'Other')], max_length=50, null=True)),
-                ('description', models.CharField(max_length=255)),
-                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
-                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
-                ('notes', models.TextField(blank=True, null=True)),
-            ],
-            options={
-                'verbose_name_plural': 'Expenses',
-                'ordering': ['-timestamp'],
-            },
-        ),
-        migrations.CreateModel(
-            name='Material',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=100, unique=True)),
-                ('unit', models.CharField(choices=[('kg', 'Kilogram'), ('bag', 'Bag'), ('ton', 'Ton'), ('piece', 'Piece'), ('meter', 'Meter'), ('liter', 'Liter'), ('box', 'Box'), ('bundle', 'Bundle'), ('other', 'Other')], default='piece', max_length=20)),
-                ('description', models.TextField(blank=True, null=True)),
-                ('is_active', models.BooleanField(default=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('updated_at', models.DateTimeField(auto_now=True)),
-            ],
-            options={
-                'verbose_name_plural': 'Materials',
-                'ordering': ['name'],
-            },
-        ),
-        migrations.CreateModel(
-            name='Order',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('order_type', models.CharField(choices=[('dine-in', 'Dine In'), ('delivery', 'Delivery')], default='dine-in', max_length=20)),
-                ('payment_type', models.CharField(choices=[('cash', 'Cash'), ('upi', 'UPI'), ('card', 'Card')], default='cash', max_length=20)),
-                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
-                ('addons', models.JSONField(blank=True, default=list, null=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('updated_at', models.DateTimeField(auto_now=True)),
-            ],
-            options={
-                'ordering': ['-created_at'],
-            },
-        ),
-        migrations.CreateModel(
-            name='Worker',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=100)),
-                ('role', models.CharField(choices=[('worker', 'Worker / Operator'), ('manager', 'Manager'), ('supervisor', 'Supervisor')], max_length=20)),
-                ('contact', models.CharField(blank=True, max_length=20, null=True)),
-                ('joined_date', models.DateField(default=django.utils.timezone.now)),
-                ('is_active', models.BooleanField(default=True)),
-            ],
-            options={
-                'verbose_name_plural': 'Workers',
-                'ordering': ['name'],
-            },
-        ),
-        migrations.CreateModel(
-            name='ExpenseItem',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
-                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
-                ('subtotal', models.DecimalField(decimal_places=2, editable=False, max_digits=10)),
-                ('expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='billing_app.expense')),
-                ('material', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='expense_items', to='billing_app.material')),
-            ],
-            options={
-                'verbose_name_plural': 'Expense Items',
-                'ordering': ['id'],
-            },
-        ),
-        migrations.CreateModel(
-            name='OrderItem',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('quantity', models.IntegerField(default=1)),
-                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
-                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='billing_app.dish')),
-                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='billing_app.order')),
-            ],
-        ),
-        migrations.AddField(
-            model_name='expense',
-            name='worker',
-            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='billing_app.worker'),
-        ),
-        migrations.CreateModel(
-            name='DishDisplayOrder',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], max_length=20)),
-                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], max_length=20)),
-                ('order', models.IntegerField(default=0)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('updated_at', models.DateTimeField(auto_now=True)),
-                ('dish', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='display_order_info', to='billing_app.dish')),
-            ],
-            options={
-                'verbose_name': 'Dish Display Order',
-                'verbose_name_plural': 'Dish Display Orders',
-                'ordering': ['meal_type', 'category', 'order'],
-                'indexes': [models.Index(fields=['meal_type', 'category', 'order'], name='billing_app_meal_ty_3aa4af_idx'), models.Index(fields=['meal_type', 'order'], name='billing_app_meal_ty_8094f0_idx')],
-                'unique_together': {('meal_type', 'category', 'order')},
-            },
-        ),
-    ]
+# Generated by Django 5.2.7 on 2025-12-28 12:26
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dish',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('secondary_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], default='afternoon', max_length=20)),
+                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], default='rice', max_length=20)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='dishes/')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dishes',
+                'ordering': ['category', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Expense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expense_type', models.CharField(choices=[('worker', 'Worker Expense'), ('material', 'Material Expense')], default='worker', max_length=20)),
+                ('worker_category', models.CharField(blank=True, choices=[('wage', 'Daily Wage'), ('bonus', 'Bonus'), ('transport', 'Transport'), ('food', 'Food'), ('advance', 'Advance Payment'), ('other', 'Other')], max_length=50, null=True)),
+                ('description', models.CharField(max_length=255)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notes', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Expenses',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Material',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('unit', models.CharField(choices=[('kg', 'Kilogram'), ('bag', 'Bag'), ('ton', 'Ton'), ('piece', 'Piece'), ('meter', 'Meter'), ('liter', 'Liter'), ('box', 'Box'), ('bundle', 'Bundle'), ('other', 'Other')], default='piece', max_length=20)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Materials',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_type', models.CharField(choices=[('dine-in', 'Dine In'), ('delivery', 'Delivery')], default='dine-in', max_length=20)),
+                ('payment_type', models.CharField(choices=[('cash', 'Cash'), ('upi', 'UPI'), ('card', 'Card')], default='cash', max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('addons', models.JSONField(blank=True, default=list, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Worker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('role', models.CharField(choices=[('worker', 'Worker / Operator'), ('manager', 'Manager'), ('supervisor', 'Supervisor')], max_length=20)),
+                ('contact', models.CharField(blank=True, max_length=20, null=True)),
+                ('joined_date', models.DateField(default=django.utils.timezone.now)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Workers',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenseItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('subtotal', models.DecimalField(decimal_places=2, editable=False, max_digits=10)),
+                ('expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='billing_app.expense')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='expense_items', to='billing_app.material')),
+            ],
+            options={
+                'verbose_name_plural': 'Expense Items',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='billing_app.dish')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='billing_app.order')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='worker',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='billing_app.worker'),
+        ),
+        migrations.CreateModel(
+            name='DishDisplayOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], max_length=20)),
+                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], max_length=20)),
+                ('order', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dish', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='display_order_info', to='billing_app.dish')),
+            ],
+            options={
+                'verbose_name': 'Dish Display Order',
+                'verbose_name_plural': 'Dish Display Orders',
+                'ordering': ['meal_type', 'category', 'order'],
+                'indexes': [models.Index(fields=['meal_type', 'category', 'order'], name='billing_app_meal_ty_3aa4af_idx'), models.Index(fields=['meal_type', 'order'], name='billing_app_meal_ty_8094f0_idx')],
+                'unique_together': {('meal_type', 'category', 'order')},
+            },
+        ),
+    ]
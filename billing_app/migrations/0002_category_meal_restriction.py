@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryMealRestriction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], max_length=20)),
+                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Category Meal Restriction',
+                'verbose_name_plural': 'Category Meal Restrictions',
+                'ordering': ['category', 'meal_type'],
+                'unique_together': {('category', 'meal_type')},
+            },
+        ),
+    ]
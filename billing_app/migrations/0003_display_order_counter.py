@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0002_category_meal_restriction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisplayOrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meal_type', models.CharField(choices=[('all', 'All Day'), ('morning', 'Morning'), ('afternoon', 'Afternoon'), ('night', 'Night')], max_length=20)),
+                ('category', models.CharField(choices=[('rice', 'Rice'), ('gravy', 'Gravy'), ('curry', 'Curry'), ('sidedish', 'Side Dish'), ('dosa', 'Dosa'), ('porotta', 'Porotta'), ('chinese', 'Chinese'), ('extras', 'Extras')], max_length=20)),
+                ('next_order', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Display Order Counter',
+                'verbose_name_plural': 'Display Order Counters',
+                'unique_together': {('meal_type', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0003_display_order_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bill', 'Customer Bill')], default='bill', max_length=20)),
+                ('backend', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('printing', 'Printing'), ('done', 'Printed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('printed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='print_jobs', to='billing_app.order')),
+            ],
+            options={
+                'verbose_name': 'Print Job',
+                'verbose_name_plural': 'Print Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='billing_app_status_1ac95f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0004_print_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KitchenStation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('categories', models.JSONField(default=list)),
+                ('backend', models.CharField(blank=True, default='', max_length=50)),
+                ('printer', models.CharField(blank=True, default='', max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Kitchen Station',
+                'verbose_name_plural': 'Kitchen Stations',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='printjob',
+            name='kind',
+            field=models.CharField(choices=[('bill', 'Customer Bill'), ('kot', 'Kitchen Order Ticket')], default='bill', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='printjob',
+            name='station',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='print_jobs', to='billing_app.kitchenstation'),
+        ),
+    ]
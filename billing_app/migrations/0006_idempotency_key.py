@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0005_kitchen_station'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('response', models.JSONField()),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0006_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0007_order_client_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dish',
+            name='is_sold_out',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,470 +1,832 @@
-from django.db import models
-from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
-from django.utils import timezone
-
-
-from django.core.validators import MinValueValidator
-from decimal import Decimal
-
-class Dish(models.Model):
-    # Meal Time Choices (when to serve)
-    MEAL_TYPE_CHOICES = [
-        ('all', 'All Day'),
-        ('morning', 'Morning'),
-        ('afternoon', 'Afternoon'),
-        ('night', 'Night'),
-    ]
-    
-    # Category choices for restaurant page display
-    CATEGORY_CHOICES = [
-        ('rice', 'Rice'),
-        ('gravy', 'Gravy'),
-        ('curry', 'Curry'),
-        ('sidedish', 'Side Dish'),
-        ('dosa', 'Dosa'),
-        ('porotta', 'Porotta'),
-        ('chinese', 'Chinese'),
-        ('extras', 'Extras'),
-    ]
-    
-    # Define which categories are available during which meal times
-    # Categories not in this dict are available at all times
-    CATEGORY_MEAL_RESTRICTIONS = {
-        'dosa': ['morning', 'night'],      # Dosa only for morning and night
-        'porotta': ['afternoon','night'],              # Porotta only for night
-        'chinese': ['afternoon', 'night'], # Chinese for afternoon and night
-        # extras category has no restrictions - available at all times
-        # Add more restrictions as needed
-    }
-    
-    name = models.CharField(max_length=200)
-    secondary_name = models.CharField(max_length=200, null=True, blank=True)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    meal_type = models.CharField(
-        max_length=20, 
-        choices=MEAL_TYPE_CHOICES, 
-        default='afternoon'
-    )
-    category = models.CharField(
-        max_length=20,
-        choices=CATEGORY_CHOICES,
-        default='rice'
-    )
-    image = models.ImageField(upload_to='dishes/', null=True, blank=True)
-    is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        verbose_name_plural = "Dishes"
-        ordering = ['category', 'name']
-    
-    def __str__(self):
-        category_display = self.get_category_display()
-        return f"{self.name} ({category_display}) - {self.get_meal_type_display()}"
-    
-    def clean(self):
-        """
-        Validate that the dish's meal_type is compatible with its category restrictions
-        """
-        super().clean()
-        
-        # Skip validation if category is not set
-        if not self.category:
-            return
-        
-        # Extras category bypasses all meal restrictions
-        if self.category == 'extras':
-            return
-        
-        # Check if this category has meal restrictions
-        if self.category in self.CATEGORY_MEAL_RESTRICTIONS:
-            allowed_meal_types = self.CATEGORY_MEAL_RESTRICTIONS[self.category]
-            
-            # 'all' meal type bypasses restrictions
-            if self.meal_type != 'all' and self.meal_type not in allowed_meal_types:
-                allowed_display = ', '.join([
-                    dict(self.MEAL_TYPE_CHOICES).get(mt, mt) 
-                    for mt in allowed_meal_types
-                ])
-                raise ValidationError({
-                    'meal_type': f"{self.get_category_display()} items can only be served during: {allowed_display}. "
-                                f"Current selection: {self.get_meal_type_display()}"
-                })
-    
-    def save(self, *args, **kwargs):
-        """Override save to call full_clean for validation"""
-        # Only validate if not skipping validation (useful for bulk operations)
-        if not kwargs.pop('skip_validation', False):
-            self.full_clean()
-        super().save(*args, **kwargs)
-    
-    @classmethod
-    def get_available_categories_for_meal(cls, meal_type):
-        """
-        Return list of categories available for a specific meal type
-        """
-        if meal_type == 'all':
-            # Return all categories when 'all' is selected
-            return [cat[0] for cat in cls.CATEGORY_CHOICES]
-        
-        available_categories = []
-        for category_code, category_name in cls.CATEGORY_CHOICES:
-            # Extras are always available
-            if category_code == 'extras':
-                available_categories.append(category_code)
-                continue
-            
-            if category_code in cls.CATEGORY_MEAL_RESTRICTIONS:
-                # Check if meal_type is in the allowed list
-                if meal_type in cls.CATEGORY_MEAL_RESTRICTIONS[category_code]:
-                    available_categories.append(category_code)
-            else:
-                # Category has no restrictions, available for all meals
-                available_categories.append(category_code)
-        
-        return available_categories
-    
-    @classmethod
-    def is_category_available_for_meal(cls, category, meal_type):
-        """
-        Check if a specific category is available for a meal type
-        """
-        if meal_type == 'all' or category == 'extras':
-            return True
-        
-        if category in cls.CATEGORY_MEAL_RESTRICTIONS:
-            return meal_type in cls.CATEGORY_MEAL_RESTRICTIONS[category]
-        
-        return True  # No restrictions means available
-
-
-class Order(models.Model):
-    ORDER_TYPE_CHOICES = [
-        ('dine-in', 'Dine In'),
-        ('delivery', 'Delivery'),
-    ]
-    
-    PAYMENT_TYPE_CHOICES = [
-        ('cash', 'Cash'),
-        ('upi', 'UPI'),
-        ('card', 'Card'),
-    ]
-    
-    order_type = models.CharField(
-        max_length=20, 
-        choices=ORDER_TYPE_CHOICES, 
-        default='dine-in'
-    )
-    payment_type = models.CharField(
-        max_length=20,
-        choices=PAYMENT_TYPE_CHOICES,
-        default='cash'
-    )
-    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    addons = models.JSONField(null=True, blank=True, default=list)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        ordering = ['-created_at']
-    
-    def __str__(self):
-        return f"Order #{self.id} - {self.get_order_type_display()} - ₹{self.total_amount}"
-
-
-class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
-    dish = models.ForeignKey(Dish, on_delete=models.CASCADE)
-    quantity = models.IntegerField(default=1)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    
-    def __str__(self):
-        return f"{self.dish.name} x {self.quantity}"
-    
-    def get_subtotal(self):
-        """Calculate subtotal for this order item"""
-        return self.price * self.quantity
-
-
-class DishDisplayOrder(models.Model):
-    """
-    Table to store display order of dishes within each meal time and category
-    Order starts from 0 for each meal_type + category combination separately
-    Excludes 'extras' category from ordering
-    """
-    dish = models.OneToOneField(
-        Dish, 
-        on_delete=models.CASCADE, 
-        related_name='display_order_info',
-        unique=True
-    )
-    meal_type = models.CharField(
-        max_length=20,
-        choices=Dish.MEAL_TYPE_CHOICES
-    )
-    category = models.CharField(
-        max_length=20,
-        choices=Dish.CATEGORY_CHOICES
-    )
-    order = models.IntegerField(default=0)  # Order within meal_type + category (starts from 0)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        ordering = ['meal_type', 'category', 'order']
-        verbose_name = "Dish Display Order"
-        verbose_name_plural = "Dish Display Orders"
-        # Unique constraint: same order number can't exist for same meal_type + category
-        unique_together = [['meal_type', 'category', 'order']]
-        indexes = [
-            models.Index(fields=['meal_type', 'category', 'order']),
-            models.Index(fields=['meal_type', 'order']),
-        ]
-    
-    def __str__(self):
-        return f"{self.dish.name} - {self.get_meal_type_display()} - {self.get_category_display()} - Order: {self.order}"
-    
-    def clean(self):
-        """
-        Validate that extras category is not being ordered
-        """
-        super().clean()
-        
-        if self.category == 'extras':
-            raise ValidationError({
-                'category': "Extras category cannot be ordered. They are always available."
-            })
-        
-        # Ensure dish's category matches the order's category
-        if self.dish and self.dish.category != self.category:
-            raise ValidationError({
-                'category': f"Category mismatch. Dish category is '{self.dish.get_category_display()}' "
-                           f"but order category is '{self.get_category_display()}'"
-            })
-        
-        # Ensure dish's meal_type matches the order's meal_type
-        if self.dish and self.dish.meal_type != self.meal_type:
-            raise ValidationError({
-                'meal_type': f"Meal type mismatch. Dish meal type is '{self.dish.get_meal_type_display()}' "
-                            f"but order meal type is '{self.get_meal_type_display()}'"
-            })
-    
-    def save(self, *args, **kwargs):
-        """
-        Auto-assign order if not set
-        Sync category and meal_type from dish
-        """
-        # Sync category and meal_type from dish
-        if self.dish:
-            self.category = self.dish.category
-            self.meal_type = self.dish.meal_type
-        
-        # Validate before saving
-        if not kwargs.pop('skip_validation', False):
-            self.full_clean()
-        
-        # Auto-assign order if not set (for new records)
-        if self.order == 0 and not self.pk:
-            # Get the max order for this meal type + category combination
-            max_order = DishDisplayOrder.objects.filter(
-                meal_type=self.meal_type,
-                category=self.category
-            ).aggregate(models.Max('order'))['order__max']
-            
-            self.order = (max_order or -1) + 1
-        
-        super().save(*args, **kwargs)
-    
-    @classmethod
-    def get_next_order(cls, meal_type, category):
-        """
-        Get the next available order number for a meal_type + category combination
-        """
-        max_order = cls.objects.filter(
-            meal_type=meal_type,
-            category=category
-        ).aggregate(models.Max('order'))['order__max']
-        
-        return (max_order or -1) + 1
-    
-    @classmethod
-    def reorder_category(cls, meal_type, category, dishes_order_list):
-        """
-        Reorder dishes within a specific meal_type + category
-        
-        dishes_order_list: List of tuples [(dish_id, new_order), ...]
-        """
-        from django.db import transaction
-        
-        with transaction.atomic():
-            for dish_id, new_order in dishes_order_list:
-                cls.objects.filter(
-                    dish_id=dish_id,
-                    meal_type=meal_type,
-                    category=category
-                ).update(order=new_order)
-
-
-
-class Worker(models.Model):
-    """Renamed from Person - Track workers/employees"""
-    ROLE_CHOICES = [
-        ('worker', 'Worker / Operator'),
-        ('manager', 'Manager'),
-        ('supervisor', 'Supervisor'),
-    ]
-
-    name = models.CharField(max_length=100)
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
-    contact = models.CharField(max_length=20, blank=True, null=True)
-    joined_date = models.DateField(default=timezone.now)
-    is_active = models.BooleanField(default=True)
-
-    class Meta:
-        ordering = ['name']
-        verbose_name_plural = "Workers"
-
-    def __str__(self):
-        return f"{self.name} ({self.get_role_display()})"
-
-
-class Material(models.Model):
-    """Track different types of materials"""
-    UNIT_CHOICES = [
-        ('kg', 'Kilogram'),
-        ('bag', 'Bag'),
-        ('ton', 'Ton'),
-        ('piece', 'Piece'),
-        ('meter', 'Meter'),
-        ('liter', 'Liter'),
-        ('box', 'Box'),
-        ('bundle', 'Bundle'),
-        ('other', 'Other'),
-    ]
-
-    name = models.CharField(max_length=100, unique=True)
-    unit = models.CharField(max_length=20, choices=UNIT_CHOICES, default='piece')
-    description = models.TextField(blank=True, null=True)
-    is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        ordering = ['name']
-        verbose_name_plural = "Materials"
-
-    def __str__(self):
-        return f"{self.name} ({self.get_unit_display()})"
-
-
-class Expense(models.Model):
-    """Main expense record - supports both worker and material expenses"""
-    EXPENSE_TYPE_CHOICES = [
-        ('worker', 'Worker Expense'),
-        ('material', 'Material Expense'),
-    ]
-
-    WORKER_CATEGORY_CHOICES = [
-        ('wage', 'Daily Wage'),
-        ('bonus', 'Bonus'),
-        ('transport', 'Transport'),
-        ('food', 'Food'),
-        ('advance', 'Advance Payment'),
-        ('other', 'Other'),
-    ]
-
-    expense_type = models.CharField(
-        max_length=20,
-        choices=EXPENSE_TYPE_CHOICES,
-        default='worker'
-    )
-    
-    # For worker expenses
-    worker = models.ForeignKey(
-        Worker,
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name='expenses'
-    )
-    worker_category = models.CharField(
-        max_length=50,
-        choices=WORKER_CATEGORY_CHOICES,
-        blank=True,
-        null=True
-    )
-    
-    description = models.CharField(max_length=255)
-    total_amount = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.01'))]
-    )
-    timestamp = models.DateTimeField(default=timezone.now)
-    notes = models.TextField(blank=True, null=True)
-
-    class Meta:
-        ordering = ['-timestamp']
-        verbose_name_plural = "Expenses"
-
-    def __str__(self):
-        if self.expense_type == 'worker' and self.worker:
-            return f"Worker: {self.worker.name} - ₹{self.total_amount}"
-        else:
-            return f"Material: {self.description} - ₹{self.total_amount}"
-
-    def save(self, *args, **kwargs):
-        # Calculate total_amount for material expenses from items
-        if self.expense_type == 'material' and self.pk:
-            items_total = self.items.aggregate(
-                total=models.Sum('subtotal')
-            )['total'] or Decimal('0.00')
-            self.total_amount = items_total
-        super().save(*args, **kwargs)
-
-
-class ExpenseItem(models.Model):
-    """Individual material items in a material expense"""
-    expense = models.ForeignKey(
-        Expense,
-        on_delete=models.CASCADE,
-        related_name='items'
-    )
-    material = models.ForeignKey(
-        Material,
-        on_delete=models.PROTECT,
-        related_name='expense_items'
-    )
-    quantity = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.01'))]
-    )
-    unit_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.01'))]
-    )
-    subtotal = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        editable=False
-    )
-
-    class Meta:
-        ordering = ['id']
-        verbose_name_plural = "Expense Items"
-
-    def __str__(self):
-        return f"{self.material.name} x {self.quantity} @ ₹{self.unit_price}"
-
-    def save(self, *args, **kwargs):
-        # Auto-calculate subtotal
-        self.subtotal = self.quantity * self.unit_price
-        super().save(*args, **kwargs)
-        
-        # Update parent expense total
-        if self.expense_id:
+from django.db import models
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+from django.core.validators import MinValueValidator
+from decimal import Decimal
+
+from .menu_rules import get_menu_rules
+
+class Dish(models.Model):
+    # Meal Time Choices (when to serve)
+    MEAL_TYPE_CHOICES = [
+        ('all', 'All Day'),
+        ('morning', 'Morning'),
+        ('afternoon', 'Afternoon'),
+        ('night', 'Night'),
+    ]
+    
+    # Category choices for restaurant page display
+    CATEGORY_CHOICES = [
+        ('rice', 'Rice'),
+        ('gravy', 'Gravy'),
+        ('curry', 'Curry'),
+        ('sidedish', 'Side Dish'),
+        ('dosa', 'Dosa'),
+        ('porotta', 'Porotta'),
+        ('chinese', 'Chinese'),
+        ('extras', 'Extras'),
+    ]
+    
+    # Define which categories are available during which meal times
+    # Categories not in this dict are available at all times
+    CATEGORY_MEAL_RESTRICTIONS = {
+        'dosa': ['morning', 'night'],      # Dosa only for morning and night
+        'porotta': ['afternoon','night'],              # Porotta only for night
+        'chinese': ['afternoon', 'night'], # Chinese for afternoon and night
+        # extras category has no restrictions - available at all times
+        # Add more restrictions as needed
+    }
+    
+    name = models.CharField(max_length=200)
+    secondary_name = models.CharField(max_length=200, null=True, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    meal_type = models.CharField(
+        max_length=20, 
+        choices=MEAL_TYPE_CHOICES, 
+        default='afternoon'
+    )
+    category = models.CharField(
+        max_length=20,
+        choices=CATEGORY_CHOICES,
+        default='rice'
+    )
+    image = models.ImageField(upload_to='dishes/', null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Temporarily unavailable ("86'd") during service; unlike is_active the
+    # dish stays on menus, reports and reorder screens (see menu_cache)
+    is_sold_out = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Dishes"
+        ordering = ['category', 'name']
+    
+    def __str__(self):
+        category_display = self.get_category_display()
+        return f"{self.name} ({category_display}) - {self.get_meal_type_display()}"
+    
+    def clean(self):
+        """
+        Validate that the dish's meal_type is compatible with its category restrictions
+        """
+        super().clean()
+        
+        # Skip validation if category is not set
+        if not self.category:
+            return
+        
+        # Extras category bypasses all meal restrictions
+        if self.category == 'extras':
+            return
+        
+        rules = get_menu_rules()
+        
+        # 'all' meal type bypasses restrictions (built into the compiled rules)
+        if not rules.is_category_available_for_meal(self.category, self.meal_type):
+            allowed_display = ', '.join([
+                rules.meal_type_display.get(mt, mt)
+                for mt in rules.restricted_meal_types[self.category]
+            ])
+            raise ValidationError({
+                'meal_type': f"{self.get_category_display()} items can only be served during: {allowed_display}. "
+                            f"Current selection: {self.get_meal_type_display()}"
+            })
+    
+    def save(self, *args, **kwargs):
+        """Override save to call full_clean for validation"""
+        # Only validate if not skipping validation (useful for bulk operations)
+        if not kwargs.pop('skip_validation', False):
+            self.full_clean()
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def get_available_categories_for_meal(cls, meal_type):
+        """
+        Return list of categories available for a specific meal type
+        """
+        return list(get_menu_rules().available_categories_for_meal(meal_type))
+    
+    @classmethod
+    def is_category_available_for_meal(cls, category, meal_type):
+        """
+        Check if a specific category is available for a meal type
+        """
+        return get_menu_rules().is_category_available_for_meal(category, meal_type)
+
+
+class CategoryMealRestriction(models.Model):
+    """
+    Optional database override for Dish.CATEGORY_MEAL_RESTRICTIONS
+    Used when settings.MENU_RULES_FROM_DB is True and the table has rows:
+    each row allows one category during one meal type, and categories
+    without rows are available at all times
+    """
+    category = models.CharField(
+        max_length=20,
+        choices=Dish.CATEGORY_CHOICES
+    )
+    meal_type = models.CharField(
+        max_length=20,
+        choices=Dish.MEAL_TYPE_CHOICES
+    )
+    
+    class Meta:
+        ordering = ['category', 'meal_type']
+        verbose_name = "Category Meal Restriction"
+        verbose_name_plural = "Category Meal Restrictions"
+        unique_together = [['category', 'meal_type']]
+    
+    def __str__(self):
+        return f"{self.get_category_display()} - {self.get_meal_type_display()}"
+
+
+class Order(models.Model):
+    ORDER_TYPE_CHOICES = [
+        ('dine-in', 'Dine In'),
+        ('delivery', 'Delivery'),
+    ]
+    
+    PAYMENT_TYPE_CHOICES = [
+        ('cash', 'Cash'),
+        ('upi', 'UPI'),
+        ('card', 'Card'),
+    ]
+    
+    order_type = models.CharField(
+        max_length=20, 
+        choices=ORDER_TYPE_CHOICES, 
+        default='dine-in'
+    )
+    payment_type = models.CharField(
+        max_length=20,
+        choices=PAYMENT_TYPE_CHOICES,
+        default='cash'
+    )
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    addons = models.JSONField(null=True, blank=True, default=list)
+    # Terminal-generated id of orders synced after working offline
+    # (OrderSyncView); unique so a re-sent order is never stored twice
+    client_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Order #{self.id} - {self.get_order_type_display()} - ₹{self.total_amount}"
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    dish = models.ForeignKey(Dish, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    def __str__(self):
+        return f"{self.dish.name} x {self.quantity}"
+    
+    def get_subtotal(self):
+        """Calculate subtotal for this order item"""
+        return self.price * self.quantity
+
+
+class KitchenStation(models.Model):
+    """
+    Kitchen station and its printer (dosa counter, chinese counter, ...)
+    Every order queues one kitchen order ticket (KOT) per active station
+    listing the order's dishes in the station's categories; see
+    print_queue.enqueue_kots.
+    
+    backend: print backend name (blank = settings.PRINT_BACKEND)
+    printer: where that backend sends the ticket - host[:port] for
+    'escpos', a Windows printer name for 'win32' (blank = its default)
+    """
+    name = models.CharField(max_length=100, unique=True)
+    categories = models.JSONField(default=list)  # Dish.CATEGORY_CHOICES keys
+    backend = models.CharField(max_length=50, blank=True, default='')
+    printer = models.CharField(max_length=200, blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Kitchen Station"
+        verbose_name_plural = "Kitchen Stations"
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        """Categories must be a list of Dish categories"""
+        super().clean()
+        valid_categories = [choice[0] for choice in Dish.CATEGORY_CHOICES]
+        if not isinstance(self.categories, list) or any(c not in valid_categories for c in self.categories):
+            raise ValidationError({
+                'categories': f"Categories must be a list of: {', '.join(valid_categories)}"
+            })
+
+
+class PrintJob(models.Model):
+    """
+    Persistent print queue entry (see print_queue.py)
+    Orders are committed first and printed by background workers, so a slow
+    or offline printer never holds up the order request. Failed attempts are
+    retried with backoff until max attempts; jobs survive restarts.
+    """
+    KIND_CHOICES = [
+        ('bill', 'Customer Bill'),
+        ('kot', 'Kitchen Order Ticket'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('printing', 'Printing'),
+        ('done', 'Printed'),
+        ('failed', 'Failed'),
+    ]
+    
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='print_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='bill')
+    # KOTs only: the station whose dishes (and printer) the ticket is for
+    station = models.ForeignKey(
+        KitchenStation, on_delete=models.SET_NULL, null=True, blank=True, related_name='print_jobs'
+    )
+    backend = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    printed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Print Job"
+        verbose_name_plural = "Print Jobs"
+        indexes = [
+            # Worker poll: WHERE status = 'queued' AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        station = f" ({self.station})" if self.station_id else ""
+        return f"{self.get_kind_display()}{station} for Order #{self.order_id} - {self.get_status_display()}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response of an order request sent with an Idempotency-Key header
+    
+    The POS retries orders/create/ on flaky Wi-Fi; a retry with the same key
+    gets the stored response back (one lookup on the unique key) instead of
+    creating and printing the order again. The row is written in the order's
+    transaction, so a key exists only if its order does. Expired rows are
+    removed in bulk by purge_expired() (purge_idempotency_keys command).
+    """
+    key = models.CharField(max_length=255, unique=True)
+    request_hash = models.CharField(max_length=64)  # sha256 of the request body
+    response = models.JSONField()
+    status_code = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+    
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
+    
+    @classmethod
+    def purge_expired(cls, now=None):
+        """Delete every expired key in one statement; returns the count"""
+        # No signals or relations, so this is a single DELETE
+        deleted, _ = cls.objects.filter(expires_at__lte=now or timezone.now()).delete()
+        return deleted
+
+
+class DishDisplayOrder(models.Model):
+    """
+    Table to store display order of dishes within each meal time and category
+    Order starts from 0 for each meal_type + category combination separately
+    Excludes 'extras' category from ordering
+    
+    Orders only need to be increasing, not consecutive. Every order the
+    server picks is spaced by ORDER_GAP (spaced_order(), counter
+    allocation), so move_dish() can place a dish halfway between its new
+    neighbours and respaces the group only when there is no integer left
+    between them.
+    """
+    # Spacing between orders, leaving room for ~10 moves into the same gap
+    # before the next rebalance
+    ORDER_GAP = 1024
+    
+    dish = models.OneToOneField(
+        Dish, 
+        on_delete=models.CASCADE, 
+        related_name='display_order_info',
+        unique=True
+    )
+    meal_type = models.CharField(
+        max_length=20,
+        choices=Dish.MEAL_TYPE_CHOICES
+    )
+    category = models.CharField(
+        max_length=20,
+        choices=Dish.CATEGORY_CHOICES
+    )
+    order = models.IntegerField(default=0)  # Order within meal_type + category (starts from 0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['meal_type', 'category', 'order']
+        verbose_name = "Dish Display Order"
+        verbose_name_plural = "Dish Display Orders"
+        # Unique constraint: same order number can't exist for same meal_type + category
+        unique_together = [['meal_type', 'category', 'order']]
+        indexes = [
+            models.Index(fields=['meal_type', 'category', 'order']),
+            models.Index(fields=['meal_type', 'order']),
+        ]
+    
+    def __str__(self):
+        return f"{self.dish.name} - {self.get_meal_type_display()} - {self.get_category_display()} - Order: {self.order}"
+    
+    def clean(self):
+        """
+        Validate that extras category is not being ordered
+        """
+        super().clean()
+        
+        if self.category == 'extras':
+            raise ValidationError({
+                'category': "Extras category cannot be ordered. They are always available."
+            })
+        
+        # Ensure dish's category matches the order's category
+        if self.dish and self.dish.category != self.category:
+            raise ValidationError({
+                'category': f"Category mismatch. Dish category is '{self.dish.get_category_display()}' "
+                           f"but order category is '{self.get_category_display()}'"
+            })
+        
+        # Ensure dish's meal_type matches the order's meal_type
+        if self.dish and self.dish.meal_type != self.meal_type:
+            raise ValidationError({
+                'meal_type': f"Meal type mismatch. Dish meal type is '{self.dish.get_meal_type_display()}' "
+                            f"but order meal type is '{self.get_meal_type_display()}'"
+            })
+    
+    def save(self, *args, **kwargs):
+        """
+        Auto-assign order if not set
+        Sync category and meal_type from dish
+        """
+        # Sync category and meal_type from dish
+        if self.dish:
+            self.category = self.dish.category
+            self.meal_type = self.dish.meal_type
+        
+        # Auto-assign order if not set (for new records), before validation
+        # so the unique check sees the allocated order
+        allocated = False
+        if self.order == 0 and not self.pk and self.category != 'extras':
+            self.order = DisplayOrderCounter.allocate(self.meal_type, self.category)
+            allocated = True
+        
+        # Validate before saving
+        if not kwargs.pop('skip_validation', False):
+            self.full_clean()
+        
+        super().save(*args, **kwargs)
+        
+        # An explicit order must not be handed out again by the counter
+        if not allocated:
+            DisplayOrderCounter.advance_past({(self.meal_type, self.category): self.order})
+    
+    @classmethod
+    def get_next_order(cls, meal_type, category):
+        """
+        Get the next available order number for a meal_type + category combination
+        """
+        max_order = cls.objects.filter(
+            meal_type=meal_type,
+            category=category
+        ).aggregate(models.Max('order'))['order__max']
+        
+        return (max_order if max_order is not None else -1) + 1
+    
+    @classmethod
+    def spaced_order(cls, index):
+        """Order of the index-th (0-based) dish of a group numbered with ORDER_GAP spacing"""
+        return (index + 1) * cls.ORDER_GAP
+    
+    @classmethod
+    def apply_orders(cls, assignments):
+        """
+        Set many display orders with a constant number of queries
+        
+        assignments: iterable of (dish_id, meal_type, category, order)
+        
+        Existing rows are first parked on unique negative orders (-pk) with
+        one UPDATE, then moved to their final values with one bulk_update, so
+        swapping positions inside a group never trips the
+        (meal_type, category, order) unique constraint. Missing rows are
+        created with bulk_create.
+        
+        Returns (updated_count, created_count)
+        """
+        from django.db import transaction
+        
+        from .menu_cache import invalidate_menu
+        
+        assignments = list(assignments)
+        if not assignments:
+            return 0, 0
+        
+        dish_ids = [dish_id for dish_id, _, _, _ in assignments]
+        
+        with transaction.atomic():
+            existing = {
+                row.dish_id: row
+                for row in cls.objects.filter(dish_id__in=dish_ids).only(
+                    'id', 'dish_id', 'meal_type', 'category', 'order'
+                )
+            }
+            
+            # Phase 1: park the rows that are about to move
+            if existing:
+                cls.objects.filter(dish_id__in=existing).update(order=-models.F('pk'))
+            
+            # Phase 2: final values in one statement
+            now = timezone.now()
+            to_update = []
+            to_create = []
+            for dish_id, meal_type, category, order in assignments:
+                row = existing.get(dish_id)
+                if row is None:
+                    to_create.append(cls(
+                        dish_id=dish_id,
+                        meal_type=meal_type,
+                        category=category,
+                        order=order
+                    ))
+                else:
+                    row.meal_type = meal_type
+                    row.category = category
+                    row.order = order
+                    row.updated_at = now  # bulk_update skips auto_now
+                    to_update.append(row)
+            
+            if to_update:
+                cls.objects.bulk_update(to_update, ['meal_type', 'category', 'order', 'updated_at'])
+            if to_create:
+                cls.objects.bulk_create(to_create)
+            
+            highest = {}
+            for _, meal_type, category, order in assignments:
+                group = (meal_type, category)
+                highest[group] = max(order, highest.get(group, order))
+            DisplayOrderCounter.advance_past(highest)
+            
+            # update() / bulk_update() / bulk_create() send no signals
+            transaction.on_commit(lambda: invalidate_menu(dish_ids))
+        
+        return len(to_update), len(to_create)
+    
+    @classmethod
+    def move_dish(cls, dish_id, before_id=None, after_id=None):
+        """
+        Move a dish directly before or after another dish of the same
+        meal_type + category
+        
+        Writes only the moved dish's row, with an order halfway between its
+        new neighbours. When they are adjacent integers the whole group is
+        respaced by ORDER_GAP first (a few set-based statements).
+        
+        Returns (order, rebalanced). Raises cls.DoesNotExist / Dish.DoesNotExist
+        for unknown dishes and ValidationError when they are in different groups.
+        """
+        from django.db import transaction
+        
+        from .menu_cache import invalidate_menu
+        
+        anchor_id = before_id if before_id is not None else after_id
+        if anchor_id == dish_id:
+            raise ValidationError("A dish cannot be moved relative to itself")
+        
+        with transaction.atomic():
+            anchor = cls.objects.select_for_update().get(dish_id=anchor_id)
+            dish = Dish.objects.only('id', 'meal_type', 'category').get(id=dish_id)
+            if dish.category == 'extras':
+                raise ValidationError("Extras category cannot be ordered. They are always available.")
+            if (dish.meal_type, dish.category) != (anchor.meal_type, anchor.category):
+                raise ValidationError(
+                    "Both dishes must have the same meal type and category"
+                )
+            
+            group = cls.objects.filter(
+                meal_type=anchor.meal_type,
+                category=anchor.category
+            ).exclude(dish_id=dish_id)
+            
+            # The neighbour on the other side of the gap; orders stay >= 0
+            # (negative values are reserved for apply_orders() parking)
+            if before_id is not None:
+                neighbour = group.filter(order__lt=anchor.order).order_by('-order').values_list('order', flat=True).first()
+                low, high = (-1 if neighbour is None else neighbour), anchor.order
+            else:
+                neighbour = group.filter(order__gt=anchor.order).order_by('order').values_list('order', flat=True).first()
+                low, high = anchor.order, (anchor.order + 2 * cls.ORDER_GAP if neighbour is None else neighbour)
+            
+            if high - low > 1:
+                new_order = (low + high) // 2
+                updated = cls.objects.filter(dish_id=dish_id).update(
+                    meal_type=dish.meal_type,
+                    category=dish.category,
+                    order=new_order,
+                    updated_at=timezone.now()
+                )
+                if not updated:
+                    cls.objects.create(
+                        dish_id=dish_id,
+                        meal_type=dish.meal_type,
+                        category=dish.category,
+                        order=new_order
+                    )
+                DisplayOrderCounter.advance_past({(dish.meal_type, dish.category): new_order})
+                transaction.on_commit(lambda: invalidate_menu([dish_id]))
+                return new_order, False
+            
+            # Gap exhausted: respace the whole group with the dish in place
+            ordered_ids = list(group.order_by('order', 'dish_id').values_list('dish_id', flat=True))
+            position = ordered_ids.index(anchor_id) + (0 if before_id is not None else 1)
+            ordered_ids.insert(position, dish_id)
+            cls.apply_orders(
+                (group_dish_id, dish.meal_type, dish.category, cls.spaced_order(index))
+                for index, group_dish_id in enumerate(ordered_ids)
+            )
+            return cls.spaced_order(position), True
+    
+    @classmethod
+    def reorder_category(cls, meal_type, category, dishes_order_list):
+        """
+        Reorder dishes within a specific meal_type + category
+        
+        dishes_order_list: List of tuples [(dish_id, new_order), ...]
+        """
+        return cls.apply_orders(
+            (dish_id, meal_type, category, new_order)
+            for dish_id, new_order in dishes_order_list
+        )
+
+
+class DisplayOrderCounter(models.Model):
+    """
+    One past the highest display order of each meal_type + category group
+    
+    New dishes take their order (ORDER_GAP past it) from this row under
+    select_for_update, so
+    concurrent creation from several terminals is serialized per group in
+    O(1) instead of racing on a Max('order') aggregate. Code that writes
+    orders directly (apply_orders, move_dish) calls advance_past() to keep
+    the counter above them. A missing counter is seeded from the table.
+    """
+    meal_type = models.CharField(
+        max_length=20,
+        choices=Dish.MEAL_TYPE_CHOICES
+    )
+    category = models.CharField(
+        max_length=20,
+        choices=Dish.CATEGORY_CHOICES
+    )
+    next_order = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Display Order Counter"
+        verbose_name_plural = "Display Order Counters"
+        unique_together = [['meal_type', 'category']]
+    
+    def __str__(self):
+        return f"{self.get_meal_type_display()} - {self.get_category_display()}: next {self.next_order}"
+    
+    @classmethod
+    def allocate(cls, meal_type, category, count=1):
+        """
+        Reserve `count` orders at the end of a group, ORDER_GAP apart, and
+        return the first (the others are first + i * ORDER_GAP). Callers
+        allocating several groups in one transaction should do so in a fixed
+        (sorted) order to avoid deadlocks.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            counter, _ = cls.objects.select_for_update().get_or_create(
+                meal_type=meal_type,
+                category=category,
+                defaults={
+                    'next_order': lambda: DishDisplayOrder.get_next_order(meal_type, category)
+                }
+            )
+            # ORDER_GAP past the last order in the group (next_order - 1)
+            gap = DishDisplayOrder.ORDER_GAP
+            first = max(counter.next_order - 1, 0) + gap
+            cls.objects.filter(pk=counter.pk).update(next_order=first + (count - 1) * gap + 1)
+        return first
+    
+    @classmethod
+    def advance_past(cls, highest_orders):
+        """
+        Move counters beyond orders written without allocate()
+        
+        highest_orders: {(meal_type, category): highest order written}
+        One UPDATE for all groups; counters never move backwards.
+        """
+        from django.db.models.functions import Greatest
+        
+        if not highest_orders:
+            return
+        
+        groups = models.Q()
+        whens = []
+        for (meal_type, category), order in highest_orders.items():
+            groups |= models.Q(meal_type=meal_type, category=category)
+            whens.append(models.When(
+                meal_type=meal_type,
+                category=category,
+                then=Greatest(models.F('next_order'), models.Value(order + 1))
+            ))
+        
+        cls.objects.filter(groups).update(
+            next_order=models.Case(*whens, default=models.F('next_order'))
+        )
+
+
+class Worker(models.Model):
+    """Renamed from Person - Track workers/employees"""
+    ROLE_CHOICES = [
+        ('worker', 'Worker / Operator'),
+        ('manager', 'Manager'),
+        ('supervisor', 'Supervisor'),
+    ]
+
+    name = models.CharField(max_length=100)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    contact = models.CharField(max_length=20, blank=True, null=True)
+    joined_date = models.DateField(default=timezone.now)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Workers"
+
+    def __str__(self):
+        return f"{self.name} ({self.get_role_display()})"
+
+
+class Material(models.Model):
+    """Track different types of materials"""
+    UNIT_CHOICES = [
+        ('kg', 'Kilogram'),
+        ('bag', 'Bag'),
+        ('ton', 'Ton'),
+        ('piece', 'Piece'),
+        ('meter', 'Meter'),
+        ('liter', 'Liter'),
+        ('box', 'Box'),
+        ('bundle', 'Bundle'),
+        ('other', 'Other'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    unit = models.CharField(max_length=20, choices=UNIT_CHOICES, default='piece')
+    description = models.TextField(blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Materials"
+
+    def __str__(self):
+        return f"{self.name} ({self.get_unit_display()})"
+
+
+class Expense(models.Model):
+    """Main expense record - supports both worker and material expenses"""
+    EXPENSE_TYPE_CHOICES = [
+        ('worker', 'Worker Expense'),
+        ('material', 'Material Expense'),
+    ]
+
+    WORKER_CATEGORY_CHOICES = [
+        ('wage', 'Daily Wage'),
+        ('bonus', 'Bonus'),
+        ('transport', 'Transport'),
+        ('food', 'Food'),
+        ('advance', 'Advance Payment'),
+        ('other', 'Other'),
+    ]
+
+    expense_type = models.CharField(
+        max_length=20,
+        choices=EXPENSE_TYPE_CHOICES,
+        default='worker'
+    )
+    
+    # For worker expenses
+    worker = models.ForeignKey(
+        Worker,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='expenses'
+    )
+    worker_category = models.CharField(
+        max_length=50,
+        choices=WORKER_CATEGORY_CHOICES,
+        blank=True,
+        null=True
+    )
+    
+    description = models.CharField(max_length=255)
+    total_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    timestamp = models.DateTimeField(default=timezone.now)
+    notes = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name_plural = "Expenses"
+
+    def __str__(self):
+        if self.expense_type == 'worker' and self.worker:
+            return f"Worker: {self.worker.name} - ₹{self.total_amount}"
+        else:
+            return f"Material: {self.description} - ₹{self.total_amount}"
+
+    def save(self, *args, **kwargs):
+        # Calculate total_amount for material expenses from items
+        if self.expense_type == 'material' and self.pk:
+            items_total = self.items.aggregate(
+                total=models.Sum('subtotal')
+            )['total'] or Decimal('0.00')
+            self.total_amount = items_total
+        super().save(*args, **kwargs)
+
+
+class ExpenseItem(models.Model):
+    """Individual material items in a material expense"""
+    expense = models.ForeignKey(
+        Expense,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.PROTECT,
+        related_name='expense_items'
+    )
+    quantity = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    subtotal = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        editable=False
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = "Expense Items"
+
+    def __str__(self):
+        return f"{self.material.name} x {self.quantity} @ ₹{self.unit_price}"
+
+    def save(self, *args, **kwargs):
+        # Auto-calculate subtotal
+        self.subtotal = self.quantity * self.unit_price
+        super().save(*args, **kwargs)
+        
+        # Update parent expense total
+        if self.expense_id:
             self.expense.save()
\ No newline at end of file
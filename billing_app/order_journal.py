@@ -0,0 +1,404 @@
+"""
+Optional append-only order journal
+
+With settings.ORDER_JOURNAL_PATH set, CreateOrderView no longer writes
+orders to the database in the request. A validated order is appended to a
+local journal file, fsync'd, and acknowledged with 202; a background
+flusher applies journaled orders to the database in batches (one
+transaction per batch) and queues their bills and kitchen tickets. If the
+database is down, orders keep being accepted and are applied once it is
+back; entries not yet applied when the process stops are replayed on
+start (run_wrapper.main calls start_order_journal).
+
+File format: one record per order,
+
+    [payload length: uint32 BE][crc32 of payload: uint32 BE][payload: JSON]
+
+A torn or corrupt record (crash mid-write) fails the length/CRC check on
+replay; the bytes from it on are moved to `<path>.corrupt-<offset>-<time>`
+and reported. `<path>.checkpoint` holds the offset up to which entries are
+applied, so replay starts there (or at 0 if no record starts there). Every entry carries a unique
+client_id (Order.client_id), so applying an entry twice - a crash between
+the commit and the checkpoint - stores it once. Once everything is
+applied the journal is truncated.
+
+Concurrent appends share fsyncs (group commit): a writer whose record was
+covered by another writer's fsync returns without its own.
+
+Entries that cannot be stored - the database rejects them (a dish deleted
+in between, a value out of range) or they do not parse - are moved to
+`<path>.rejected` so they cannot block the entries after them. Only
+connection errors (OperationalError, InterfaceError) keep an entry
+journaled for a retry.
+
+Idempotency-Key: CreateOrderView records the key in the database before
+journaling, as in database mode. With the database unreachable it cannot;
+the key and request body then give the entry's client_id instead, so
+retries during the outage are stored once but a reused key is not
+rejected.
+"""
+import json
+import os
+import struct
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from collections import deque
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import (
+    DatabaseError, InterfaceError, OperationalError, close_old_connections, transaction,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+HEADER = struct.Struct('>II')  # payload length, crc32
+
+FLUSH_INTERVAL_SECONDS = 1
+FLUSH_BATCH_MAX = 200
+RETRY_MAX_SECONDS = 30
+# Truncate the journal once it is fully applied and at least this big
+COMPACT_BYTES = 64 * 1024
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def journal_path():
+    return getattr(settings, 'ORDER_JOURNAL_PATH', None)
+
+
+def journal_enabled():
+    return bool(journal_path())
+
+
+def start_order_journal():
+    """
+    Open the journal, replay unapplied entries and start the flusher,
+    once per process; None when journaling is off
+    """
+    global _journal
+    if not journal_enabled():
+        return None
+    if _journal is not None:
+        return _journal
+
+    with _journal_lock:
+        if _journal is None:
+            journal = OrderJournal(str(journal_path()))
+            journal.open()
+            _journal = journal
+        return _journal
+
+
+def journal_order(order, order_items, client_id=None):
+    """
+    Durably journal an unsaved Order and its unsaved OrderItems (priced,
+    dishes set); returns the entry's client_id once the record is on disk
+    """
+    entry = {
+        'client_id': client_id or f"journal-{uuid.uuid4().hex}",
+        'received_at': order.created_at or timezone.now(),
+        'order_type': order.order_type,
+        'payment_type': order.payment_type,
+        'addons': order.addons,
+        'total_amount': order.total_amount,
+        'items': [
+            [item.dish_id, item.quantity, item.price]
+            for item in order_items
+        ],
+    }
+    start_order_journal().append(entry)
+    return entry['client_id']
+
+
+class OrderJournal:
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+        self.rejected_path = path + '.rejected'
+
+        self._lock = threading.Lock()
+        self._synced_cond = threading.Condition(self._lock)
+        self._fd = None
+        self._written = 0      # end of the last record written
+        self._synced = 0       # everything before this offset is fsync'd
+        self._syncing = False
+        self._applied = 0      # everything before this offset is in the database
+        self._pending = deque()  # (end offset, entry), in file order
+        self._wake = threading.Event()
+
+    # ---------------------------------------------
+    # Startup / replay
+    # ---------------------------------------------
+    def open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+
+        size = os.fstat(self._fd).st_size
+        start = self._read_checkpoint()
+        if start > size:
+            start = 0  # Truncated after the checkpoint was written
+
+        pending, end = self._scan(start)
+        if end < size and start:
+            # Unreadable at the checkpoint: it may be stale rather than the
+            # data bad. Rescan from the top; client_id makes re-applying the
+            # already applied entries harmless
+            rescanned, rescanned_end = self._scan(0)
+            if rescanned_end > end:
+                print(f"⚠️ Order journal: checkpoint {start} is not at a record, replaying from the start")
+                start, pending, end = 0, rescanned, rescanned_end
+
+        if end < size:
+            # A torn record from a crash mid-append, or damage. Appends go
+            # after the last good record, so the bytes have to move; keep
+            # them for inspection rather than dropping acknowledged orders
+            corrupt_path = self._preserve(end, size)
+            print(f"❌ Order journal: {size - end} unreadable bytes at offset {end} moved to {corrupt_path}")
+            os.ftruncate(self._fd, end)
+            os.fsync(self._fd)
+
+        self._pending.extend(pending)
+        self._written = self._synced = end
+        self._applied = start
+        if self._pending:
+            print(f"📒 Order journal: replaying {len(self._pending)} unapplied orders")
+
+        threading.Thread(target=self._flush_loop, name='order-journal-flusher', daemon=True).start()
+        self._wake.set()
+
+    def _scan(self, start):
+        """Read records from start: ([(end offset, entry)], end of the last good record)"""
+        pending = []
+        end = start
+        with open(self.path, 'rb') as journal:
+            journal.seek(start)
+            while True:
+                record = self._read_record(journal)
+                if record is None:
+                    return pending, end
+                entry, length = record
+                end += length
+                pending.append((end, entry))
+
+    def _preserve(self, start, end):
+        """Copy the bytes start..end of the journal to a new file; returns its path"""
+        corrupt_path = f"{self.path}.corrupt-{start}-{int(time.time())}"
+        with open(self.path, 'rb') as journal, open(corrupt_path, 'wb') as corrupt:
+            journal.seek(start)
+            corrupt.write(journal.read(end - start))
+            corrupt.flush()
+            os.fsync(corrupt.fileno())
+        return corrupt_path
+
+    @staticmethod
+    def _read_record(journal):
+        header = journal.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        length, crc = HEADER.unpack(header)
+        payload = journal.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        try:
+            entry = json.loads(payload)
+        except ValueError:
+            return None
+        return entry, HEADER.size + length
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, offset):
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as checkpoint:
+            checkpoint.write(str(offset))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    # ---------------------------------------------
+    # Append (request threads)
+    # ---------------------------------------------
+    def append(self, entry):
+        payload = json.dumps(entry, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            os.write(self._fd, record)
+            self._written += len(record)
+            end = self._written
+            # The flusher only takes entries once they are synced; it gets
+            # the decoded form, exactly as replay reads it
+            self._pending.append((end, json.loads(payload)))
+
+            # Group commit: one fsync covers every record written before it
+            while self._synced < end:
+                if self._syncing:
+                    self._synced_cond.wait()
+                    continue
+                self._syncing = True
+                target = self._written
+                self._lock.release()
+                try:
+                    os.fsync(self._fd)
+                finally:
+                    self._lock.acquire()
+                    self._syncing = False
+                    self._synced_cond.notify_all()
+                self._synced = max(self._synced, target)
+
+        self._wake.set()
+
+    # ---------------------------------------------
+    # Flusher
+    # ---------------------------------------------
+    def _flush_loop(self):
+        failures = 0
+        while True:
+            self._wake.wait(timeout=FLUSH_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                while self.flush():
+                    pass
+                failures = 0
+            except Exception:
+                # Database unavailable: entries stay journaled, retry later
+                traceback.print_exc()
+                failures += 1
+                time.sleep(min(2 ** failures, RETRY_MAX_SECONDS))
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Apply the next batch of synced entries; False when none are left"""
+        with self._lock:
+            batch = []
+            for end, entry in self._pending:
+                if end > self._synced or len(batch) >= FLUSH_BATCH_MAX:
+                    break
+                batch.append((end, entry))
+        if not batch:
+            return False
+
+        entries = [entry for _, entry in batch]
+        try:
+            apply_entries(entries)
+        except Exception as e:
+            if not is_entry_error(e):
+                raise
+            # One bad entry fails the whole batch: apply one by one
+            for entry in entries:
+                try:
+                    apply_entries([entry])
+                except Exception as e:
+                    if not is_entry_error(e):
+                        raise
+                    self._reject(entry, e)
+
+        with self._lock:
+            for _ in batch:
+                self._pending.popleft()
+            self._applied = batch[-1][0]
+
+            if self._applied == self._written and self._written >= COMPACT_BYTES:
+                # Fully applied: start the file over (appends wait on the
+                # lock). The checkpoint goes to 0 first, so it never points
+                # past the start of records appended after the truncate
+                self._write_checkpoint(0)
+                os.ftruncate(self._fd, 0)
+                os.fsync(self._fd)
+                self._written = self._synced = self._applied = 0
+                return True
+            applied = self._applied
+
+        # Replay starts here; a stale checkpoint only means re-applying
+        # entries, which client_id makes harmless
+        self._write_checkpoint(applied)
+        return True
+
+    def _reject(self, entry, error):
+        print(f"❌ Order journal: entry {entry.get('client_id')} rejected: {error}")
+        line = json.dumps({'error': str(error), 'entry': entry}, cls=DjangoJSONEncoder)
+        with open(self.rejected_path, 'a', encoding='utf-8') as rejected:
+            rejected.write(line + '\n')
+            rejected.flush()
+            os.fsync(rejected.fileno())
+
+
+def is_entry_error(error):
+    """
+    Whether applying an entry failed because of the entry itself (it is
+    rejected) rather than the connection (the batch is retried later)
+    """
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    return isinstance(error, (DatabaseError, ValueError, TypeError, KeyError, InvalidOperation))
+
+
+def apply_entries(entries):
+    """
+    Store journal entries as Orders and OrderItems in one transaction and
+    queue their prints; entries whose client_id is already stored are skipped
+    """
+    from .models import Dish, Order, OrderItem
+    from .print_queue import enqueue_kots, enqueue_print
+
+    stored = set(
+        Order.objects.filter(client_id__in=[entry['client_id'] for entry in entries])
+        .values_list('client_id', flat=True)
+    )
+    fresh = []
+    for entry in entries:
+        if entry['client_id'] not in stored:
+            stored.add(entry['client_id'])
+            fresh.append(entry)
+    if not fresh:
+        return
+
+    dishes = Dish.objects.in_bulk({dish_id for entry in fresh for dish_id, _, _ in entry['items']})
+
+    with transaction.atomic():
+        orders = [
+            Order(
+                total_amount=Decimal(entry['total_amount']),
+                order_type=entry['order_type'],
+                payment_type=entry['payment_type'],
+                addons=entry['addons'],
+                client_id=entry['client_id']
+            )
+            for entry in fresh
+        ]
+        Order.objects.bulk_create(orders)
+
+        # created_at is auto_now_add; keep the time the order was accepted
+        for order, entry in zip(orders, fresh):
+            order.created_at = parse_datetime(entry['received_at'])
+        Order.objects.bulk_update(orders, ['created_at'])
+
+        order_items = []
+        for order, entry in zip(orders, fresh):
+            order.journal_items = [
+                OrderItem(order=order, dish_id=dish_id, quantity=quantity, price=Decimal(price))
+                for dish_id, quantity, price in entry['items']
+            ]
+            order_items.extend(order.journal_items)
+        OrderItem.objects.bulk_create(order_items)
+
+        for order in orders:
+            for item in order.journal_items:
+                if item.dish_id in dishes:
+                    item.dish = dishes[item.dish_id]
+            enqueue_print(order)
+            enqueue_kots(order, [item for item in order.journal_items if item.dish_id in dishes])
@@ -0,0 +1,101 @@
+"""
+In-process price book for order validation
+
+CreateOrderView (and the offline sync / order journal paths) price every
+order line. The price book keeps dish_id -> PriceEntry for every dish,
+active or not, in memory, so an order is priced with no dish queries.
+
+It follows the menu version (menu_cache.py): Dish saves and deletes bump
+the version through signals.py, and bulk updates call invalidate_menu()
+themselves. When the version moved, only the dishes the change log names
+are re-read; a change that may touch any dish (or history older than the
+log) reloads the whole book.
+
+The book is per process, like the menu snapshot.
+"""
+import threading
+from collections import namedtuple
+
+from .menu_cache import changed_dish_ids, get_menu_version
+
+
+PriceEntry = namedtuple('PriceEntry', 'price category is_active name secondary_name meal_type')
+
+ENTRY_FIELDS = ('id', 'price', 'category', 'is_active', 'name', 'secondary_name', 'meal_type')
+
+_book = None
+_book_lock = threading.Lock()
+
+
+class PriceBook:
+    """Immutable dish_id -> PriceEntry mapping at a menu version"""
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+
+    def get(self, dish_id):
+        return self.entries.get(dish_id)
+
+    def dishes(self, dish_ids):
+        """
+        {id: unsaved Dish} for the known ids, carrying the fields order
+        validation and responses read (price, category, names, is_active)
+        """
+        from .models import Dish
+
+        dishes = {}
+        for dish_id in dish_ids:
+            entry = self.entries.get(dish_id)
+            if entry is not None:
+                dishes[dish_id] = Dish(
+                    id=dish_id,
+                    price=entry.price,
+                    category=entry.category,
+                    is_active=entry.is_active,
+                    name=entry.name,
+                    secondary_name=entry.secondary_name,
+                    meal_type=entry.meal_type
+                )
+        return dishes
+
+
+def get_price_book():
+    """Return the price book for the current menu version"""
+    global _book
+    book = _book
+    version = get_menu_version()
+    if book is not None and book.version == version:
+        return book
+
+    with _book_lock:
+        book = _book
+        # Read the version before loading: a change committed while we load
+        # bumps it again and the next reader refreshes
+        version = get_menu_version()
+        if book is not None and book.version == version:
+            return book
+
+        changed = changed_dish_ids(book.version, version) if book is not None else None
+        if changed is None:
+            entries = _load_entries()
+        else:
+            entries = dict(book.entries)
+            for dish_id in changed:
+                entries.pop(dish_id, None)
+            entries.update(_load_entries(changed))
+
+        _book = PriceBook(version, entries)
+        return _book
+
+
+def _load_entries(dish_ids=None):
+    from .models import Dish
+
+    rows = Dish.objects.all()
+    if dish_ids is not None:
+        rows = rows.filter(id__in=dish_ids)
+    return {
+        row[0]: PriceEntry(*row[1:])
+        for row in rows.order_by().values_list(*ENTRY_FIELDS)
+    }
@@ -0,0 +1,124 @@
+"""
+Printer backends for the print queue
+
+settings.PRINT_BACKEND names the backend new print jobs use:
+
+  'win32'    - the Windows default printer through print_utils (GDI)
+  'escpos'   - raw ESC/POS to a network thermal printer
+               (settings.PRINT_ESCPOS_HOST / PRINT_ESCPOS_PORT)
+  'file'     - writes each bill as a text file into settings.PRINT_OUTPUT_DIR
+  'loopback' - keeps the last bills in memory; for tests and development
+
+Kitchen order tickets ('kot' jobs) go to the same backends; a station's
+`backend` overrides PRINT_BACKEND and its `printer` picks the printer
+(see KitchenStation).
+
+A backend sends one job and raises on failure; the queue handles retries.
+"""
+import os
+import socket
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+from django.conf import settings
+
+from .bill_renderer import render_bill, render_kot
+
+
+class PrintBackend(ABC):
+    name = None
+
+    @abstractmethod
+    def send(self, job, order, items):
+        """Print `order` (with its OrderItems, dishes loaded) for `job`"""
+
+    @staticmethod
+    def render(job, order, items, fmt):
+        """The job's bill or kitchen order ticket in `fmt` (see bill_renderer)"""
+        if job.kind == 'kot':
+            return render_kot(order, job.station, items, fmt)
+        return render_bill(order, fmt, items)
+
+    @staticmethod
+    def printer(job):
+        """The station's printer for KOTs; '' means the backend's default"""
+        return job.station.printer if job.kind == 'kot' else ''
+
+
+class Win32Backend(PrintBackend):
+    name = 'win32'
+
+    def send(self, job, order, items):
+        from .print_utils import print_order_bill, print_raw
+        if job.kind == 'kot':
+            # Kitchen printers are thermal: send ESC/POS straight to the spooler
+            print_raw(self.render(job, order, items, 'escpos'), self.printer(job) or None, f"KOT #{order.id}")
+        else:
+            print_order_bill(order, items=items)
+
+
+class FileBackend(PrintBackend):
+    name = 'file'
+
+    def send(self, job, order, items):
+        directory = getattr(settings, 'PRINT_OUTPUT_DIR', None) or os.path.join(settings.BASE_DIR, 'print_output')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"order-{order.id}-{job.kind}-job-{job.id}.txt")
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(self.render(job, order, items, 'text'))
+
+
+class EscposNetworkBackend(PrintBackend):
+    """
+    Raw ESC/POS over TCP (port 9100) to settings.PRINT_ESCPOS_HOST, or to
+    the station's printer ("host" or "host:port") for KOTs
+    """
+    name = 'escpos'
+
+    def send(self, job, order, items):
+        host, _, port = self.printer(job).partition(':')
+        if not host:
+            host = getattr(settings, 'PRINT_ESCPOS_HOST', None)
+        if not host:
+            raise RuntimeError("PRINT_ESCPOS_HOST is not configured")
+        port = int(port) if port else getattr(settings, 'PRINT_ESCPOS_PORT', 9100)
+
+        data = self.render(job, order, items, 'escpos')
+        with socket.create_connection((host, port), timeout=10) as connection:
+            connection.sendall(data)
+
+
+class LoopbackBackend(PrintBackend):
+    name = 'loopback'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outbox = deque(maxlen=100)  # (job id, station name or None, text)
+
+    def send(self, job, order, items):
+        station = job.station.name if job.kind == 'kot' else None
+        text = self.render(job, order, items, 'text')
+        with self.lock:
+            self.outbox.append((job.id, station, text))
+
+
+BACKENDS = {backend.name: backend for backend in (Win32Backend, EscposNetworkBackend, FileBackend, LoopbackBackend)}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def default_backend_name():
+    return getattr(settings, 'PRINT_BACKEND', 'win32')
+
+
+def get_backend(name=None):
+    """Shared backend instance by name (default: settings.PRINT_BACKEND)"""
+    name = name or default_backend_name()
+    with _instances_lock:
+        if name not in _instances:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown print backend '{name}'. Must be one of: {', '.join(BACKENDS)}")
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,272 @@
+"""
+Background print queue
+
+CreateOrderView used to print inline, so a slow or offline printer held
+the Waitress thread and the POS waited on Windows spooling. Orders now
+add a PrintJob row in their transaction and return; once it commits,
+background workers pick the job up and send it to its backend
+(print_backends.py).
+
+- A dispatcher thread claims due jobs (status 'queued', next_attempt_at
+  reached) and hands them to PRINT_WORKERS worker threads. Enqueuing
+  wakes it immediately; otherwise it polls every POLL_SECONDS.
+- A failed attempt is retried with exponential backoff
+  (RETRY_BASE_SECONDS * 2^n, capped at RETRY_MAX_SECONDS) until
+  PRINT_MAX_ATTEMPTS, then the job is marked 'failed'.
+- Jobs are rows in the database, so they survive restarts. A claim is a
+  lease of PRINT_LEASE_SECONDS: a job still 'printing' after that was
+  left by a crashed process and is requeued (when workers start, then
+  once per lease). Jobs other processes are printing are left alone.
+- Each order also queues one kitchen order ticket (KOT) per kitchen
+  station with dishes in the order (enqueue_kots). The bill and every
+  station are separate lanes: at most one job per lane prints at a time,
+  so a slow or offline station printer holds one worker, never the
+  others. Keep PRINT_WORKERS above the number of stations so the bill
+  and every station can print at once.
+
+Workers start with the server (run_wrapper.py) or lazily on the first
+enqueue. The queue is per process, like the menu cache.
+"""
+import queue
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .print_backends import default_backend_name, get_backend
+
+
+POLL_SECONDS = 5
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+
+_wake = threading.Event()
+_jobs = queue.Queue()
+_start_lock = threading.Lock()
+_dispatcher = None
+_in_flight = 0
+_busy_lanes = set()  # station ids (None = bills) with a job printing
+_in_flight_lock = threading.Lock()
+
+# Candidates read per claim; jobs in busy lanes are skipped
+CLAIM_SCAN_LIMIT = 50
+
+
+def worker_count():
+    return getattr(settings, 'PRINT_WORKERS', 4)
+
+
+def max_attempts():
+    return getattr(settings, 'PRINT_MAX_ATTEMPTS', 5)
+
+
+def lease_seconds():
+    return getattr(settings, 'PRINT_LEASE_SECONDS', 120)
+
+
+def enqueue_print(order, kind='bill', backend=None):
+    """
+    Queue a print job for `order`; printing starts after the surrounding
+    transaction commits (immediately when there is none)
+    """
+    from .models import PrintJob
+
+    job = PrintJob.objects.create(
+        order=order,
+        kind=kind,
+        backend=backend or default_backend_name()
+    )
+    transaction.on_commit(wake_print_workers)
+    return job
+
+
+def enqueue_kots(order, items):
+    """
+    Queue a kitchen order ticket for every active station that has dishes
+    in `items` (the order's OrderItems, dishes loaded); printing starts
+    after the surrounding transaction commits
+    """
+    from .models import KitchenStation, PrintJob
+
+    jobs = [
+        PrintJob(
+            order=order,
+            kind='kot',
+            station=station,
+            backend=station.backend or default_backend_name()
+        )
+        for station in KitchenStation.objects.filter(is_active=True)
+        if station_items(station, items)
+    ]
+    if jobs:
+        PrintJob.objects.bulk_create(jobs)
+        transaction.on_commit(wake_print_workers)
+    return jobs
+
+
+def station_items(station, items):
+    """The OrderItems a station's KOT lists"""
+    categories = set(station.categories)
+    return [item for item in items if item.dish.category in categories]
+
+
+def wake_print_workers():
+    start_print_workers()
+    _wake.set()
+
+
+def start_print_workers():
+    """Start the dispatcher and worker threads once per process"""
+    global _dispatcher
+    if _dispatcher is not None:
+        return
+
+    with _start_lock:
+        if _dispatcher is not None:
+            return
+
+        requeue_stale_jobs()
+
+        for index in range(worker_count()):
+            threading.Thread(target=_worker_loop, name=f'print-worker-{index}', daemon=True).start()
+
+        _dispatcher = threading.Thread(target=_dispatch_loop, name='print-dispatcher', daemon=True)
+        _dispatcher.start()
+
+
+def requeue_stale_jobs(now=None):
+    """
+    Requeue jobs whose lease ran out while 'printing' (their process died);
+    returns the count. Claims stamp updated_at, so a job another process
+    is printing right now is not touched.
+    """
+    from .models import PrintJob
+
+    now = now or timezone.now()
+    return PrintJob.objects.filter(
+        status='printing',
+        updated_at__lt=now - timedelta(seconds=lease_seconds())
+    ).update(status='queued', next_attempt_at=now, updated_at=now)
+
+
+def _dispatch_loop():
+    requeued_at = time.monotonic()
+    while True:
+        _wake.wait(timeout=POLL_SECONDS)
+        _wake.clear()
+        try:
+            if time.monotonic() - requeued_at >= lease_seconds():
+                requeued_at = time.monotonic()
+                requeue_stale_jobs()
+            _claim_due_jobs()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            close_old_connections()
+
+
+def _claim_due_jobs():
+    """Move due jobs to 'printing' and hand them to idle workers"""
+    global _in_flight
+    from .models import PrintJob
+
+    with _in_flight_lock:
+        slots = worker_count() - _in_flight
+    if slots <= 0:
+        return
+
+    now = timezone.now()
+    due = (
+        PrintJob.objects.filter(status='queued', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', 'station_id')[:CLAIM_SCAN_LIMIT]
+    )
+    for job_id, lane in due:
+        if slots <= 0:
+            break
+        with _in_flight_lock:
+            if lane in _busy_lanes:
+                continue
+        # Conditional update: a job is only ever claimed once
+        claimed = PrintJob.objects.filter(id=job_id, status='queued').update(
+            status='printing',
+            attempts=F('attempts') + 1,
+            updated_at=now
+        )
+        if claimed:
+            with _in_flight_lock:
+                _in_flight += 1
+                _busy_lanes.add(lane)
+            slots -= 1
+            _jobs.put((job_id, lane))
+
+
+def _worker_loop():
+    global _in_flight
+    while True:
+        job_id, lane = _jobs.get()
+        try:
+            _run_job(job_id)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+                _busy_lanes.discard(lane)
+            close_old_connections()
+            _wake.set()  # Free slot: claim the next job
+
+
+def _run_job(job_id):
+    from .models import PrintJob
+
+    # Everything after the claim goes through the retry/fail path below, so
+    # a failure here cannot leave the job 'printing' until a restart
+    job = None
+    label = f"job #{job_id}"
+    try:
+        job = PrintJob.objects.select_related('order', 'station').get(id=job_id)
+        order = job.order
+        label = f"KOT #{order.id} ({job.station})" if job.kind == 'kot' else f"Bill #{order.id}"
+        items = list(order.items.select_related('dish'))
+        if job.kind == 'kot':
+            if job.station is None:
+                raise RuntimeError("Kitchen station was deleted")
+            items = station_items(job.station, items)
+        get_backend(job.backend).send(job, order, items)
+    except Exception as e:
+        if job is None:
+            # The job could not be read: retry it (or fail it after
+            # max_attempts) straight in the table; a deleted job updates nothing
+            print(f"⚠️ Print {label} could not be loaded: {e}")
+            PrintJob.objects.filter(id=job_id, status='printing').update(
+                status=Case(
+                    When(attempts__gte=max_attempts(), then=Value('failed')),
+                    default=Value('queued')
+                ),
+                last_error=str(e) or e.__class__.__name__,
+                next_attempt_at=timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS),
+                updated_at=timezone.now()
+            )
+            return
+        job.last_error = str(e) or e.__class__.__name__
+        if job.attempts >= max_attempts():
+            job.status = 'failed'
+            print(f"❌ Print job #{job.id} ({label}) failed after {job.attempts} attempts: {e}")
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (job.attempts - 1), RETRY_MAX_SECONDS)
+            job.status = 'queued'
+            job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            print(f"⚠️ Print job #{job.id} ({label}) attempt {job.attempts} failed, retrying in {delay}s: {e}")
+    else:
+        job.status = 'done'
+        job.printed_at = timezone.now()
+        job.last_error = ''
+        print(f"✅ {label} printed ({job.backend}, job #{job.id})")
+
+    job.save(update_fields=['status', 'last_error', 'next_attempt_at', 'printed_at', 'updated_at'])
@@ -1,13 +1,27 @@
-import win32print
-import win32ui
 from datetime import datetime
 
-def print_order_bill(order):
+# pywin32 only exists on the Windows till; elsewhere print_order_bill
+# raises and the print queue can use the file/loopback backends
+try:
+    import win32print
+    import win32ui
+except ImportError:
+    win32print = win32ui = None
+
+def print_order_bill(order, items=None):
     """
     Prints a formatted thermal bill for Appatha Restaurant.
     Optimized for WeP CN811-UEB (80mm paper width).
     Fixed alignment and separator lines.
+
+    items: the order's OrderItems with dishes loaded, when the caller
+    already has them; otherwise they are fetched in one query.
     """
+    if win32print is None:
+        raise RuntimeError("Windows printing (pywin32) is not available on this machine")
+
+    if items is None:
+        items = order.items.select_related('dish')
 
     now = datetime.now().strftime("%d-%m-%Y %I:%M %p")
 
@@ -98,7 +112,7 @@ def print_order_bill(order):
     y += medium_line_height
 
     # === ITEMS SECTION ===
-    for item in order.items.all():
+    for item in items:
         display_name = item.dish.secondary_name if item.dish.secondary_name else item.dish.name
         
         # Item name in large font (Tamil)
@@ -141,4 +155,25 @@ def print_order_bill(order):
     pdc.EndDoc()
     pdc.DeleteDC()
 
-    print(f"✅ Bill printed successfully to {printer_name}")
\ No newline at end of file
+    print(f"✅ Bill printed successfully to {printer_name}")
+
+def print_raw(data, printer_name=None, title="Appatha Restaurant"):
+    """
+    Sends raw printer bytes (ESC/POS) through the Windows spooler,
+    bypassing GDI. printer_name defaults to the default printer.
+    """
+    if win32print is None:
+        raise RuntimeError("Windows printing (pywin32) is not available on this machine")
+
+    printer_name = printer_name or win32print.GetDefaultPrinter()
+    handle = win32print.OpenPrinter(printer_name)
+    try:
+        win32print.StartDocPrinter(handle, 1, (title, None, "RAW"))
+        try:
+            win32print.StartPagePrinter(handle)
+            win32print.WritePrinter(handle, data)
+            win32print.EndPagePrinter(handle)
+        finally:
+            win32print.EndDocPrinter(handle)
+    finally:
+        win32print.ClosePrinter(handle)
@@ -0,0 +1,193 @@
+"""
+In-process dish search index
+
+Indexes Dish.name and Dish.secondary_name (Tamil) of the active menu with
+a prefix trie over word tokens plus a trigram index for partial matches
+inside words. Text is NFKC-normalized and case-folded, and zero-width
+joiners are dropped, so Tamil typed with different input methods matches
+the stored names.
+
+The index is fed from the menu snapshot (menu_cache). Before each search
+it catches up with the menu change log, reindexing only the dishes saved
+since the last search; it rebuilds fully when the log cannot say what
+changed.
+"""
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+
+from .menu_cache import changed_dish_ids, get_menu_snapshot
+
+
+# Zero-width (non-)joiners are optional in Tamil text entry
+_IGNORED_CHARS = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'))
+
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+
+def normalize(text):
+    """NFKC-normalize, case-fold and collapse whitespace"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', text).translate(_IGNORED_CHARS).casefold()
+    return ' '.join(text.split())
+
+
+def trigrams(text):
+    """Character trigrams of normalized text, padded at word boundaries"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DishSearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._docs = {}        # dish_id -> (normalized name, normalized secondary name)
+        self._trie = {}        # char -> child node; node[''] = set of dish ids below
+        self._trigrams = {}    # trigram -> set of dish ids
+
+    # ---------------------------------------------
+    # Maintenance
+    # ---------------------------------------------
+    def _sync(self):
+        """Catch up with the current menu snapshot (caller holds the lock)"""
+        snapshot = get_menu_snapshot()
+        if self._version == snapshot.version:
+            return
+
+        dish_ids = None
+        if self._version is not None:
+            dish_ids = changed_dish_ids(self._version, snapshot.version)
+
+        if dish_ids is None:
+            self._docs, self._trie, self._trigrams = {}, {}, {}
+            dish_ids = snapshot.dishes_by_id.keys()
+
+        for dish_id in dish_ids:
+            self._remove(dish_id)
+            dish = snapshot.dishes_by_id.get(dish_id)
+            if dish is not None:
+                self._add(dish)
+
+        self._version = snapshot.version
+
+    def _add(self, dish):
+        dish_id = dish['id']
+        names = (normalize(dish['name']), normalize(dish['secondary_name']))
+        self._docs[dish_id] = names
+
+        for token in self._tokens(names):
+            node = self._trie
+            for char in token:
+                node = node.setdefault(char, {})
+                node.setdefault('', set()).add(dish_id)
+
+        for gram in self._doc_trigrams(names):
+            self._trigrams.setdefault(gram, set()).add(dish_id)
+
+    def _remove(self, dish_id):
+        names = self._docs.pop(dish_id, None)
+        if names is None:
+            return
+
+        for token in self._tokens(names):
+            node = self._trie
+            for char in token:
+                parent, node = node, node.get(char)
+                if node is None:
+                    break
+                node[''].discard(dish_id)
+                if not node['']:
+                    # Ids below a node are a subset of its own: the whole
+                    # branch is empty, so renamed dishes do not grow the trie
+                    del parent[char]
+                    break
+
+        for gram in self._doc_trigrams(names):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(dish_id)
+                if not ids:
+                    del self._trigrams[gram]
+
+    @staticmethod
+    def _tokens(names):
+        return {token for name in names for token in name.split()}
+
+    @staticmethod
+    def _doc_trigrams(names):
+        grams = set()
+        for name in names:
+            if name:
+                grams |= trigrams(name)
+        return grams
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+    def _prefix_ids(self, token):
+        node = self._trie
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get('', set())
+
+    def search(self, query, limit=20):
+        """
+        Return [(dish_id, score), ...] best first
+
+        Ranking: exact name > name starts with the query > every query word
+        prefixes a word of the name. Trigram similarity breaks ties and, when
+        prefix matches do not fill the page, adds fuzzy matches for typos and
+        partial words.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            self._sync()
+
+            # Every query word must prefix some word of the dish names
+            prefix_ids = set()
+            for index, token in enumerate(query.split()):
+                ids = self._prefix_ids(token)
+                prefix_ids = set(ids) if index == 0 else prefix_ids & ids
+                if not prefix_ids:
+                    break
+
+            scores = {}
+            for dish_id in prefix_ids:
+                names = self._docs[dish_id]
+                if query in names:
+                    scores[dish_id] = 100
+                elif any(name.startswith(query) for name in names):
+                    scores[dish_id] = 80
+                else:
+                    scores[dish_id] = 60
+
+            if len(prefix_ids) < limit:
+                query_grams = trigrams(query)
+                overlap = Counter()
+                for gram in query_grams:
+                    overlap.update(self._trigrams.get(gram, ()))
+                for dish_id, shared in overlap.items():
+                    similarity = shared / len(query_grams)
+                    if dish_id in scores:
+                        scores[dish_id] += similarity * 40
+                    elif similarity >= MIN_TRIGRAM_SIMILARITY:
+                        scores[dish_id] = similarity * 40
+
+            # Shorter names are closer matches when scores tie
+            docs = self._docs
+            return heapq.nsmallest(
+                limit,
+                scores.items(),
+                key=lambda item: (-item[1], len(docs[item[0]][0]), docs[item[0]][0], item[0]),
+            )
+
+
+dish_search_index = DishSearchIndex()
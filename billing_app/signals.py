@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .menu_cache import invalidate_menu, mark_sold_out
+from .menu_rules import mark_rules_stale
+from .models import CategoryMealRestriction, Dish, DishDisplayOrder
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+@receiver(post_save, sender=DishDisplayOrder)
+@receiver(post_delete, sender=DishDisplayOrder)
+def invalidate_menu_on_change(sender, instance, **kwargs):
+    """Bump the menu version, logging the changed dish, once committed"""
+    dish_id = instance.pk if sender is Dish else instance.dish_id
+    transaction.on_commit(lambda: invalidate_menu([dish_id]))
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+def sync_sold_out_on_change(sender, instance, signal, update_fields=None, **kwargs):
+    """Keep the shared sold-out set in step with saves outside the toggle endpoint"""
+    # A save limited to other fields says nothing about is_sold_out (the
+    # instance's value may be stale)
+    if update_fields is not None and 'is_sold_out' not in update_fields:
+        return
+    sold_out = instance.is_sold_out and signal is post_save
+    dish_id = instance.pk
+    transaction.on_commit(lambda: mark_sold_out([dish_id], sold_out))
+
+
+@receiver(post_save, sender=CategoryMealRestriction)
+@receiver(post_delete, sender=CategoryMealRestriction)
+def recompile_rules_on_change(sender, **kwargs):
+    """Recompile the availability rules; every menu grouping may change"""
+    def on_commit():
+        mark_rules_stale()
+        invalidate_menu()
+    transaction.on_commit(on_commit)
@@ -1,3 +1,931 @@
-from django.test import TestCase
-
-# Create your tests here.
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import bill_renderer, order_journal, price_book, print_queue
+from .display_orders import check_display_orders
+from .menu_cache import get_availability_version, get_sold_out, invalidate_menu, mark_sold_out
+from .menu_rules import get_menu_rules
+from .models import Dish, DishDisplayOrder, IdempotencyKey, KitchenStation, Order, OrderItem, PrintJob
+from .order_journal import HEADER, OrderJournal, apply_entries
+from .print_backends import get_backend
+from .search_index import DishSearchIndex
+
+
+def create_dishes(count, meal_type='night', category='dosa'):
+    """Create `count` active dishes in one group, each with a display order row"""
+    dishes = Dish.objects.bulk_create(
+        Dish(name=f"{category} {index}", price=50 + index, meal_type=meal_type, category=category)
+        for index in range(count)
+    )
+    DishDisplayOrder.objects.bulk_create(
+        DishDisplayOrder(
+            dish=dish,
+            meal_type=meal_type,
+            category=category,
+            order=DishDisplayOrder.spaced_order(index)
+        )
+        for index, dish in enumerate(dishes)
+    )
+    return dishes
+
+
+class GroupedMenuQueryCountTests(TestCase):
+    """The grouped menu is built from one snapshot query, whatever the menu size"""
+
+    def setUp(self):
+        # Per-process caches that do not depend on the menu size
+        get_menu_rules()
+        get_sold_out()
+
+    def assert_grouped_queries(self, dish_count):
+        create_dishes(dish_count)
+        create_dishes(dish_count, meal_type='morning', category='rice')
+
+        for params in ({'group_by_category': 'true'}, {'group_by_meal': 'true'}):
+            # bulk_create sends no signals; force a cold snapshot
+            invalidate_menu()
+            with self.assertNumQueries(1):
+                response = self.client.get('/bill/dishes/', params)
+            self.assertEqual(response.status_code, 200)
+
+            # Served from the render cache
+            with self.assertNumQueries(0):
+                self.client.get('/bill/dishes/', params)
+
+    def test_small_menu(self):
+        self.assert_grouped_queries(3)
+
+    def test_large_menu(self):
+        self.assert_grouped_queries(50)
+
+
+class DishReorderQueryCountTests(TestCase):
+    """A reorder runs the same statements for any group size"""
+
+    def setUp(self):
+        get_menu_rules()
+        # Validation SELECT, row SELECT, park UPDATE, bulk_update, counter
+        # UPDATE, plus a SAVEPOINT / RELEASE pair for each of the view's and
+        # apply_orders' atomic blocks inside the test transaction
+        self.expected_queries = 9
+
+    def reorder(self, dish_count):
+        dishes = create_dishes(dish_count)
+        payload = {
+            'meal_type': 'night',
+            'category': 'dosa',
+            'dishes': [
+                {'dish_id': dish.id, 'order': index}
+                for index, dish in enumerate(reversed(dishes))
+            ]
+        }
+
+        with self.assertNumQueries(self.expected_queries):
+            response = self.client.put('/bill/dishes/reorder/', json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated_count'], dish_count)
+
+        orders = dict(DishDisplayOrder.objects.filter(dish__in=dishes).values_list('dish_id', 'order'))
+        self.assertEqual([orders[dish.id] for dish in reversed(dishes)], list(range(dish_count)))
+
+    def test_reorder_3_dishes(self):
+        self.reorder(3)
+
+    def test_reorder_50_dishes(self):
+        self.reorder(50)
+
+
+class OrderJournalTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'orders.log')
+        self.dish = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+
+    def open_journal(self):
+        journal = OrderJournal(self.path)
+        # Flush from the test thread instead
+        journal._flush_loop = lambda: None
+        journal.open()
+        self.addCleanup(os.close, journal._fd)
+        return journal
+
+    def entry(self, client_id, total_amount='40.00'):
+        return {
+            'client_id': client_id,
+            'received_at': '2026-10-18T12:00:00+00:00',
+            'order_type': 'dine-in',
+            'payment_type': 'cash',
+            'addons': [],
+            'total_amount': total_amount,
+            'items': [[self.dish.id, 1, '40.00']],
+        }
+
+    def pending_ids(self, journal):
+        return [entry['client_id'] for _, entry in journal._pending]
+
+    def test_bad_entry_is_rejected_and_the_next_one_stored(self):
+        journal = self.open_journal()
+        journal.append(self.entry('bad', total_amount='not a number'))
+        journal.append(self.entry('good'))
+
+        self.assertTrue(journal.flush())
+
+        self.assertEqual(list(Order.objects.values_list('client_id', flat=True)), ['good'])
+        with open(journal.rejected_path, encoding='utf-8') as rejected:
+            lines = [json.loads(line) for line in rejected]
+        self.assertEqual([line['entry']['client_id'] for line in lines], ['bad'])
+        self.assertFalse(journal.flush())
+
+    def test_connection_errors_keep_entries_journaled(self):
+        from django.db import OperationalError
+
+        journal = self.open_journal()
+        journal.append(self.entry('a'))
+        with mock.patch.object(order_journal, 'apply_entries', side_effect=OperationalError('down')):
+            with self.assertRaises(OperationalError):
+                journal.flush()
+
+        self.assertEqual(self.pending_ids(journal), ['a'])
+        self.assertFalse(os.path.exists(journal.rejected_path))
+
+    def test_replay_starts_at_the_checkpoint(self):
+        journal = self.open_journal()
+        for client_id in ('a', 'b', 'c'):
+            journal.append(self.entry(client_id))
+        journal._write_checkpoint(journal._pending[0][0])
+
+        self.assertEqual(self.pending_ids(self.open_journal()), ['b', 'c'])
+
+    def test_torn_tail_is_moved_to_a_corrupt_file(self):
+        journal = self.open_journal()
+        journal.append(self.entry('a'))
+        good_size = os.path.getsize(self.path)
+        torn = HEADER.pack(100, 0) + b'{"client_id": "b"'
+        with open(self.path, 'ab') as output:
+            output.write(torn)
+
+        self.assertEqual(self.pending_ids(self.open_journal()), ['a'])
+        self.assertEqual(os.path.getsize(self.path), good_size)
+        corrupt = [name for name in os.listdir(os.path.dirname(self.path)) if name.startswith('orders.log.corrupt-')]
+        self.assertEqual(len(corrupt), 1)
+        with open(os.path.join(os.path.dirname(self.path), corrupt[0]), 'rb') as saved:
+            self.assertEqual(saved.read(), torn)
+
+    def test_duplicate_client_id_is_stored_once(self):
+        journal = self.open_journal()
+        journal.append(self.entry('a'))
+        journal.append(self.entry('a'))
+        journal.flush()
+        apply_entries([self.entry('a')])
+
+        self.assertEqual(Order.objects.filter(client_id='a').count(), 1)
+        self.assertEqual(Order.objects.get(client_id='a').items.count(), 1)
+
+
+class IdempotentCreateOrderTests(TestCase):
+    """A retried orders/create/ with the same Idempotency-Key creates one order"""
+
+    def setUp(self):
+        self.dish = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+        # on_commit callbacks do not run inside TestCase: load the menu now
+        invalidate_menu()
+
+    def post(self, quantity, key='key-1'):
+        body = {'items': [{'dish_id': self.dish.id, 'quantity': quantity}], 'total_amount': 40 * quantity}
+        return self.client.post(
+            '/bill/orders/create/', json.dumps(body), content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_replay_returns_the_stored_response(self):
+        first = self.post(1)
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        replay = self.post(1)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_reused_key_with_a_different_body(self):
+        self.post(1)
+        response = self.post(2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.assertEqual(self.post(2, key='key-2').status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_expired_key_is_free_again(self):
+        self.post(1)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.post(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL_SECONDS=60)
+    def test_purge_expired_respects_the_ttl(self):
+        self.post(1)
+        now = timezone.now()
+
+        self.assertEqual(IdempotencyKey.purge_expired(now=now + timedelta(seconds=30)), 0)
+        self.assertEqual(self.post(1)['Idempotent-Replayed'], 'true')
+
+        self.assertEqual(IdempotencyKey.purge_expired(now=now + timedelta(seconds=61)), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class JournaledCreateOrderTests(TestCase):
+    """Idempotency-Key behaves as in database mode when orders are journaled"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'orders.log')
+        self.dish = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+
+        self.journal = OrderJournal(path)
+        self.journal._flush_loop = lambda: None
+        self.journal.open()
+        self.addCleanup(os.close, self.journal._fd)
+        settings_override = override_settings(ORDER_JOURNAL_PATH=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(order_journal, '_journal', self.journal)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, quantity, key='key-1'):
+        body = {'items': [{'dish_id': self.dish.id, 'quantity': quantity}], 'total_amount': 40 * quantity}
+        return self.client.post(
+            '/bill/orders/create/', json.dumps(body), content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_replay_and_reused_key(self):
+        first = self.post(1)
+        self.assertEqual(first.status_code, 202)
+        self.assertTrue(IdempotencyKey.objects.filter(key='key-1', status_code=202).exists())
+
+        replay = self.post(1)
+        self.assertEqual(replay.status_code, 202)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json()['order']['client_id'], first.json()['order']['client_id'])
+
+        self.assertEqual(self.post(2).status_code, 422)
+        self.assertEqual(len(self.journal._pending), 1)
+
+    def test_database_down_folds_the_key_into_the_client_id(self):
+        from django.db import OperationalError
+
+        from .views import CreateOrderView
+
+        down = OperationalError('database unreachable')
+        with mock.patch.object(CreateOrderView, 'replay', side_effect=down), \
+                mock.patch.object(IdempotencyKey.objects, 'create', side_effect=down):
+            first = self.post(1)
+            retry = self.post(1)
+
+        self.assertEqual(first.status_code, 202)
+        client_id = first.json()['order']['client_id']
+        self.assertTrue(client_id.startswith('idem-'))
+        self.assertEqual(retry.json()['order']['client_id'], client_id)
+
+        self.journal.flush()
+        self.assertEqual(Order.objects.filter(client_id=client_id).count(), 1)
+
+    def test_bounds_checked_before_journaling(self):
+        self.assertEqual(self.post(10 ** 6).status_code, 400)
+        self.assertEqual(len(self.journal._pending), 0)
+
+
+class BulkUpdateDishPriceTests(TestCase):
+    def setUp(self):
+        self.gravy = [
+            Dish.objects.create(name=f"Gravy {index}", price=price, meal_type='night', category='gravy')
+            for index, price in enumerate(('100.00', '57.00'))
+        ]
+        self.rice = Dish.objects.create(name='Rice', price='30.00', meal_type='night', category='rice')
+
+    def patch(self, body):
+        return self.client.patch('/bill/dishes/update-prices/', json.dumps(body), content_type='application/json')
+
+    def prices(self):
+        return {dish.id: str(Dish.objects.get(id=dish.id).price) for dish in self.gravy + [self.rice]}
+
+    def test_rule_rounds_and_touches_only_the_matched_dishes(self):
+        response = self.patch({"rule": {"category": "gravy", "percent": 5, "round_to": 1, "rounding": "up"}})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(self.prices(), {
+            self.gravy[0].id: '105.00',
+            self.gravy[1].id: '60.00',
+            self.rice.id: '30.00',
+        })
+
+    def test_explicit_prices(self):
+        response = self.patch({"prices": [
+            {"dish_id": self.gravy[0].id, "price": 77.777},
+            {"dish_id": self.rice.id, "price": "12"},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.prices()[self.gravy[0].id], '77.78')
+        self.assertEqual(self.prices()[self.rice.id], '12.00')
+
+    def test_dry_run_changes_nothing(self):
+        before = self.prices()
+        response = self.patch({"rule": {"category": "gravy", "amount": 10}, "dry_run": True})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 0)
+        self.assertEqual(len(response.json()['changes']), 2)
+        self.assertEqual(self.prices(), before)
+
+    def test_dry_run_must_be_a_bool(self):
+        before = self.prices()
+        for value in ("false", "0", 1):
+            response = self.patch({"rule": {"category": "gravy", "amount": 10}, "dry_run": value})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.prices(), before)
+
+    def test_out_of_range_values_are_rejected_with_400(self):
+        before = self.prices()
+        for body in (
+            {"prices": [{"dish_id": self.rice.id, "price": "1e30"}]},
+            {"prices": [{"dish_id": self.rice.id, "price": "99999999.999"}]},
+            {"rule": {"category": "gravy", "percent": "1e30"}},
+            {"rule": {"category": "gravy", "amount": "1e999999"}},
+            {"rule": {"category": "gravy", "amount": 5, "round_to": "1e30"}},
+        ):
+            self.assertEqual(self.patch(body).status_code, 400, body)
+        self.assertEqual(self.prices(), before)
+
+    def test_revision_producing_a_negative_price_changes_nothing(self):
+        before = self.prices()
+        response = self.patch({"rule": {"category": "gravy", "amount": -80}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([dish['dish_id'] for dish in response.json()['dishes']], [self.gravy[1].id])
+        self.assertEqual(self.prices(), before)
+
+
+class DishSoldOutTests(TestCase):
+    def setUp(self):
+        self.dishes = [
+            Dish.objects.create(name=f"Dosa {index}", price='40.00', meal_type='night', category='dosa')
+            for index in range(3)
+        ]
+        # on_commit callbacks do not run inside TestCase: load the menu now
+        invalidate_menu()
+        # The sold-out set is per process; do not leak ids into other tests
+        self.addCleanup(mark_sold_out, [dish.id for dish in self.dishes], False)
+
+    def toggle(self, url, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(url, json.dumps(body), content_type='application/json')
+
+    def test_single_and_bulk_toggle(self):
+        first, second, third = self.dishes
+
+        response = self.toggle(f'/bill/dishes/{first.id}/sold-out/', {"sold_out": True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dish_ids'], [first.id])
+
+        response = self.toggle('/bill/dishes/sold-out/', {"dish_ids": [second.id, third.id, 999999], "sold_out": True})
+        self.assertEqual(response.json()['dish_ids'], [second.id, third.id])
+        self.assertEqual(response.json()['not_found'], [999999])
+
+        self.toggle('/bill/dishes/sold-out/', {"dish_ids": [third.id], "sold_out": False})
+
+        response = self.client.get('/bill/dishes/sold-out/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [dish_id for dish_id in response.json()['sold_out'] if dish_id in {first.id, second.id, third.id}],
+            [first.id, second.id]
+        )
+        self.assertEqual(
+            set(Dish.objects.filter(is_sold_out=True).values_list('id', flat=True)),
+            {first.id, second.id}
+        )
+
+    def test_invalid_requests(self):
+        url = f'/bill/dishes/{self.dishes[0].id}/sold-out/'
+        self.assertEqual(self.toggle(url, {"sold_out": "yes"}).status_code, 400)
+        self.assertEqual(self.toggle('/bill/dishes/999999/sold-out/', {"sold_out": True}).status_code, 404)
+        self.assertEqual(self.toggle('/bill/dishes/sold-out/', {"dish_ids": [], "sold_out": True}).status_code, 400)
+
+    def test_orders_rejected_while_sold_out(self):
+        dish = self.dishes[0]
+        body = json.dumps({"items": [{"dish_id": dish.id, "quantity": 1}], "total_amount": 40})
+        self.toggle(f'/bill/dishes/{dish.id}/sold-out/', {"sold_out": True})
+
+        response = self.client.post('/bill/orders/create/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sold out', response.json()['error'])
+
+        self.toggle(f'/bill/dishes/{dish.id}/sold-out/', {"sold_out": False})
+        response = self.client.post('/bill/orders/create/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_availability_version_changes_the_menu_etag(self):
+        before = self.client.get('/bill/dishes/')
+        version = get_availability_version()
+
+        self.toggle(f'/bill/dishes/{self.dishes[0].id}/sold-out/', {"sold_out": True})
+        self.assertGreater(get_availability_version(), version)
+
+        response = self.client.get('/bill/dishes/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], before['ETag'])
+        sold_out = {dish['id']: dish['is_sold_out'] for dish in response.json()}
+        self.assertTrue(sold_out[self.dishes[0].id])
+        self.assertFalse(sold_out[self.dishes[1].id])
+
+    def test_dish_update_keeps_a_concurrent_sold_out_toggle(self):
+        dish = self.dishes[0]
+        stale = Dish.objects.get(id=dish.id)
+        self.toggle(f'/bill/dishes/{dish.id}/sold-out/', {"sold_out": True})
+
+        # UpdateDishView read the dish before the toggle committed
+        with mock.patch.object(Dish.objects, 'get', return_value=stale), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/bill/dishes/{dish.id}/update/', json.dumps({"name": "Ghee Dosa"}),
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        dish.refresh_from_db()
+        self.assertEqual(dish.name, 'Ghee Dosa')
+        self.assertTrue(dish.is_sold_out)
+        self.assertIn(dish.id, get_sold_out())
+
+
+class OrderSyncTests(TestCase):
+    """orders/sync/ reports one result per order and keeps going past bad ones"""
+
+    def setUp(self):
+        self.dish = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+        # on_commit callbacks do not run inside TestCase: load the menu now
+        invalidate_menu()
+        self.created_at = (timezone.now() - timedelta(hours=2)).replace(microsecond=0)
+
+    def order(self, client_id, quantity=1, **fields):
+        entry = {
+            'client_id': client_id,
+            'created_at': self.created_at.isoformat(),
+            'items': [{'dish_id': self.dish.id, 'quantity': quantity}],
+            'total_amount': 40 * quantity
+        }
+        entry.update(fields)
+        return entry
+
+    def sync(self, orders):
+        response = self.client.post(
+            '/bill/orders/sync/', json.dumps({'orders': orders}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_created_orders_keep_the_terminal_time(self):
+        data = self.sync([self.order('t1-1'), self.order('t1-2', quantity=2)])
+
+        self.assertEqual((data['created'], data['duplicates'], data['errors']), (2, 0, 0))
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'created'])
+        order = Order.objects.get(client_id='t1-2')
+        self.assertEqual(data['results'][1]['order_id'], order.id)
+        self.assertEqual(order.created_at, self.created_at)
+        self.assertEqual(str(order.total_amount), '80.00')
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 1)
+
+    def test_repeated_client_id_is_a_duplicate(self):
+        first = self.sync([self.order('t1-1')])
+        order_id = first['results'][0]['order_id']
+
+        # A retried batch, plus a repeat inside the same batch
+        data = self.sync([self.order('t1-1'), self.order('t1-2'), self.order('t1-2')])
+
+        self.assertEqual((data['created'], data['duplicates'], data['errors']), (1, 2, 0))
+        self.assertEqual(data['results'][0], {'client_id': 't1-1', 'status': 'duplicate', 'order_id': order_id})
+        self.assertEqual(data['results'][2]['status'], 'duplicate')
+        self.assertEqual(data['results'][2]['order_id'], data['results'][1]['order_id'])
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_errors_do_not_abort_the_batch(self):
+        data = self.sync([
+            self.order('t1-1'),
+            self.order('t1-2', items=[{'dish_id': 999999, 'quantity': 1}]),
+            self.order('t1-3', created_at='yesterday'),
+            self.order('t1-4', total_amount=1),
+            {'created_at': self.created_at.isoformat()},
+            self.order('t1-5')
+        ])
+
+        self.assertEqual((data['created'], data['duplicates'], data['errors']), (2, 0, 4))
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['created', 'error', 'error', 'error', 'error', 'created']
+        )
+        self.assertEqual(data['results'][1]['error'], 'Invalid dish ID')
+        self.assertIsNone(data['results'][4]['client_id'])
+        self.assertEqual(
+            set(Order.objects.values_list('client_id', flat=True)), {'t1-1', 't1-5'}
+        )
+
+
+class PriceBookReloadTests(TestCase):
+    """Orders are priced at the new price right after a price change"""
+
+    def setUp(self):
+        self.dosa = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+        self.porotta = Dish.objects.create(name='Porotta', price='20.00', meal_type='night', category='porotta')
+        # on_commit callbacks do not run inside TestCase: load the menu now
+        invalidate_menu()
+        price_book.get_price_book()
+
+    def order(self, dish, total):
+        body = {'items': [{'dish_id': dish.id, 'quantity': 1}], 'total_amount': total}
+        return self.client.post('/bill/orders/create/', json.dumps(body), content_type='application/json')
+
+    def change_prices(self, method, url, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_single_price_update_reloads_only_that_dish(self):
+        self.change_prices('patch', f'/bill/dishes/{self.dosa.id}/update-price/', {'price': 45})
+
+        with mock.patch.object(price_book, '_load_entries', wraps=price_book._load_entries) as load:
+            self.assertEqual(self.order(self.dosa, 40).status_code, 400)
+            response = self.order(self.dosa, 45)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['order']['total_amount'], 45.0)
+        load.assert_called_once_with({self.dosa.id})
+
+        self.assertEqual(self.order(self.porotta, 20).status_code, 201)
+
+    def test_bulk_price_update(self):
+        self.change_prices('patch', '/bill/dishes/update-prices/', {'prices': [
+            {'dish_id': self.dosa.id, 'price': '50'},
+            {'dish_id': self.porotta.id, 'price': '25.10'},
+        ]})
+
+        self.assertEqual(self.order(self.dosa, 50).status_code, 201)
+        self.assertEqual(self.order(self.porotta, 20).status_code, 400)
+        self.assertEqual(self.order(self.porotta, 25.1).status_code, 201)
+
+    def test_parse_amount_is_exact(self):
+        from .views import CreateOrderView
+
+        self.assertEqual(str(CreateOrderView.parse_amount(25.1)), '25.10')
+        self.assertEqual(str(CreateOrderView.parse_amount('0.005')), '0.01')
+        for value in ('abc', 'NaN', float('inf'), 10 ** 9):
+            with self.assertRaises(ValueError):
+                CreateOrderView.parse_amount(value)
+
+
+class BillRendererTests(TestCase):
+    def setUp(self):
+        dosa = Dish.objects.create(name='Dosa', secondary_name='தோசை', price='40.00', meal_type='night', category='dosa')
+        rice = Dish.objects.create(name='Meals', price='120.00', meal_type='afternoon', category='rice')
+        self.order = Order.objects.create(total_amount=Decimal('200.00'))
+        OrderItem.objects.create(order=self.order, dish=dosa, quantity=2, price=Decimal('80.00'))
+        OrderItem.objects.create(order=self.order, dish=rice, quantity=1, price=Decimal('120.00'))
+        bill_renderer._rendered.clear()
+        self.addCleanup(bill_renderer._rendered.clear)
+
+    def item_rows(self, text):
+        lines = text.splitlines()
+        return [line for line in lines if line.rstrip().endswith(('80.00', '120.00'))]
+
+    def test_text_columns_line_up_by_display_width(self):
+        rows = self.item_rows(bill_renderer.render_bill(self.order, 'text'))
+
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[0].startswith('தோசை '))
+        self.assertEqual(len(rows[0]), len(rows[1]) + len('ோை'))
+        for row in rows:
+            self.assertEqual(bill_renderer.display_width(row), bill_renderer.LINE_CHARS)
+            qty_end = bill_renderer.display_width(row[:row.rindex('Rs.')].rstrip())
+            self.assertEqual(qty_end, bill_renderer.NAME_CHARS + bill_renderer.QTY_CHARS)
+
+    def test_display_width_skips_combining_marks(self):
+        self.assertEqual(bill_renderer.display_width('தோசைக்கு'), 4)
+        self.assertEqual(bill_renderer.fit('தோசைக்கு', 3), 'தோசைக்')
+        self.assertEqual(bill_renderer.fit('Dosa', 6, 'right'), '  Dosa')
+
+    def test_escpos_falls_back_to_the_english_name_without_a_font(self):
+        data = bill_renderer.render_bill(self.order, 'escpos')
+
+        self.assertTrue(data.startswith(bill_renderer.ESC_INIT))
+        self.assertTrue(data.endswith(bill_renderer.ESC_FEED_AND_CUT))
+        self.assertIn(b'Dosa', data)
+        self.assertIn(b'Rs.200.00', data)
+        self.assertNotIn(b'\x1dv0', data)
+
+    def test_png_is_paper_wide(self):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(bill_renderer.render_bill(self.order, 'png')))
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.width, bill_renderer.PAPER_DOTS)
+
+    def test_render_cache(self):
+        first = bill_renderer.render_bill(self.order, 'text')
+        with self.assertNumQueries(0):
+            self.assertIs(bill_renderer.render_bill(self.order, 'text'), first)
+
+        # A changed order is a new key
+        self.order.total_amount = Decimal('210.00')
+        self.order.save()
+        self.assertIn('Rs.210.00', bill_renderer.render_bill(self.order, 'text'))
+
+        with self.assertRaises(ValueError):
+            bill_renderer.render_bill(self.order, 'pdf')
+
+
+@override_settings(PRINT_MAX_ATTEMPTS=3, PRINT_LEASE_SECONDS=60)
+class PrintQueueTests(TestCase):
+    """Jobs are run in the test thread; no worker threads are started"""
+
+    def setUp(self):
+        dish = Dish.objects.create(name='Dosa', price='40.00', meal_type='night', category='dosa')
+        self.order = Order.objects.create(total_amount=Decimal('40.00'))
+        OrderItem.objects.create(order=self.order, dish=dish, quantity=1, price=Decimal('40.00'))
+        self.outbox = get_backend('loopback').outbox
+        self.outbox.clear()
+        self.addCleanup(self.outbox.clear)
+
+    def claimed(self, attempts=1, **fields):
+        """A job as _claim_due_jobs leaves it"""
+        return PrintJob.objects.create(
+            order=self.order, backend='loopback', status='printing', attempts=attempts, **fields
+        )
+
+    def run_job(self, job):
+        print_queue._run_job(job.id)
+        job.refresh_from_db()
+        return job
+
+    def test_printed(self):
+        job = self.run_job(self.claimed())
+
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.printed_at)
+        self.assertEqual(self.outbox[-1][0], job.id)
+        self.assertIn('Rs.40.00', self.outbox[-1][2])
+
+    def test_failures_back_off_then_fail(self):
+        with mock.patch.object(type(get_backend('loopback')), 'send', side_effect=OSError('paper out')):
+            job = self.run_job(self.claimed(attempts=1))
+            self.assertEqual((job.status, job.last_error), ('queued', 'paper out'))
+            delay = job.next_attempt_at - job.updated_at
+            self.assertAlmostEqual(delay.total_seconds(), print_queue.RETRY_BASE_SECONDS, delta=1)
+
+            job = self.run_job(self.claimed(attempts=2))
+            delay = job.next_attempt_at - job.updated_at
+            self.assertAlmostEqual(delay.total_seconds(), print_queue.RETRY_BASE_SECONDS * 2, delta=1)
+
+            job = self.run_job(self.claimed(attempts=3))
+            self.assertEqual(job.status, 'failed')
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_kot_for_a_deleted_station_is_retried(self):
+        station = KitchenStation.objects.create(name='Tawa', categories=['dosa'], backend='loopback')
+        job = self.claimed(kind='kot', station=station)
+        station.delete()
+
+        job = self.run_job(job)
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.last_error, 'Kitchen station was deleted')
+
+    def test_unreadable_job_is_retried_in_the_table(self):
+        from django.db import OperationalError
+
+        retried, failed = self.claimed(attempts=1), self.claimed(attempts=3)
+        with mock.patch.object(PrintJob.objects, 'select_related', side_effect=OperationalError('locked')):
+            print_queue._run_job(retried.id)
+            print_queue._run_job(failed.id)
+
+        retried.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual((retried.status, retried.last_error), ('queued', 'locked'))
+        self.assertEqual(failed.status, 'failed')
+
+    def test_claim_skips_jobs_backing_off(self):
+        now = timezone.now()
+        due = PrintJob.objects.create(order=self.order, backend='loopback')
+        PrintJob.objects.create(order=self.order, backend='loopback', next_attempt_at=now + timedelta(minutes=1))
+        self.addCleanup(print_queue._busy_lanes.clear)
+        self.addCleanup(setattr, print_queue, '_in_flight', 0)
+
+        print_queue._claim_due_jobs()
+
+        self.assertEqual(print_queue._jobs.get_nowait(), (due.id, None))
+        self.assertTrue(print_queue._jobs.empty())
+        self.assertEqual(
+            list(PrintJob.objects.order_by('id').values_list('status', 'attempts')),
+            [('printing', 1), ('queued', 0)]
+        )
+
+    def test_only_stale_printing_jobs_are_requeued(self):
+        now = timezone.now()
+        stale, live = self.claimed(), self.claimed()
+        PrintJob.objects.filter(id=stale.id).update(updated_at=now - timedelta(seconds=61))
+        PrintJob.objects.filter(id=live.id).update(updated_at=now - timedelta(seconds=30))
+
+        self.assertEqual(print_queue.requeue_stale_jobs(now), 1)
+
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, 'queued')
+        self.assertEqual(live.status, 'printing')
+
+
+class DishSearchIndexTests(TestCase):
+    def setUp(self):
+        self.dosa = Dish.objects.create(
+            name='Masala Dosa', secondary_name='மசாலா தோசை', price='60.00', meal_type='night', category='dosa'
+        )
+        self.rice = Dish.objects.create(name='Lemon Rice', price='50.00', meal_type='afternoon', category='rice')
+        # on_commit callbacks do not run inside TestCase: load the menu now
+        invalidate_menu()
+        self.index = DishSearchIndex()
+
+    def ids(self, query):
+        return [dish_id for dish_id, _ in self.index.search(query)]
+
+    def test_rename_reindexes_only_the_changed_dish(self):
+        self.assertEqual(self.ids('masala'), [self.dosa.id])
+        self.assertEqual(self.ids('தோசை'), [self.dosa.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dosa.name = 'Ghee Roast'
+            self.dosa.secondary_name = ''
+            self.dosa.save()
+
+        with mock.patch.object(self.index, '_add', wraps=self.index._add) as add:
+            self.assertEqual(self.ids('ghee ro'), [self.dosa.id])
+        add.assert_called_once()
+
+        self.assertEqual(self.ids('masala'), [])
+        self.assertEqual(self.ids('தோசை'), [])
+        self.assertEqual(self.ids('lemon'), [self.rice.id])
+        # Branches left without dishes are pruned
+        self.assertNotIn('m', self.index._trie)
+        self.assertNotIn('ம', self.index._trie)
+        self.assertEqual(set(self.index._trie), {'g', 'r', 'l'})
+
+    def test_search_view(self):
+        response = self.client.get('/bill/dishes/search/', {'q': 'Dosa'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([dish['id'] for dish in response.json()], [self.dosa.id])
+        self.assertEqual(self.client.get('/bill/dishes/search/', {'q': 'x', 'limit': 'a'}).status_code, 400)
+
+
+class DishMoveTests(TestCase):
+    def setUp(self):
+        self.dishes = create_dishes(4)
+
+    def move(self, dish, after):
+        response = self.client.post(
+            '/bill/dishes/move/', json.dumps({'dish_id': dish.id, 'after': after.id}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def stored_order(self):
+        return list(
+            DishDisplayOrder.objects.filter(dish__in=self.dishes)
+            .order_by('order').values_list('dish_id', 'order')
+        )
+
+    def test_moves_until_the_gap_is_exhausted(self):
+        # Keep moving the last dish right after the first: each move halves
+        # the gap after the first dish until no integer is left in it
+        expected = list(self.dishes)
+        for moves in range(1, 20):
+            moved = expected.pop()
+            expected.insert(1, moved)
+            result = self.move(moved, after=expected[0])
+
+            rows = self.stored_order()
+            self.assertEqual([dish_id for dish_id, _ in rows], [dish.id for dish in expected])
+            orders = [order for _, order in rows]
+            self.assertEqual(len(set(orders)), len(orders))
+            if result['rebalanced']:
+                break
+        else:
+            self.fail("the gap was never exhausted")
+
+        self.assertEqual(moves, 11)
+        self.assertEqual(orders, [DishDisplayOrder.spaced_order(index) for index in range(len(expected))])
+        self.assertEqual(result['order'], DishDisplayOrder.spaced_order(1))
+
+        self.assertEqual(check_display_orders()['anomaly_count'], 0)
+        output = io.StringIO()
+        call_command('check_display_orders', stdout=output)
+        self.assertIn(', 0 anomalies', output.getvalue())
+
+    def test_invalid_moves(self):
+        other = create_dishes(1, category='rice')[0]
+        response = self.client.post(
+            '/bill/dishes/move/', json.dumps({'dish_id': other.id, 'after': self.dishes[0].id}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            '/bill/dishes/move/', json.dumps({'dish_id': self.dishes[0].id, 'before': self.dishes[1].id, 'after': self.dishes[2].id}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DishImportExportTests(TestCase):
+    def import_rows(self, rows, query=''):
+        return self.client.post(
+            f'/bill/dishes/import/{query}', json.dumps({'dishes': rows}), content_type='application/json'
+        )
+
+    def rows(self):
+        return [
+            {'name': 'Plain Dosa', 'price': '40', 'meal_type': 'night', 'category': 'dosa', 'order': 2},
+            {'name': 'Ghee Dosa', 'secondary_name': 'நெய் தோசை', 'price': '60', 'meal_type': 'night', 'category': 'dosa', 'order': 1},
+            # Dosa is not served in the afternoon
+            {'name': 'Lunch Dosa', 'price': '50', 'meal_type': 'afternoon', 'category': 'dosa'},
+            {'name': 'Bad Price', 'price': '-1', 'meal_type': 'night', 'category': 'dosa'},
+        ]
+
+    def test_one_bad_row_rejects_the_whole_import(self):
+        response = self.import_rows(self.rows())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [3, 4])
+        self.assertIn('price', response.json()['errors'][1]['errors'])
+        self.assertFalse(Dish.objects.exists())
+
+    def test_skip_invalid_imports_the_valid_rows_in_order(self):
+        response = self.import_rows(self.rows(), '?skip_invalid=true')
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['created'], data['skipped']), (2, 2))
+        self.assertEqual(set(Dish.objects.values_list('name', flat=True)), {'Plain Dosa', 'Ghee Dosa'})
+        self.assertEqual(
+            list(DishDisplayOrder.objects.order_by('order').values_list('dish__name', flat=True)),
+            ['Ghee Dosa', 'Plain Dosa']
+        )
+
+    def test_csv_export_header_and_row_order(self):
+        create_dishes(2, meal_type='afternoon', category='rice')
+        self.import_rows(self.rows()[:2])
+        Dish.objects.create(name='Old Dosa', price='30.00', meal_type='night', category='dosa', is_active=False)
+
+        response = self.client.get('/bill/dishes/export/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'id,name,secondary_name,price,meal_type,category,image,is_active,order')
+        exported = [line.split(',') for line in lines[1:]]
+        # Grouped by meal_type and category, then display order; dishes
+        # without a display order last in their group
+        self.assertEqual(
+            [(row[1], row[7]) for row in exported],
+            [('rice 0', 'true'), ('rice 1', 'true'), ('Ghee Dosa', 'true'),
+             ('Plain Dosa', 'true'), ('Old Dosa', 'false')]
+        )
+        self.assertEqual(exported[2][2], 'நெய் தோசை')
+        self.assertEqual(exported[4][8], '')
+
+    def test_export_round_trips_through_import(self):
+        self.import_rows(self.rows()[:2])
+        exported = b''.join(self.client.get('/bill/dishes/export/').streaming_content)
+        Dish.objects.all().delete()
+
+        response = self.client.post('/bill/dishes/import/', exported, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(DishDisplayOrder.objects.order_by('order').values_list('dish__name', flat=True)),
+            ['Ghee Dosa', 'Plain Dosa']
+        )
@@ -1,122 +1,172 @@
-from django.urls import path
-from .views import *
-
-
-urlpatterns = [
-    # ==========================================
-    # DISHES ENDPOINTS
-    # ==========================================
-    
-    # List/Filter dishes - supports multiple query params:
-    # ?meal_type=afternoon - filter by meal time (excludes extras)
-    # ?category=extras - get ONLY extras
-    # ?category=rice - filter by specific category (excludes extras)
-    # ?group_by_category=true - grouped by category (excludes extras)
-    # ?group_by_meal=true - grouped by meal type (excludes extras)
-    # ?get_available_categories=true&meal_type=afternoon - get available categories
-    path('dishes/', DishListView.as_view(), name='dish-list'),
-    
-    # Get single dish by ID
-    path('dishes/<int:dish_id>/', DishDetailView.as_view(), name='dish-detail'),
-    
-    # Create new dish
-    path('dishes/create/', CreateDishView.as_view(), name='create-dish'),
-    
-    # Update dish (full update)
-    path('dishes/<int:dish_id>/update/', UpdateDishView.as_view(), name='update-dish'),
-    
-    # Delete dish (soft delete)
-    path('dishes/<int:dish_id>/delete/', DeleteDishView.as_view(), name='delete-dish'),
-    
-    # Update dish price only
-    path('dishes/<int:dish_id>/update-price/', UpdateDishPriceView.as_view(), name='update-dish-price'),
-    
-    # Update dish image only
-    path('dishes/<int:dish_id>/update-image/', UpdateDishImageView.as_view(), name='update-dish-image'),
-    
-    # Get dishes for ordering page (grouped by meal_type and category)
-    # Returns nested structure: meal_types -> categories -> dishes
-    # Excludes 'extras' category and 'all' meal type
-    path('dishes/for-ordering/', GetDishesForOrderingView.as_view(), name='dishes-for-ordering'),
-    
-    # Reorder dishes within a meal type and category
-    # POST body: { "meal_type": "afternoon", "category": "rice", "dishes": [{dish_id, order}, ...] }
-    path('dishes/reorder/', DishReorderView.as_view(), name='dish-reorder'),
-    
-    # Initialize display orders for existing dishes (run once)
-    # Creates DishDisplayOrder entries for all dishes grouped by meal_type and category
-    path('dishes/initialize-orders/', InitializeDishOrdersView.as_view(), name='initialize-orders'),
-    
-    # Get dish categories
-    # ?meal_type=afternoon - categories for specific meal
-    # ?include_extras=true - include extras in results
-    path('dishes/categories/', DishCategoriesView.as_view(), name='dish-categories'),
-    
-    
-    # ==========================================
-    # ORDERS ENDPOINTS
-    # ==========================================
-    
-    # Create new order
-    path('orders/create/', CreateOrderView.as_view(), name='create-order'),
-    
-    # Get order history (with date range filter)
-    path('orders/history/', OrderHistoryView.as_view(), name='order-history'),
-    
-    # Get single order details
-    path('orders/<int:order_id>/', OrderDetailView.as_view(), name='order-detail'),
-    
-    
-    # ==========================================
-    # PERSONS & EXPENSES ENDPOINTS
-    # ==========================================
-    
-    # Worker endpoints
-    path('workers/', WorkerListView.as_view(), name='workers'),
-    path('workers/add/', WorkerCreateView.as_view(), name='add_worker'),
-    
-    # Material endpoints
-    path('materials/', MaterialListView.as_view(), name='materials'),
-    path('materials/add/', MaterialCreateView.as_view(), name='add_material'),
-    
-    # Expense endpoints
-    path('expenses/filter/', ExpenseFilterView.as_view(), name='expenses_filter'),
-    path('expenses/worker/add/', AddWorkerExpenseView.as_view(), name='add_worker_expense'),
-    path('expenses/material/add/', AddMaterialExpenseView.as_view(), name='add_material_expense'),
-
-    path('workers/<int:worker_id>/delete/', WorkerDeleteView.as_view(), name='worker-delete'),
-    path('materials/<int:material_id>/delete/', MaterialDeleteView.as_view(), name='material-delete'),
-    path('expenses/<int:expense_id>/delete/', ExpenseDeleteView.as_view(), name='expense-delete'),
-
-
-    # ==========================================
-    # ANALYTICS ENDPOINTS (AUTHENTICATED)
-    # ==========================================
-
-    # Main dashboard (shift-wise with top dishes)
-    path('analytics/dashboard/', AnalyticsDashboardView.as_view(), name='analytics-dashboard'),
-
-    # Category performance analysis
-    path('analytics/categories/', CategoryPerformanceView.as_view(), name='analytics-categories'),
-
-    # Hour-by-hour trends
-    path('analytics/hourly/', HourlyTrendsView.as_view(), name='analytics-hourly'),
-
-    # Day-to-day comparison
-    path('analytics/comparison/', ComparisonView.as_view(), name='analytics-comparison'),
-
-    # Low performing dishes
-    path('analytics/low-performing/', LowPerformingDishesView.as_view(), name='analytics-low-performing'),
-
-    # Worker expense breakdown
-    path('analytics/worker-expenses/', WorkerExpenseBreakdownView.as_view(), name='analytics-worker-expenses'),
-
-    # Material expense breakdown
-    path('analytics/material-expenses/', MaterialExpenseBreakdownView.as_view(), name='analytics-material-expenses'),
-
-    # Weekly summary report
-    path('analytics/weekly-summary/', WeeklySummaryView.as_view(), name='analytics-weekly-summary'),
-
-    path('reports/shift-report/', ShiftReportView.as_view(), name='shift-report'),
-
-]
+from django.urls import path
+from .views import *
+
+
+urlpatterns = [
+    # ==========================================
+    # DISHES ENDPOINTS
+    # ==========================================
+    
+    # List/Filter dishes - supports multiple query params:
+    # ?meal_type=afternoon - filter by meal time (excludes extras)
+    # ?category=extras - get ONLY extras
+    # ?category=rice - filter by specific category (excludes extras)
+    # ?group_by_category=true - grouped by category (excludes extras)
+    # ?group_by_meal=true - grouped by meal type (excludes extras)
+    # ?get_available_categories=true&meal_type=afternoon - get available categories
+    path('dishes/', DishListView.as_view(), name='dish-list'),
+    
+    # Get single dish by ID
+    path('dishes/<int:dish_id>/', DishDetailView.as_view(), name='dish-detail'),
+    
+    # Create new dish
+    path('dishes/create/', CreateDishView.as_view(), name='create-dish'),
+    
+    # Update dish (full update)
+    path('dishes/<int:dish_id>/update/', UpdateDishView.as_view(), name='update-dish'),
+    
+    # Delete dish (soft delete)
+    path('dishes/<int:dish_id>/delete/', DeleteDishView.as_view(), name='delete-dish'),
+    
+    # Update dish price only
+    path('dishes/<int:dish_id>/update-price/', UpdateDishPriceView.as_view(), name='update-dish-price'),
+    
+    # Bulk price revision in one transaction (explicit prices or a % / amount rule)
+    # PATCH body: { "prices": [{dish_id, price}, ...] } or
+    #             { "rule": {"category": "gravy", "percent": 5, "round_to": 1} }
+    path('dishes/update-prices/', BulkUpdateDishPriceView.as_view(), name='bulk-update-dish-price'),
+    
+    # Sold out (86) toggles: GET list, PATCH {"dish_ids": [...], "sold_out": bool}
+    path('dishes/sold-out/', DishSoldOutView.as_view(), name='dish-sold-out'),
+    
+    # Sold out toggle for one dish: PATCH {"sold_out": bool}
+    path('dishes/<int:dish_id>/sold-out/', DishSoldOutView.as_view(), name='dish-sold-out-toggle'),
+    
+    # Update dish image only
+    path('dishes/<int:dish_id>/update-image/', UpdateDishImageView.as_view(), name='update-dish-image'),
+    
+    # Get dishes for ordering page (grouped by meal_type and category)
+    # Returns nested structure: meal_types -> categories -> dishes
+    # Excludes 'extras' category and 'all' meal type
+    path('dishes/for-ordering/', GetDishesForOrderingView.as_view(), name='dishes-for-ordering'),
+    
+    # Reorder dishes within a meal type and category
+    # POST body: { "meal_type": "afternoon", "category": "rice", "dishes": [{dish_id, order}, ...] }
+    path('dishes/reorder/', DishReorderView.as_view(), name='dish-reorder'),
+    
+    # Move one dish directly before/after another in the same meal type and category
+    # POST body: { "dish_id": 12, "before": 7 } or { "dish_id": 12, "after": 7 }
+    path('dishes/move/', DishMoveView.as_view(), name='dish-move'),
+    
+    # Initialize display orders for existing dishes (run once)
+    # Creates DishDisplayOrder entries for all dishes grouped by meal_type and category
+    path('dishes/initialize-orders/', InitializeDishOrdersView.as_view(), name='initialize-orders'),
+    
+    # Bulk import dishes from JSON or CSV (rows validated before any insert)
+    # ?skip_invalid=true - import the valid rows and report the rest
+    path('dishes/import/', DishImportView.as_view(), name='dish-import'),
+    
+    # Stream the full dish catalog
+    # ?format=csv|ndjson - output format (default csv)
+    # ?active_only=true - only active dishes
+    path('dishes/export/', DishExportView.as_view(), name='dish-export'),
+    
+    # Display order integrity (admin only)
+    # GET - report anomalies, POST - repair and respace every group to ORDER_GAP multiples
+    path('dishes/display-orders/check/', DisplayOrderCheckView.as_view(), name='display-order-check'),
+    
+    # Search active dishes by English or Tamil name
+    # ?q=dos - prefix / partial match, ranked
+    # ?limit=20 - maximum results (up to 100)
+    path('dishes/search/', DishSearchView.as_view(), name='dish-search'),
+    
+    # Menu delta sync for POS terminals
+    # ?since=<version> - dishes changed since that menu version (omit for full menu)
+    # ?wait=25 - long-poll up to N seconds (max 25) for the next change
+    path('dishes/changes/', DishChangesView.as_view(), name='dish-changes'),
+    
+    # Get dish categories
+    # ?meal_type=afternoon - categories for specific meal
+    # ?include_extras=true - include extras in results
+    path('dishes/categories/', DishCategoriesView.as_view(), name='dish-categories'),
+    
+    
+    # ==========================================
+    # ORDERS ENDPOINTS
+    # ==========================================
+    
+    # Create new order
+    path('orders/create/', CreateOrderView.as_view(), name='create-order'),
+    
+    # Batch upload of orders queued offline (client_id dedup, original timestamps)
+    path('orders/sync/', OrderSyncView.as_view(), name='order-sync'),
+    
+    # Get order history (with date range filter)
+    path('orders/history/', OrderHistoryView.as_view(), name='order-history'),
+    
+    # Get single order details
+    path('orders/<int:order_id>/', OrderDetailView.as_view(), name='order-detail'),
+    
+    # Print jobs of an order (GET) / reprint the bill (POST)
+    path('orders/<int:order_id>/print/', OrderPrintView.as_view(), name='order-print'),
+    
+    # Rendered bill preview: ?format=text (default) | png | escpos
+    path('orders/<int:order_id>/bill/', OrderBillView.as_view(), name='order-bill'),
+    
+    # Print job status (queued / printing / done / failed)
+    path('print-jobs/<int:job_id>/', PrintJobDetailView.as_view(), name='print-job-detail'),
+    
+    
+    # ==========================================
+    # PERSONS & EXPENSES ENDPOINTS
+    # ==========================================
+    
+    # Worker endpoints
+    path('workers/', WorkerListView.as_view(), name='workers'),
+    path('workers/add/', WorkerCreateView.as_view(), name='add_worker'),
+    
+    # Material endpoints
+    path('materials/', MaterialListView.as_view(), name='materials'),
+    path('materials/add/', MaterialCreateView.as_view(), name='add_material'),
+    
+    # Expense endpoints
+    path('expenses/filter/', ExpenseFilterView.as_view(), name='expenses_filter'),
+    path('expenses/worker/add/', AddWorkerExpenseView.as_view(), name='add_worker_expense'),
+    path('expenses/material/add/', AddMaterialExpenseView.as_view(), name='add_material_expense'),
+
+    path('workers/<int:worker_id>/delete/', WorkerDeleteView.as_view(), name='worker-delete'),
+    path('materials/<int:material_id>/delete/', MaterialDeleteView.as_view(), name='material-delete'),
+    path('expenses/<int:expense_id>/delete/', ExpenseDeleteView.as_view(), name='expense-delete'),
+
+
+    # ==========================================
+    # ANALYTICS ENDPOINTS (AUTHENTICATED)
+    # ==========================================
+
+    # Main dashboard (shift-wise with top dishes)
+    path('analytics/dashboard/', AnalyticsDashboardView.as_view(), name='analytics-dashboard'),
+
+    # Category performance analysis
+    path('analytics/categories/', CategoryPerformanceView.as_view(), name='analytics-categories'),
+
+    # Hour-by-hour trends
+    path('analytics/hourly/', HourlyTrendsView.as_view(), name='analytics-hourly'),
+
+    # Day-to-day comparison
+    path('analytics/comparison/', ComparisonView.as_view(), name='analytics-comparison'),
+
+    # Low performing dishes
+    path('analytics/low-performing/', LowPerformingDishesView.as_view(), name='analytics-low-performing'),
+
+    # Worker expense breakdown
+    path('analytics/worker-expenses/', WorkerExpenseBreakdownView.as_view(), name='analytics-worker-expenses'),
+
+    # Material expense breakdown
+    path('analytics/material-expenses/', MaterialExpenseBreakdownView.as_view(), name='analytics-material-expenses'),
+
+    # Weekly summary report
+    path('analytics/weekly-summary/', WeeklySummaryView.as_view(), name='analytics-weekly-summary'),
+
+    path('reports/shift-report/', ShiftReportView.as_view(), name='shift-report'),
+
+]
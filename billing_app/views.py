@@ -1,2885 +1,4256 @@
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.views import View
-from django.utils.decorators import method_decorator
-
-from django.db.models import F, Sum, DecimalField, Count, Q, Max
-from .models import *
-import json
-from django.utils.dateparse import parse_datetime, parse_date
-from .print_utils import print_order_bill 
-from django.utils import timezone
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from datetime import date, datetime, timedelta
-from rest_framework.views import APIView
-from decimal import Decimal
-from django.db import transaction
-import json
-from django.http import JsonResponse
-from django.views import View
-from django.db.models import Sum, Count, F, Q, DecimalField, Avg
-from django.db.models.functions import Coalesce, TruncHour, TruncDate
-from datetime import datetime, time, timedelta
-from decimal import Decimal
-from collections import defaultdict
-from .models import Order, OrderItem, Dish, Expense, Worker, Material, ExpenseItem
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import status
-import pytz
-import traceback
-from .models import Order, OrderItem, Expense, ExpenseItem, Dish, Worker, Material
-from .serializers import ShiftReportSerializer, DailyReportSerializer
-# ==========================================
-# DISH LIST VIEW - WITH EXTRAS ISOLATION
-# ==========================================
-class DishListView(View):
-    def get(self, request):
-        try:
-            # Get filter parameters
-            meal_type = request.GET.get('meal_type', None)
-            category = request.GET.get('category', None)
-            group_by_meal = request.GET.get('group_by_meal', 'false').lower() == 'true'
-            group_by_category = request.GET.get('group_by_category', 'false').lower() == 'true'
-            get_available_categories = request.GET.get('get_available_categories', 'false').lower() == 'true'
-            
-            # Return available categories for a meal type
-            if get_available_categories:
-                if not meal_type:
-                    return JsonResponse({
-                        "error": "meal_type parameter is required when get_available_categories=true"
-                    }, status=400)
-                
-                # Get available categories excluding extras
-                available_categories = Dish.get_available_categories_for_meal(meal_type)
-                available_categories = [cat for cat in available_categories if cat != 'extras']
-                
-                category_data = [
-                    {
-                        'code': cat_code,
-                        'display': cat_display
-                    }
-                    for cat_code, cat_display in Dish.CATEGORY_CHOICES
-                    if cat_code in available_categories
-                ]
-                return JsonResponse(category_data, safe=False)
-            
-            # If group_by_category=true, return grouped by category (EXCLUDES EXTRAS)
-            if group_by_category:
-                return self.get_grouped_by_category(request, meal_type)
-            
-            # If group_by_meal=true, return grouped data for ordering page
-            if group_by_meal:
-                return self.get_grouped_by_meal_type(request)
-            
-            # Start with all active dishes
-            dishes = Dish.objects.filter(is_active=True)
-            
-            # CRITICAL: If category is explicitly 'extras', show only extras
-            if category == 'extras':
-                dishes = dishes.filter(category='extras')
-            else:
-                # For all other queries, EXCLUDE extras by default
-                dishes = dishes.exclude(category='extras')
-                
-                # Filter by specific category if provided (and it's not extras)
-                if category:
-                    valid_categories = [choice[0] for choice in Dish.CATEGORY_CHOICES]
-                    if category not in valid_categories:
-                        return JsonResponse({
-                            "error": f"Invalid category. Must be one of: {', '.join(valid_categories)}"
-                        }, status=400)
-                    dishes = dishes.filter(category=category)
-            
-            # Filter by meal_type if provided (doesn't apply to extras)
-            if meal_type and category != 'extras':
-                valid_meal_types = [choice[0] for choice in Dish.MEAL_TYPE_CHOICES]
-                if meal_type not in valid_meal_types:
-                    return JsonResponse({
-                        "error": f"Invalid meal_type. Must be one of: {', '.join(valid_meal_types)}"
-                        }, status=400)
-                
-                # Handle 'all' meal type
-                if meal_type == 'all':
-                    pass  # Don't filter by meal_type
-                else:
-                    # Show dishes for specific meal_type OR dishes marked as 'all'
-                    dishes = dishes.filter(Q(meal_type=meal_type) | Q(meal_type='all'))
-            
-            # Order results - UNIFIED ORDERING LOGIC
-            if meal_type and meal_type != 'all' and category != 'extras':
-                # Use select_related for efficient ordering
-                dishes = dishes.select_related('display_order_info').order_by(
-                    'category',
-                    'display_order_info__order',
-                    'id'  # Add id as tiebreaker for consistent ordering
-                )
-            else:
-                dishes = dishes.order_by('category', 'name')
-            
-            # Build response data
-            data = []
-            for dish in dishes:
-                dish_data = {
-                    'id': dish.id,
-                    'name': dish.name,
-                    'secondary_name': dish.secondary_name,
-                    'price': float(dish.price),
-                    'meal_type': dish.meal_type,
-                    'meal_type_display': dish.get_meal_type_display(),
-                    'category': dish.category,
-                    'category_display': dish.get_category_display(),
-                    'image': request.build_absolute_uri(dish.image.url) if dish.image else None,
-                    'is_active': dish.is_active,
-                    'created_at': dish.created_at.isoformat(),
-                }
-                
-                if meal_type and meal_type != 'all' and category != 'extras':
-                    try:
-                        dish_data['order'] = dish.display_order_info.order
-                    except DishDisplayOrder.DoesNotExist:
-                        dish_data['order'] = 0  # Default to 0 for consistency
-                
-                data.append(dish_data)
-            
-            return JsonResponse(data, safe=False)
-        
-        except Exception as e:
-            import traceback
-            print("Error in DishListView:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-    
-    def get_grouped_by_category(self, request, meal_type=None):
-        """
-        Get dishes grouped by category for restaurant page
-        Called when ?group_by_category=true
-        ALWAYS EXCLUDES 'extras' category
-        """
-        try:
-            categories_data = []
-            
-            # Base queryset - ALWAYS exclude extras category
-            base_query = Dish.objects.filter(is_active=True).exclude(category='extras')
-            
-            # Handle meal_type filtering
-            if meal_type:
-                if meal_type == 'all':
-                    pass  # Show all dishes
-                else:
-                    # Show dishes for specific meal_type OR dishes marked as 'all'
-                    base_query = base_query.filter(Q(meal_type=meal_type) | Q(meal_type='all'))
-            
-            # Get available categories for this meal type (excluding extras)
-            if meal_type and meal_type != 'all':
-                available_categories = Dish.get_available_categories_for_meal(meal_type)
-            else:
-                available_categories = [cat[0] for cat in Dish.CATEGORY_CHOICES]
-            
-            # Remove extras from available categories
-            available_categories = [cat for cat in available_categories if cat != 'extras']
-            
-            # Only iterate through available categories (excluding extras)
-            for category_code, category_name in Dish.CATEGORY_CHOICES:
-                # Skip extras category completely
-                if category_code == 'extras':
-                    continue
-                
-                # Skip categories not available for this meal time
-                if category_code not in available_categories:
-                    continue
-                
-                # Get dishes for this category - UNIFIED ORDERING
-                dishes = base_query.filter(category=category_code).select_related(
-                    'display_order_info'
-                ).order_by(
-                    'display_order_info__order',
-                    'id'  # Add id as tiebreaker
-                )
-                
-                dishes_data = []
-                for dish in dishes:
-                    try:
-                        order = dish.display_order_info.order
-                    except DishDisplayOrder.DoesNotExist:
-                        order = 0  # Default to 0
-                    
-                    dishes_data.append({
-                        'id': dish.id,
-                        'name': dish.name,
-                        'secondary_name': dish.secondary_name,
-                        'price': float(dish.price),
-                        'meal_type': dish.meal_type,
-                        'meal_type_display': dish.get_meal_type_display(),
-                        'order': order,
-                        'image': request.build_absolute_uri(dish.image.url) if dish.image else None
-                    })
-                
-                # Only add category if it has dishes
-                if dishes_data:
-                    categories_data.append({
-                        'category': category_code,
-                        'category_display': category_name,
-                        'dishes': dishes_data,
-                        'total_dishes': len(dishes_data)
-                    })
-            
-            return JsonResponse(categories_data, safe=False)
-        
-        except Exception as e:
-            import traceback
-            print("Error in get_grouped_by_category:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-    
-    def get_grouped_by_meal_type(self, request):
-        """
-        Get all dishes grouped by meal_type for the ordering page UI
-        Called when ?group_by_meal=true
-        EXCLUDES extras from this view
-        """
-        try:
-            meal_types_data = []
-            
-            for meal_code, meal_name in Dish.MEAL_TYPE_CHOICES:
-                # Get dishes for this meal_type ordered by order field
-                # EXCLUDE extras category - UNIFIED ORDERING
-                dishes = Dish.objects.filter(
-                    meal_type=meal_code,
-                    is_active=True
-                ).exclude(
-                    category='extras'
-                ).select_related('display_order_info').order_by(
-                    'display_order_info__order',
-                    'id'  # Add id as tiebreaker
-                )
-                
-                dishes_data = []
-                for dish in dishes:
-                    try:
-                        order = dish.display_order_info.order
-                    except DishDisplayOrder.DoesNotExist:
-                        order = 0  # Default to 0
-                    
-                    dishes_data.append({
-                        'id': dish.id,
-                        'name': dish.name,
-                        'secondary_name': dish.secondary_name,
-                        'price': float(dish.price),
-                        'category': dish.category,
-                        'category_display': dish.get_category_display(),
-                        'order': order,
-                        'image': request.build_absolute_uri(dish.image.url) if dish.image else None
-                    })
-                
-                meal_types_data.append({
-                    'meal_type': meal_code,
-                    'meal_type_display': meal_name,
-                    'dishes': dishes_data,
-                    'total_dishes': len(dishes_data)
-                })
-            
-            return JsonResponse(meal_types_data, safe=False)
-        
-        except Exception as e:
-            import traceback
-            print("Error in get_grouped_by_meal_type:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-
-
-# ==========================================
-# GET DISHES FOR ORDERING (GROUPED BY MEAL TYPE AND CATEGORY)
-# ==========================================
-class GetDishesForOrderingView(View):
-    def get(self, request):
-        try:
-            meal_types_data = []
-
-            for meal_code, meal_name in Dish.MEAL_TYPE_CHOICES:
-                if meal_code == 'all':
-                    continue
-
-                categories = Dish.objects.filter(
-                    meal_type=meal_code,
-                    is_active=True
-                ).exclude(
-                    category='extras'
-                ).values_list('category', flat=True).distinct().order_by('category')
-
-                categories_data = []
-                total_dishes_count = 0
-
-                for category in categories:
-                    dishes = Dish.objects.filter(
-                        meal_type=meal_code,
-                        category=category,
-                        is_active=True
-                    ).select_related('display_order_info').order_by(
-                        'display_order_info__order', 'id'
-                    )
-
-                    dishes_list = []
-                    for dish in dishes:
-                        try:
-                            current_order = dish.display_order_info.order
-                        except DishDisplayOrder.DoesNotExist:
-                            current_order = 0
-
-                        dishes_list.append({
-                            'id': dish.id,
-                            'name': dish.name,
-                            'secondary_name': dish.secondary_name,
-                            'price': str(dish.price),
-                            'image': dish.image.url if dish.image else None,
-                            'category': dish.category,
-                            'category_display': dish.get_category_display(),
-                            'current_order': current_order
-                        })
-
-                    if dishes_list:
-                        categories_data.append({
-                            'category': category,
-                            'category_display': dict(Dish.CATEGORY_CHOICES).get(category, category),
-                            'dishes': dishes_list,
-                            'total_dishes': len(dishes_list)
-                        })
-                        total_dishes_count += len(dishes_list)
-
-                if categories_data:
-                    meal_types_data.append({
-                        'meal_type': meal_code,
-                        'meal_type_display': meal_name,
-                        'categories': categories_data,
-                        'total_dishes': total_dishes_count
-                    })
-
-            return JsonResponse(meal_types_data, safe=False)
-
-        except Exception as e:
-            import traceback
-            print("Error in GetDishesForOrderingView:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-
-
-# ==========================================
-# DISH REORDER VIEW (FIXED)
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class DishReorderView(View):
-    def put(self, request):
-        try:
-            data = json.loads(request.body)
-            meal_type = data.get('meal_type')
-            category = data.get('category')
-            dishes_order = data.get('dishes', [])
-
-            print(f"📥 Received reorder request:")
-            print(f"   Meal Type: {meal_type} (type: {type(meal_type)})")
-            print(f"   Category: {category} (type: {type(category)})")
-            print(f"   Dishes: {len(dishes_order)} items")
-
-            # Validate meal_type
-            valid_meal_types = [choice[0] for choice in Dish.MEAL_TYPE_CHOICES if choice[0] != 'all']
-            if not meal_type:
-                return JsonResponse({
-                    "error": "meal_type is required"
-                }, status=400)
-
-            if meal_type not in valid_meal_types:
-                return JsonResponse({
-                    "error": f"Invalid meal_type '{meal_type}'. Must be one of: {', '.join(valid_meal_types)}"
-                }, status=400)
-
-            # Validate category
-            valid_categories = [choice[0] for choice in Dish.CATEGORY_CHOICES if choice[0] != 'extras']
-            if not category:
-                return JsonResponse({
-                    "error": "category is required"
-                }, status=400)
-
-            if category not in valid_categories:
-                return JsonResponse({
-                    "error": f"Invalid category '{category}'. Must be one of: {', '.join(valid_categories)}"
-                }, status=400)
-
-            # Validate dishes array
-            if not dishes_order or not isinstance(dishes_order, list):
-                return JsonResponse({
-                    "error": "dishes array is required and must be a list"
-                }, status=400)
-
-            # Validate each dish item
-            for item in dishes_order:
-                if 'dish_id' not in item or 'order' not in item:
-                    return JsonResponse({
-                        "error": "Each dish must have 'dish_id' and 'order' keys"
-                    }, status=400)
-
-            # Update orders in transaction
-            with transaction.atomic():
-                dish_ids = [item['dish_id'] for item in dishes_order]
-
-                # Verify all dishes exist and belong to the meal_type and category
-                dishes_in_db = Dish.objects.filter(
-                    id__in=dish_ids,
-                    meal_type=meal_type,
-                    category=category,
-                    is_active=True
-                ).exclude(category='extras')
-
-                dishes_count = dishes_in_db.count()
-                print(f"✅ Found {dishes_count} dishes in database")
-
-                if dishes_count != len(dish_ids):
-                    missing_ids = set(dish_ids) - set(dishes_in_db.values_list('id', flat=True))
-                    return JsonResponse({
-                        "error": f"Some dishes not found or don't belong to this meal_type/category. Missing IDs: {list(missing_ids)}"
-                    }, status=400)
-
-                # STEP 1: Set all orders to negative values temporarily
-                print("🔄 Setting temporary negative orders...")
-                for item in dishes_order:
-                    DishDisplayOrder.objects.filter(
-                        dish_id=item['dish_id']
-                    ).update(order=-item['order'] - 1000)
-
-                # STEP 2: Set the actual order values
-                print("✅ Setting final orders...")
-                updated_count = 0
-                for item in dishes_order:
-                    obj, created = DishDisplayOrder.objects.update_or_create(
-                        dish_id=item['dish_id'],
-                        defaults={
-                            'meal_type': meal_type,
-                            'category': category,
-                            'order': item['order']
-                        }
-                    )
-                    updated_count += 1
-                    print(f"   Dish {item['dish_id']}: order = {item['order']} ({'created' if created else 'updated'})")
-
-            print(f"✅ Successfully reordered {updated_count} dishes")
-
-            return JsonResponse({
-                "success": True,
-                "message": f"Successfully reordered {updated_count} dishes for {category} in {meal_type}",
-                "meal_type": meal_type,
-                "category": category,
-                "updated_count": updated_count
-            })
-
-        except json.JSONDecodeError:
-            return JsonResponse({
-                "error": "Invalid JSON payload"
-            }, status=400)
-        except Exception as e:
-            import traceback
-            print("❌ Error in DishReorderView:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-
-
-# ==========================================
-# INITIALIZE DISH ORDERS VIEW
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class InitializeDishOrdersView(View):
-    def post(self, request):
-        try:
-            created_count = 0
-            updated_count = 0
-
-            for meal_code, meal_name in Dish.MEAL_TYPE_CHOICES:
-                if meal_code == 'all':
-                    continue
-
-                for cat_code, cat_name in Dish.CATEGORY_CHOICES:
-                    if cat_code == 'extras':
-                        continue
-
-                    dishes = Dish.objects.filter(
-                        meal_type=meal_code,
-                        category=cat_code,
-                        is_active=True
-                    ).order_by('id')
-
-                    for index, dish in enumerate(dishes):
-                        obj, created = DishDisplayOrder.objects.update_or_create(
-                            dish=dish,
-                            defaults={
-                                'meal_type': meal_code,
-                                'category': cat_code,
-                                'order': index
-                            }
-                        )
-                        if created:
-                            created_count += 1
-                        else:
-                            updated_count += 1
-
-            return JsonResponse({
-                "success": True,
-                "message": f"Initialized dish orders",
-                "created": created_count,
-                "updated": updated_count,
-                "details": "Orders grouped by meal_type and category (extras excluded)"
-            })
-
-        except Exception as e:
-            import traceback
-            print("Error in InitializeDishOrdersView:")
-            print(traceback.format_exc())
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-
-
-# ==========================================
-# GET DISH CATEGORIES
-# ==========================================
-class DishCategoriesView(View):
-    def get(self, request):
-        try:
-            meal_type = request.GET.get('meal_type', None)
-            include_extras = request.GET.get('include_extras', 'false').lower() == 'true'
-
-            if meal_type:
-                available_categories = Dish.get_available_categories_for_meal(meal_type)
-                categories = [
-                    {
-                        'value': choice[0],
-                        'label': choice[1]
-                    }
-                    for choice in Dish.CATEGORY_CHOICES
-                    if choice[0] in available_categories
-                ]
-            else:
-                categories = [
-                    {
-                        'value': choice[0],
-                        'label': choice[1]
-                    }
-                    for choice in Dish.CATEGORY_CHOICES
-                ]
-
-            if not include_extras:
-                categories = [cat for cat in categories if cat['value'] != 'extras']
-
-            return JsonResponse(categories, safe=False)
-        except Exception as e:
-            import traceback
-            print("Error in DishCategoriesView:")
-            print(traceback.format_exc())
-            return JsonResponse({"error": str(e)}, status=500)
-
-# ==========================================
-# GET SINGLE DISH BY ID
-# ==========================================
-class DishDetailView(View):
-    def get(self, request, dish_id):
-        try:
-            dish = Dish.objects.get(id=dish_id)
-            data = {
-                "id": dish.id,
-                "name": dish.name,
-                "secondary_name": dish.secondary_name,
-                "price": float(dish.price),
-                "meal_type": dish.meal_type,
-                "meal_type_display": dish.get_meal_type_display(),
-                "category": dish.category,
-                "category_display": dish.get_category_display(),
-                "image": request.build_absolute_uri(dish.image.url) if dish.image else None,
-                "is_active": dish.is_active,
-                "created_at": dish.created_at.isoformat(),
-                "updated_at": dish.updated_at.isoformat(),
-            }
-            return JsonResponse(data)
-        
-        except Dish.DoesNotExist:
-            return JsonResponse({
-                "error": "Dish not found"
-            }, status=404)
-        
-        except Exception as e:
-            return JsonResponse({
-                "error": str(e)
-            }, status=500)
-
-
-@method_decorator(csrf_exempt, name='dispatch')
-class CreateDishView(View):
-    def post(self, request):
-        try:
-            name = request.POST.get('name', '').strip()
-            secondary_name = request.POST.get('secondary_name', '').strip()
-            price = request.POST.get('price', '').strip()
-            meal_type = request.POST.get('meal_type', 'afternoon').strip()
-            category = request.POST.get('category', 'rice').strip()
-            image = request.FILES.get('image')
-            
-            # Validation - required fields
-            if not name:
-                return JsonResponse({"error": "Dish name is required"}, status=400)
-            
-            if not price:
-                return JsonResponse({"error": "Price is required"}, status=400)
-            
-            # Validate price
-            try:
-                price_float = float(price)
-                if price_float < 0:
-                    raise ValueError("Price cannot be negative")
-            except ValueError:
-                return JsonResponse({
-                    "error": "Price must be a valid positive number"
-                }, status=400)
-            
-            # Validate meal_type
-            valid_meal_types = [choice[0] for choice in Dish.MEAL_TYPE_CHOICES]
-            if meal_type not in valid_meal_types:
-                return JsonResponse({
-                    "error": f"Invalid meal_type. Must be one of: {', '.join(valid_meal_types)}"
-                }, status=400)
-            
-            # Validate category
-            valid_categories = [choice[0] for choice in Dish.CATEGORY_CHOICES]
-            if category not in valid_categories:
-                return JsonResponse({
-                    "error": f"Invalid category. Must be one of: {', '.join(valid_categories)}"
-                }, status=400)
-            
-            # Check if category is allowed for this meal type (skip for extras)
-            if category != 'extras' and hasattr(Dish, 'is_category_available_for_meal'):
-                if not Dish.is_category_available_for_meal(category, meal_type):
-                    return JsonResponse({
-                        "error": f"Category '{category}' is not available for meal type '{meal_type}'"
-                    }, status=400)
-            
-            # Use transaction to ensure atomicity
-            with transaction.atomic():
-                # Create dish
-                dish = Dish.objects.create(
-                    name=name,
-                    secondary_name=secondary_name if secondary_name else None,
-                    price=price_float,
-                    meal_type=meal_type,
-                    category=category,
-                    image=image
-                )
-                
-                # Determine which meal types need display orders
-                meal_types_to_order = []
-                
-                if category == 'extras':
-                    # Extras don't need display orders (available at all times)
-                    pass
-                elif meal_type == 'all':
-                    # If meal_type is 'all', create orders for morning, afternoon, and night
-                    meal_types_to_order = ['morning', 'afternoon', 'night']
-                else:
-                    # Normal case - just the selected meal type
-                    meal_types_to_order = [meal_type]
-                
-                # Create display order entries
-                for mt in meal_types_to_order:
-                    try:
-                        # Get the next available order for this meal type
-                        max_order_result = DishDisplayOrder.objects.filter(
-                            meal_type=mt
-                        ).aggregate(Max('order'))
-                        
-                        max_order = max_order_result['order__max']
-                        next_order = (max_order if max_order is not None else -1) + 1
-                        
-                        # Check if this dish already has a display order for this meal type
-                        existing_order = DishDisplayOrder.objects.filter(
-                            dish=dish,
-                            meal_type=mt
-                        ).first()
-                        
-                        if existing_order:
-                            # Update existing order
-                            existing_order.order = next_order
-                            existing_order.save()
-                            print(f"✅ Updated display order for {dish.name} - {mt}: {next_order}")
-                        else:
-                            # Create new display order
-                            DishDisplayOrder.objects.create(
-                                dish=dish,
-                                meal_type=mt,
-                                order=next_order
-                            )
-                            print(f"✅ Created display order for {dish.name} - {mt}: {next_order}")
-                    
-                    except Exception as order_error:
-                        # Log the error but don't fail the dish creation
-                        print(f"⚠️ Display order creation warning for {mt}: {str(order_error)}")
-                        # If it's a unique constraint error, try to find and use the next available order
-                        if 'unique constraint' in str(order_error).lower():
-                            try:
-                                # Find the actual maximum order including any gaps
-                                all_orders = DishDisplayOrder.objects.filter(
-                                    meal_type=mt
-                                ).values_list('order', flat=True).order_by('order')
-                                
-                                # Find next available order (handling gaps)
-                                used_orders = set(all_orders)
-                                next_order = 0
-                                while next_order in used_orders:
-                                    next_order += 1
-                                
-                                DishDisplayOrder.objects.create(
-                                    dish=dish,
-                                    meal_type=mt,
-                                    order=next_order
-                                )
-                                print(f"✅ Created display order (gap-filled) for {dish.name} - {mt}: {next_order}")
-                            except Exception as retry_error:
-                                print(f"❌ Failed to create display order after retry: {str(retry_error)}")
-            
-            return JsonResponse({
-                "message": "Dish created successfully!",
-                "dish": {
-                    "id": dish.id,
-                    "name": dish.name,
-                    "secondary_name": dish.secondary_name or "",
-                    "price": float(dish.price),
-                    "meal_type": dish.meal_type,
-                    "meal_type_display": dish.get_meal_type_display(),
-                    "category": dish.category,
-                    "category_display": dish.get_category_display(),
-                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
-                }
-            }, status=201)
-        
-        except ValidationError as e:
-            return JsonResponse({"error": str(e)}, status=400)
-        except Exception as e:
-            print(f"❌ Dish creation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({
-                "error": "Failed to create dish",
-                "details": str(e)
-            }, status=500)
-
-
-# ==========================================
-# UPDATE DISH
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class UpdateDishView(View):
-    def put(self, request, dish_id):
-        try:
-            dish = Dish.objects.get(id=dish_id)
-            data = json.loads(request.body)
-            
-            # Update fields if provided
-            if 'name' in data:
-                dish.name = data['name'].strip()
-            
-            if 'secondary_name' in data:
-                dish.secondary_name = data['secondary_name'].strip() or None
-            
-            if 'price' in data:
-                try:
-                    price = float(data['price'])
-                    if price < 0:
-                        raise ValueError("Price cannot be negative")
-                    dish.price = price
-                except ValueError as e:
-                    return JsonResponse({"error": str(e)}, status=400)
-            
-            if 'meal_type' in data:
-                meal_type = data['meal_type']
-                valid_meal_types = [choice[0] for choice in Dish.MEAL_TYPE_CHOICES]
-                if meal_type not in valid_meal_types:
-                    return JsonResponse({
-                        "error": f"Invalid meal_type. Must be one of: {', '.join(valid_meal_types)}"
-                    }, status=400)
-                dish.meal_type = meal_type
-            
-            if 'category' in data:
-                category = data['category']
-                valid_categories = [choice[0] for choice in Dish.CATEGORY_CHOICES]
-                if category not in valid_categories:
-                    return JsonResponse({
-                        "error": f"Invalid category. Must be one of: {', '.join(valid_categories)}"
-                    }, status=400)
-                
-                # Check if category is allowed for meal type (skip for extras)
-                if category != 'extras' and not Dish.is_category_available_for_meal(category, dish.meal_type):
-                    return JsonResponse({
-                        "error": f"Category '{category}' is not available for meal type '{dish.meal_type}'"
-                    }, status=400)
-                
-                dish.category = category
-            
-            if 'is_active' in data:
-                dish.is_active = bool(data['is_active'])
-            
-            dish.save()
-            
-            return JsonResponse({
-                "message": "Dish updated successfully!",
-                "dish": {
-                    "id": dish.id,
-                    "name": dish.name,
-                    "secondary_name": dish.secondary_name,
-                    "price": float(dish.price),
-                    "meal_type": dish.meal_type,
-                    "meal_type_display": dish.get_meal_type_display(),
-                    "category": dish.category,
-                    "category_display": dish.get_category_display(),
-                    "is_active": dish.is_active,
-                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
-                }
-            })
-        
-        except Dish.DoesNotExist:
-            return JsonResponse({"error": "Dish not found"}, status=404)
-        except ValidationError as e:
-            return JsonResponse({"error": str(e)}, status=400)
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-# ==========================================
-# DELETE DISH
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class DeleteDishView(View):
-    def delete(self, request, dish_id):
-        try:
-            dish = Dish.objects.get(id=dish_id)
-            dish.is_active = False  # Soft delete
-            dish.save()
-            
-            return JsonResponse({
-                "message": "Dish deleted successfully!"
-            })
-        
-        except Dish.DoesNotExist:
-            return JsonResponse({"error": "Dish not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-# ==========================================
-# UPDATE DISH PRICE
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class UpdateDishPriceView(View):
-    def patch(self, request, dish_id):
-        try:
-            dish = Dish.objects.get(id=dish_id)
-            data = json.loads(request.body)
-            new_price = data.get('price')
-            
-            if new_price is None:
-                return JsonResponse({
-                    "error": "price is required"
-                }, status=400)
-            
-            try:
-                new_price = float(new_price)
-                if new_price < 0:
-                    raise ValueError("Price cannot be negative")
-            except (ValueError, TypeError):
-                return JsonResponse({
-                    "error": "Invalid price format"
-                }, status=400)
-            
-            dish.price = new_price
-            dish.save()
-            
-            return JsonResponse({
-                "message": "Dish price updated successfully!",
-                "dish": {
-                    "id": dish.id,
-                    "name": dish.name,
-                    "price": float(dish.price),
-                    "category": dish.category,
-                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
-                }
-            })
-            
-        except Dish.DoesNotExist:
-            return JsonResponse({"error": "Dish not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-# ==========================================
-# UPDATE DISH IMAGE
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class UpdateDishImageView(View):
-    def patch(self, request, dish_id):
-        try:
-            dish = Dish.objects.get(id=dish_id)
-            image = request.FILES.get('image')
-            
-            if not image:
-                return JsonResponse({
-                    "error": "Image file is required"
-                }, status=400)
-            
-            # Delete old image if exists
-            if dish.image:
-                dish.image.delete(save=False)
-            
-            dish.image = image
-            dish.save()
-            
-            return JsonResponse({
-                "message": "Dish image updated successfully!",
-                "dish": {
-                    "id": dish.id,
-                    "name": dish.name,
-                    "price": float(dish.price),
-                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
-                }
-            })
-        
-        except Dish.DoesNotExist:
-            return JsonResponse({"error": "Dish not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-# ==========================================
-# CREATE ORDER - WITH EXTRAS SUPPORT
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class CreateOrderView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            items_data = data.get('items', [])
-            frontend_total = float(data.get('total_amount', 0))
-            order_type = data.get('order_type', 'dine-in')
-            payment_type = data.get('payment_type', 'cash')
-            addons = data.get('addons', [])
-            
-            # ✅ FIXED: Allow orders with ONLY addons/extras
-            if not items_data and not addons:
-                return JsonResponse({
-                    "error": "Order must contain at least one item or extra"
-                }, status=400)
-            
-            # Validate order_type
-            valid_order_types = [choice[0] for choice in Order.ORDER_TYPE_CHOICES]
-            if order_type not in valid_order_types:
-                return JsonResponse({
-                    "error": f"Invalid order_type. Must be one of: {', '.join(valid_order_types)}"
-                }, status=400)
-            
-            # Validate payment_type
-            valid_payment_types = [choice[0] for choice in Order.PAYMENT_TYPE_CHOICES]
-            if payment_type not in valid_payment_types:
-                return JsonResponse({
-                    "error": f"Invalid payment_type. Must be one of: {', '.join(valid_payment_types)}"
-                }, status=400)
-            
-            # Create order with transaction
-            with transaction.atomic():
-                order = Order.objects.create(
-                    total_amount=0,
-                    order_type=order_type,
-                    payment_type=payment_type,
-                    addons=addons  # This might not be needed if you're creating OrderItems for addons
-                )
-                
-                backend_total = Decimal('0.00')
-                
-                # Create order items from dishes (can be empty)
-                for item in items_data:
-                    dish_id = item.get('dish_id')
-                    quantity = int(item.get('quantity', 1))
-                    
-                    if quantity <= 0:
-                        raise ValueError(f"Invalid quantity for dish {dish_id}")
-                    
-                    dish = Dish.objects.get(id=dish_id)
-                    item_price = dish.price * quantity
-                    backend_total += item_price
-                    
-                    OrderItem.objects.create(
-                        order=order,
-                        dish=dish,
-                        quantity=quantity,
-                        price=item_price
-                    )
-                
-                # ✅ IMPROVED: Handle addons/extras (even if no main items)
-                for addon in addons:
-                    addon_id = addon.get('dish_id')
-                    addon_quantity = int(addon.get('quantity', 0))
-                    
-                    if addon_quantity > 0:
-                        addon_dish = Dish.objects.get(id=addon_id)
-                        # Verify it's actually an extra
-                        if addon_dish.category != 'extras':
-                            raise ValueError(f"Dish {addon_id} is not an extra item")
-                        addon_total = addon_dish.price * addon_quantity
-                        backend_total += addon_total
-                        
-                        # Create OrderItem for addon/extra
-                        OrderItem.objects.create(
-                            order=order,
-                            dish=addon_dish,
-                            quantity=addon_quantity,
-                            price=addon_total
-                        )
-                
-                # Verify total (even if only extras)
-                if abs(float(frontend_total) - float(backend_total)) > 0.01:
-                    raise ValueError(
-                        f"Total mismatch! Frontend sent ₹{frontend_total}, "
-                        f"backend calculated ₹{backend_total}"
-                    )
-                
-                order.total_amount = backend_total
-                order.save()
-            
-            # 🖨️ PRINT BILL AFTER ORDER CREATION
-            print_success = False
-            print_error_message = None
-            
-            try:
-                print_order_bill(order)
-                print_success = True
-                print(f"✅ Bill #{order.id} printed successfully")
-            except Exception as e:
-                print_error_message = str(e)
-                print(f"⚠️ Printing failed for Bill #{order.id}: {e}")
-                # Don't fail the order creation if printing fails
-            
-            # Build response
-            order_items = []
-            for item in order.items.all():
-                order_items.append({
-                    "dish_name": item.dish.name,
-                    "secondary_name": item.dish.secondary_name,
-                    "category": item.dish.get_category_display(),
-                    "quantity": item.quantity,
-                    "price": float(item.price),
-                    "is_extra": item.dish.category == 'extras'
-                })
-            
-            # Separate regular items and extras for response
-            regular_items = [item for item in order_items if not item['is_extra']]
-            extras_list = [item for item in order_items if item['is_extra']]
-            
-            order_data = {
-                "id": order.id,
-                "order_type": order.get_order_type_display(),
-                "payment_type": order.get_payment_type_display(),
-                "created_at": order.created_at.isoformat(),
-                "total_amount": float(order.total_amount),
-                "items": regular_items,
-                "extras": extras_list,
-                "print_status": {
-                    "success": print_success,
-                    "error": print_error_message
-                }
-            }
-            
-            response_message = "Order created successfully!"
-            if print_success:
-                response_message += " Bill printed."
-            elif print_error_message:
-                response_message += f" (Print failed: {print_error_message})"
-            
-            return JsonResponse({
-                "message": response_message,
-                "order": order_data
-            }, status=201)
-            
-        except Dish.DoesNotExist:
-            return JsonResponse({"error": "Invalid dish ID"}, status=400)
-        except ValueError as e:
-            return JsonResponse({"error": str(e)}, status=400)
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-        except Exception as e:
-            print(f"❌ Order creation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({"error": str(e)}, status=500)
-
-# ==========================================
-# ORDER HISTORY VIEW
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class OrderHistoryView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            start_time = data.get('start_time')
-            end_time = data.get('end_time')
-            
-            if not start_time or not end_time:
-                return JsonResponse({
-                    "error": "start_time and end_time are required"
-                }, status=400)
-            
-            # Parse datetime strings
-            try:
-                start_date = parse_datetime(start_time)
-                end_date = parse_datetime(end_time)
-                
-                if not start_date or not end_date:
-                    raise ValueError("Invalid datetime format")
-                
-                # Make timezone aware if needed
-                if timezone.is_naive(start_date):
-                    start_date = timezone.make_aware(start_date)
-                if timezone.is_naive(end_date):
-                    end_date = timezone.make_aware(end_date)
-                    
-            except Exception as e:
-                return JsonResponse({
-                    'error': f'Invalid datetime format: {str(e)}'
-                }, status=400)
-            
-            # Query orders in date range
-            orders = Order.objects.filter(
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).prefetch_related('items__dish').order_by('-created_at')
-            
-            # Build response
-            data = []
-            for order in orders:
-                order_items = []
-                for item in order.items.all():
-                    order_items.append({
-                        "dish_name": item.dish.name,
-                        "secondary_name": item.dish.secondary_name,
-                        "category": item.dish.get_category_display(),
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    })
-                
-                order_info = {
-                    "id": order.id,
-                    "order_type": order.get_order_type_display(),
-                    "payment_type": order.get_payment_type_display(),
-                    "created_at": order.created_at.isoformat(),
-                    "total_amount": float(order.total_amount),
-                    "items": order_items,
-                    "addons": order.addons or []
-                }
-                data.append(order_info)
-            
-            # Calculate summary
-            total_orders = orders.count()
-            total_revenue = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            
-            return JsonResponse({
-                "orders": data,
-                "summary": {
-                    "total_orders": total_orders,
-                    "total_revenue": float(total_revenue),
-                    "start_time": start_date.isoformat(),
-                    "end_time": end_date.isoformat()
-                }
-            }, safe=False)
-            
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-# ==========================================
-# GET ORDER DETAILS BY ID
-# ==========================================
-class OrderDetailView(View):
-    def get(self, request, order_id):
-        try:
-            order = Order.objects.prefetch_related('items__dish').get(id=order_id)
-            
-            order_items = []
-            for item in order.items.all():
-                order_items.append({
-                    "dish_id": item.dish.id,
-                    "dish_name": item.dish.name,
-                    "secondary_name": item.dish.secondary_name,
-                    "category": item.dish.get_category_display(),
-                    "quantity": item.quantity,
-                    "unit_price": float(item.dish.price),
-                    "subtotal": float(item.price)
-                })
-            
-            order_data = {
-                "id": order.id,
-                "order_type": order.get_order_type_display(),
-                "payment_type": order.get_payment_type_display(),
-                "created_at": order.created_at.isoformat(),
-                "total_amount": float(order.total_amount),
-                "items": order_items,
-                "addons": order.addons or []
-            }
-            
-            return JsonResponse(order_data)
-        
-        except Order.DoesNotExist:
-            return JsonResponse({"error": "Order not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-
-# ==========================================
-# DISH SALES IN PERIOD
-# ==========================================
-@csrf_exempt
-def dish_sales_in_period(request):
-    if request.method != 'POST':
-        return JsonResponse({'error': 'Only POST method allowed'}, status=405)
-
-    try:
-        body = json.loads(request.body)
-        start = body.get('start')
-        end = body.get('end')
-        dish_id = body.get('dish_id')
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON format'}, status=400)
-
-    if not start or not end:
-        return JsonResponse({'error': 'Missing required fields: start and end'}, status=400)
-
-    try:
-        start_date = parse_datetime(start)
-        end_date = parse_datetime(end)
-        if not start_date or not end_date:
-            raise ValueError
-    except Exception:
-        return JsonResponse({'error': 'Invalid datetime format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS)'}, status=400)
-
-    # ORM aggregation to count sold quantity
-    total_sales = (
-        OrderItem.objects
-        .filter(dish_id=dish_id, order__created_at__range=[start_date, end_date])
-        .aggregate(total_quantity=Sum('quantity'))['total_quantity']
-    ) or 0
-
-    return JsonResponse({
-        'dish_id': dish_id,
-        'start': start,
-        'end': end,
-        'total_quantity_sold': total_sales
-    })
-
-# expenditure
-
-def get_date_range(filter_type, start_date_str=None, end_date_str=None):
-    today = timezone.now().date()
-    if filter_type == 'today':
-        return today,  today 
-    elif filter_type == 'week':
-        start = today - timedelta(days=today.weekday())
-        end = start + timedelta(days=6)
-        return start, end
-    elif filter_type == 'month':
-        start = today.replace(day=1)
-        end = today
-        return start, end
-    elif start_date_str and end_date_str:
-        return parse_date(start_date_str), parse_date(end_date_str)
-    else:
-        return None, None
-
-# ==========================================
-# WORKER VIEWS
-# ==========================================
-class WorkerListView(View):
-    def get(self, request):
-        try:
-            workers = Worker.objects.filter(is_active=True).order_by('name')
-            
-            data = [{
-                'id': worker.id,
-                'name': worker.name,
-                'role': worker.role,
-                'role_display': worker.get_role_display(),
-                'contact': worker.contact,
-                'joined_date': worker.joined_date.isoformat() if worker.joined_date else None,
-            } for worker in workers]
-            
-            return JsonResponse(data, safe=False)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-@method_decorator(csrf_exempt, name='dispatch')
-class WorkerCreateView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            
-            worker = Worker.objects.create(
-                name=data.get('name'),
-                role=data.get('role', 'worker'),
-                contact=data.get('contact', '')
-            )
-            
-            return JsonResponse({
-                'success': True,
-                'worker': {
-                    'id': worker.id,
-                    'name': worker.name,
-                    'role': worker.role,
-                    'role_display': worker.get_role_display()
-                }
-            })
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-
-
-# ==========================================
-# MATERIAL VIEWS
-# ==========================================
-class MaterialListView(View):
-    def get(self, request):
-        try:
-            materials = Material.objects.filter(is_active=True).order_by('name')
-            
-            data = [{
-                'id': material.id,
-                'name': material.name,
-                'unit': material.unit,
-                'unit_display': material.get_unit_display(),
-                'description': material.description,
-            } for material in materials]
-            
-            return JsonResponse(data, safe=False)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-@method_decorator(csrf_exempt, name='dispatch')
-class MaterialCreateView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            
-            material = Material.objects.create(
-                name=data.get('name'),
-                unit=data.get('unit', 'piece'),
-                description=data.get('description', '')
-            )
-            
-            return JsonResponse({
-                'success': True,
-                'material': {
-                    'id': material.id,
-                    'name': material.name,
-                    'unit': material.unit,
-                    'unit_display': material.get_unit_display()
-                }
-            })
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-
-
-# ==========================================
-# EXPENSE VIEWS
-# ==========================================
-@method_decorator(csrf_exempt, name='dispatch')
-class ExpenseFilterView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            filter_type = data.get('filter_type', 'today')
-            expense_type = data.get('expense_type', 'all')  # 'all', 'worker', 'material'
-            
-            # Date filtering
-            today = datetime.now().date()
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'week':
-                start_date = today - timedelta(days=today.weekday())
-                end_date = today
-            elif filter_type == 'month':
-                start_date = today.replace(day=1)
-                end_date = today
-            elif filter_type == 'custom':
-                start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
-                end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
-            else:
-                start_date = today
-                end_date = today
-            
-            # Query expenses
-            expenses = Expense.objects.filter(
-                timestamp__date__gte=start_date,
-                timestamp__date__lte=end_date
-            )
-            
-            # Filter by expense type
-            if expense_type == 'worker':
-                expenses = expenses.filter(expense_type='worker')
-            elif expense_type == 'material':
-                expenses = expenses.filter(expense_type='material')
-            
-            expenses = expenses.select_related('worker').prefetch_related('items__material')
-            
-            # Build response
-            expenses_data = []
-            for expense in expenses:
-                expense_dict = {
-                    'id': expense.id,
-                    'expense_type': expense.expense_type,
-                    'expense_type_display': expense.get_expense_type_display(),
-                    'description': expense.description,
-                    'total_amount': str(expense.total_amount),
-                    'timestamp': expense.timestamp.isoformat(),
-                    'notes': expense.notes,
-                }
-                
-                if expense.expense_type == 'worker' and expense.worker:
-                    expense_dict.update({
-                        'worker': expense.worker.name,
-                        'worker_id': expense.worker.id,
-                        'worker_role': expense.worker.get_role_display(),
-                        'category': expense.worker_category,
-                        'category_display': expense.get_worker_category_display() if expense.worker_category else 'N/A',
-                    })
-                elif expense.expense_type == 'material':
-                    items = [{
-                        'material': item.material.name,
-                        'material_id': item.material.id,
-                        'quantity': str(item.quantity),
-                        'unit': item.material.get_unit_display(),
-                        'unit_price': str(item.unit_price),
-                        'subtotal': str(item.subtotal),
-                    } for item in expense.items.all()]
-                    expense_dict['items'] = items
-                
-                expenses_data.append(expense_dict)
-            
-            # Calculate summaries
-            total_amount = expenses.aggregate(total=Sum('total_amount'))['total'] or 0
-            
-            worker_total = expenses.filter(expense_type='worker').aggregate(
-                total=Sum('total_amount'))['total'] or 0
-            
-            material_total = expenses.filter(expense_type='material').aggregate(
-                total=Sum('total_amount'))['total'] or 0
-            
-            # Worker-wise summary
-            worker_summary = {}
-            for expense in expenses.filter(expense_type='worker'):
-                if expense.worker:
-                    worker_name = expense.worker.name
-                    if worker_name not in worker_summary:
-                        worker_summary[worker_name] = {
-                            'worker_id': expense.worker.id,
-                            'role': expense.worker.get_role_display(),
-                            'total': 0,
-                            'count': 0
-                        }
-                    worker_summary[worker_name]['total'] += float(expense.total_amount)
-                    worker_summary[worker_name]['count'] += 1
-            
-            # Material-wise summary
-            material_summary = {}
-            for expense in expenses.filter(expense_type='material'):
-                for item in expense.items.all():
-                    material_name = item.material.name
-                    if material_name not in material_summary:
-                        material_summary[material_name] = {
-                            'material_id': item.material.id,
-                            'unit': item.material.get_unit_display(),
-                            'total_quantity': 0,
-                            'total_amount': 0,
-                            'count': 0
-                        }
-                    material_summary[material_name]['total_quantity'] += float(item.quantity)
-                    material_summary[material_name]['total_amount'] += float(item.subtotal)
-                    material_summary[material_name]['count'] += 1
-            
-            return JsonResponse({
-                'expenses': expenses_data,
-                'summary': {
-                    'total_amount': str(total_amount),
-                    'worker_total': str(worker_total),
-                    'material_total': str(material_total),
-                    'total_count': len(expenses_data),
-                    'worker_count': len([e for e in expenses_data if e['expense_type'] == 'worker']),
-                    'material_count': len([e for e in expenses_data if e['expense_type'] == 'material']),
-                },
-                'worker_summary': worker_summary,
-                'material_summary': material_summary,
-                'date_range': {
-                    'start_date': start_date.isoformat(),
-                    'end_date': end_date.isoformat(),
-                    'filter_type': filter_type
-                }
-            })
-        
-        except Exception as e:
-            import traceback
-            print("Error in ExpenseFilterView:")
-            print(traceback.format_exc())
-            return JsonResponse({"error": str(e)}, status=500)
-
-
-@method_decorator(csrf_exempt, name='dispatch')
-class AddWorkerExpenseView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            
-            worker_id = data.get('worker_id')
-            category = data.get('category', 'wage')
-            description = data.get('description', '')
-            amount = data.get('amount')
-            
-            if not worker_id or not amount:
-                return JsonResponse({"error": "Worker and amount are required"}, status=400)
-            
-            worker = Worker.objects.get(id=worker_id)
-            
-            expense = Expense.objects.create(
-                expense_type='worker',
-                worker=worker,
-                worker_category=category,
-                description=description or f"{category.title()} - {worker.name}",
-                total_amount=amount
-            )
-            
-            return JsonResponse({
-                'success': True,
-                'expense': {
-                    'id': expense.id,
-                    'worker': worker.name,
-                    'category': expense.get_worker_category_display(),
-                    'amount': str(expense.total_amount)
-                }
-            })
-        
-        except Worker.DoesNotExist:
-            return JsonResponse({"error": "Worker not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-
-
-@method_decorator(csrf_exempt, name='dispatch')
-class AddMaterialExpenseView(View):
-    def post(self, request):
-        try:
-            data = json.loads(request.body)
-            
-            description = data.get('description', 'Material Purchase')
-            items_data = data.get('items', [])
-            
-            if not items_data:
-                return JsonResponse({"error": "At least one material item is required"}, status=400)
-            
-            with transaction.atomic():
-                # Create expense
-                expense = Expense.objects.create(
-                    expense_type='material',
-                    description=description,
-                    total_amount=0  # Will be calculated from items
-                )
-                
-                # Create expense items
-                for item_data in items_data:
-                    material = Material.objects.get(id=item_data['material_id'])
-                    
-                    ExpenseItem.objects.create(
-                        expense=expense,
-                        material=material,
-                        quantity=item_data['quantity'],
-                        unit_price=item_data['unit_price']
-                    )
-                
-                # Recalculate total
-                expense.save()
-                
-                return JsonResponse({
-                    'success': True,
-                    'expense': {
-                        'id': expense.id,
-                        'description': expense.description,
-                        'total_amount': str(expense.total_amount),
-                        'items_count': len(items_data)
-                    }
-                })
-        
-        except Material.DoesNotExist:
-            return JsonResponse({"error": "Material not found"}, status=404)
-        except Exception as e:
-            import traceback
-            print("Error in AddMaterialExpenseView:")
-            print(traceback.format_exc())
-            return JsonResponse({"error": str(e)}, status=400)
-        
-# delete api for the expense and material , worker
-
-@method_decorator(csrf_exempt, name='dispatch')
-class WorkerDeleteView(View):
-    def delete(self, request, worker_id):
-        try:
-            worker = Worker.objects.get(id=worker_id, is_active=True)
-            
-            # Soft delete - set is_active to False
-            worker.is_active = False
-            worker.save()
-            
-            return JsonResponse({
-                'success': True,
-                'message': f'Worker {worker.name} deleted successfully'
-            })
-        
-        except Worker.DoesNotExist:
-            return JsonResponse({"error": "Worker not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-
-@method_decorator(csrf_exempt, name='dispatch')
-class MaterialDeleteView(View):
-    def delete(self, request, material_id):
-        try:
-            material = Material.objects.get(id=material_id, is_active=True)
-            
-            # Check if material is used in any expense items
-            expense_items_count = ExpenseItem.objects.filter(material=material).count()
-            
-            if expense_items_count > 0:
-                # Soft delete if material is referenced
-                material.is_active = False
-                material.save()
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Material {material.name} marked as inactive (used in {expense_items_count} expense items)'
-                })
-            else:
-                # Hard delete if not referenced
-                material_name = material.name
-                material.delete()
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Material {material_name} deleted successfully'
-                })
-        
-        except Material.DoesNotExist:
-            return JsonResponse({"error": "Material not found"}, status=404)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-
-@method_decorator(csrf_exempt, name='dispatch')
-class ExpenseDeleteView(View):
-    def delete(self, request, expense_id):
-        try:
-            expense = Expense.objects.get(id=expense_id)
-            
-            with transaction.atomic():
-                # Delete related expense items first (if material expense)
-                if expense.expense_type == 'material':
-                    expense.items.all().delete()
-                
-                # Delete the expense
-                expense_type = expense.get_expense_type_display()
-                expense_desc = expense.description
-                expense.delete()
-                
-                return JsonResponse({
-                    'success': True,
-                    'message': f'{expense_type} expense "{expense_desc}" deleted successfully'
-                })
-        
-        except Expense.DoesNotExist:
-            return JsonResponse({"error": "Expense not found"}, status=404)
-        except Exception as e:
-            import traceback
-            print("Error in ExpenseDeleteView:")
-            print(traceback.format_exc())
-            return JsonResponse({"error": str(e)}, status=400)
-
-
-# ==========================================
-# COMPLETE ANALYTICS DASHBOARD VIEW
-# ==========================================
-class AnalyticsDashboardView(APIView):
-    """
-    Complete analytics dashboard with shift-wise analysis
-    Afternoon: 10:00 AM - 4:00 PM
-    Night: 4:00 PM - 4:00 AM (next day)
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            # Get date parameters
-            date_str = request.GET.get('date')
-            filter_type = request.GET.get('filter', 'today')
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            # Determine target date
-            if filter_type == 'today' or not date_str:
-                target_date = timezone.now().astimezone(tz).date()
-            elif filter_type == 'yesterday':
-                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
-            else:
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # Shift times
-            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
-            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
-            
-            # Convert to UTC for queries
-            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-            night_start_utc = night_start.astimezone(pytz.UTC)
-            night_end_utc = night_end.astimezone(pytz.UTC)
-            
-            # Previous night closing for opening balance
-            previous_date = target_date - timedelta(days=1)
-            previous_night_start = tz.localize(datetime.combine(previous_date, time(16, 0)))
-            previous_night_end = tz.localize(datetime.combine(target_date, time(4, 0)))
-            previous_night_start_utc = previous_night_start.astimezone(pytz.UTC)
-            previous_night_end_utc = previous_night_end.astimezone(pytz.UTC)
-            
-            previous_revenue = Order.objects.filter(
-                created_at__gte=previous_night_start_utc,
-                created_at__lt=previous_night_end_utc
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            previous_expenses = Expense.objects.filter(
-                timestamp__gte=previous_night_start_utc,
-                timestamp__lt=previous_night_end_utc
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            opening_balance = previous_revenue - previous_expenses
-            
-            # AFTERNOON SHIFT
-            afternoon_orders = Order.objects.filter(
-                created_at__gte=afternoon_start_utc,
-                created_at__lt=afternoon_end_utc
-            )
-            
-            afternoon_revenue = afternoon_orders.aggregate(
-                total=Coalesce(Sum('total_amount'), Decimal('0.00'))
-            )['total']
-            afternoon_order_count = afternoon_orders.count()
-            
-            afternoon_expenses = Expense.objects.filter(
-                timestamp__gte=afternoon_start_utc,
-                timestamp__lt=afternoon_end_utc
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            afternoon_profit = afternoon_revenue - afternoon_expenses
-            afternoon_closing = opening_balance + afternoon_profit
-            
-            # Afternoon top dishes
-            afternoon_top_dishes = OrderItem.objects.filter(
-                order__created_at__gte=afternoon_start_utc,
-                order__created_at__lt=afternoon_end_utc
-            ).values(
-                'dish__id',
-                'dish__name',
-                'dish__secondary_name',
-                'dish__category',
-                'dish__meal_type',
-                'dish__price'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-                order_count=Count('order', distinct=True)
-            ).order_by('-total_quantity')[:10]
-            
-            # NIGHT SHIFT
-            night_orders = Order.objects.filter(
-                created_at__gte=night_start_utc,
-                created_at__lt=night_end_utc
-            )
-            
-            night_revenue = night_orders.aggregate(
-                total=Coalesce(Sum('total_amount'), Decimal('0.00'))
-            )['total']
-            night_order_count = night_orders.count()
-            
-            night_expenses = Expense.objects.filter(
-                timestamp__gte=night_start_utc,
-                timestamp__lt=night_end_utc
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            night_profit = night_revenue - night_expenses
-            night_opening = afternoon_closing
-            night_closing = night_opening + night_profit
-            
-            # Night top dishes
-            night_top_dishes = OrderItem.objects.filter(
-                order__created_at__gte=night_start_utc,
-                order__created_at__lt=night_end_utc
-            ).values(
-                'dish__id',
-                'dish__name',
-                'dish__secondary_name',
-                'dish__category',
-                'dish__meal_type',
-                'dish__price'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-                order_count=Count('order', distinct=True)
-            ).order_by('-total_quantity')[:10]
-            
-            # OVERALL
-            total_revenue = afternoon_revenue + night_revenue
-            total_expenses = afternoon_expenses + night_expenses
-            total_profit = total_revenue - total_expenses
-            total_orders = afternoon_order_count + night_order_count
-            
-            # Overall top dishes
-            overall_top_dishes = OrderItem.objects.filter(
-                Q(order__created_at__gte=afternoon_start_utc, order__created_at__lt=afternoon_end_utc) |
-                Q(order__created_at__gte=night_start_utc, order__created_at__lt=night_end_utc)
-            ).values(
-                'dish__id',
-                'dish__name',
-                'dish__secondary_name',
-                'dish__category',
-                'dish__meal_type',
-                'dish__price'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-                order_count=Count('order', distinct=True)
-            ).order_by('-total_quantity')[:10]
-            
-            # Expense breakdown
-            afternoon_expense_breakdown = Expense.objects.filter(
-                timestamp__gte=afternoon_start_utc,
-                timestamp__lt=afternoon_end_utc
-            ).values('expense_type').annotate(total=Sum('total_amount'))
-            
-            night_expense_breakdown = Expense.objects.filter(
-                timestamp__gte=night_start_utc,
-                timestamp__lt=night_end_utc
-            ).values('expense_type').annotate(total=Sum('total_amount'))
-            
-            # Payment breakdown
-            afternoon_payment_breakdown = afternoon_orders.values('payment_type').annotate(
-                count=Count('id'),
-                total=Sum('total_amount')
-            )
-            
-            night_payment_breakdown = night_orders.values('payment_type').annotate(
-                count=Count('id'),
-                total=Sum('total_amount')
-            )
-            
-            # Order type breakdown
-            afternoon_order_type = afternoon_orders.values('order_type').annotate(
-                count=Count('id'),
-                total=Sum('total_amount')
-            )
-            
-            night_order_type = night_orders.values('order_type').annotate(
-                count=Count('id'),
-                total=Sum('total_amount')
-            )
-            
-            # Average order value
-            afternoon_avg_order = afternoon_revenue / afternoon_order_count if afternoon_order_count > 0 else Decimal('0.00')
-            night_avg_order = night_revenue / night_order_count if night_order_count > 0 else Decimal('0.00')
-            
-            return Response({
-                'date': target_date.isoformat(),
-                'filter_type': filter_type,
-                'opening_balance': str(opening_balance),
-                
-                'afternoon_shift': {
-                    'name': 'Afternoon Shift',
-                    'start_time': afternoon_start.strftime('%I:%M %p'),
-                    'end_time': afternoon_end.strftime('%I:%M %p'),
-                    'opening_balance': str(opening_balance),
-                    'revenue': str(afternoon_revenue),
-                    'expenses': str(afternoon_expenses),
-                    'profit': str(afternoon_profit),
-                    'closing_balance': str(afternoon_closing),
-                    'order_count': afternoon_order_count,
-                    'avg_order_value': str(afternoon_avg_order),
-                    'top_dishes': [
-                        {
-                            'dish_id': dish['dish__id'],
-                            'name': dish['dish__name'],
-                            'secondary_name': dish['dish__secondary_name'],
-                            'category': dish['dish__category'],
-                            'meal_type': dish['dish__meal_type'],
-                            'price': str(dish['dish__price']),
-                            'quantity_sold': dish['total_quantity'],
-                            'total_revenue': str(dish['total_revenue']),
-                            'order_count': dish['order_count']
-                        }
-                        for dish in afternoon_top_dishes
-                    ],
-                    'expense_breakdown': {
-                        item['expense_type']: str(item['total'])
-                        for item in afternoon_expense_breakdown
-                    },
-                    'payment_breakdown': [
-                        {
-                            'payment_type': item['payment_type'],
-                            'count': item['count'],
-                            'total': str(item['total'])
-                        }
-                        for item in afternoon_payment_breakdown
-                    ],
-                    'order_type_breakdown': [
-                        {
-                            'order_type': item['order_type'],
-                            'count': item['count'],
-                            'total': str(item['total'])
-                        }
-                        for item in afternoon_order_type
-                    ]
-                },
-                
-                'night_shift': {
-                    'name': 'Night Shift',
-                    'start_time': night_start.strftime('%I:%M %p'),
-                    'end_time': night_end.strftime('%I:%M %p'),
-                    'opening_balance': str(night_opening),
-                    'revenue': str(night_revenue),
-                    'expenses': str(night_expenses),
-                    'profit': str(night_profit),
-                    'closing_balance': str(night_closing),
-                    'order_count': night_order_count,
-                    'avg_order_value': str(night_avg_order),
-                    'top_dishes': [
-                        {
-                            'dish_id': dish['dish__id'],
-                            'name': dish['dish__name'],
-                            'secondary_name': dish['dish__secondary_name'],
-                            'category': dish['dish__category'],
-                            'meal_type': dish['dish__meal_type'],
-                            'price': str(dish['dish__price']),
-                            'quantity_sold': dish['total_quantity'],
-                            'total_revenue': str(dish['total_revenue']),
-                            'order_count': dish['order_count']
-                        }
-                        for dish in night_top_dishes
-                    ],
-                    'expense_breakdown': {
-                        item['expense_type']: str(item['total'])
-                        for item in night_expense_breakdown
-                    },
-                    'payment_breakdown': [
-                        {
-                            'payment_type': item['payment_type'],
-                            'count': item['count'],
-                            'total': str(item['total'])
-                        }
-                        for item in night_payment_breakdown
-                    ],
-                    'order_type_breakdown': [
-                        {
-                            'order_type': item['order_type'],
-                            'count': item['count'],
-                            'total': str(item['total'])
-                        }
-                        for item in night_order_type
-                    ]
-                },
-                
-                'overall': {
-                    'total_revenue': str(total_revenue),
-                    'total_expenses': str(total_expenses),
-                    'total_profit': str(total_profit),
-                    'total_orders': total_orders,
-                    'final_closing_balance': str(night_closing),
-                    'avg_order_value': str(total_revenue / total_orders) if total_orders > 0 else '0.00',
-                    'top_dishes': [
-                        {
-                            'dish_id': dish['dish__id'],
-                            'name': dish['dish__name'],
-                            'secondary_name': dish['dish__secondary_name'],
-                            'category': dish['dish__category'],
-                            'meal_type': dish['dish__meal_type'],
-                            'price': str(dish['dish__price']),
-                            'quantity_sold': dish['total_quantity'],
-                            'total_revenue': str(dish['total_revenue']),
-                            'order_count': dish['order_count']
-                        }
-                        for dish in overall_top_dishes
-                    ]
-                }
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in AnalyticsDashboardView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# CATEGORY PERFORMANCE VIEW
-# ==========================================
-class CategoryPerformanceView(APIView):
-    """
-    Analyze sales performance by dish category
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            date_str = request.GET.get('date')
-            filter_type = request.GET.get('filter', 'today')
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            if filter_type == 'today' or not date_str:
-                target_date = timezone.now().astimezone(tz).date()
-            elif filter_type == 'yesterday':
-                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
-            else:
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # Afternoon: 10 AM - 4 PM
-            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
-            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
-            
-            # Night: 4 PM - 4 AM next day
-            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
-            
-            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-            night_start_utc = night_start.astimezone(pytz.UTC)
-            night_end_utc = night_end.astimezone(pytz.UTC)
-            
-            # Category-wise performance for full day
-            category_stats = OrderItem.objects.filter(
-                Q(order__created_at__gte=afternoon_start_utc, order__created_at__lt=afternoon_end_utc) |
-                Q(order__created_at__gte=night_start_utc, order__created_at__lt=night_end_utc)
-            ).values(
-                'dish__category'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-                order_count=Count('order', distinct=True),
-                dish_count=Count('dish', distinct=True)
-            ).order_by('-total_revenue')
-            
-            # Calculate percentages
-            total_revenue = sum(Decimal(str(cat['total_revenue'])) for cat in category_stats)
-            
-            results = []
-            for cat in category_stats:
-                revenue = Decimal(str(cat['total_revenue']))
-                percentage = (revenue / total_revenue * 100) if total_revenue > 0 else Decimal('0')
-                
-                results.append({
-                    'category': cat['dish__category'],
-                    'category_display': dict(Dish.CATEGORY_CHOICES).get(cat['dish__category'], cat['dish__category']),
-                    'total_quantity': cat['total_quantity'],
-                    'total_revenue': str(revenue),
-                    'revenue_percentage': str(round(percentage, 2)),
-                    'order_count': cat['order_count'],
-                    'unique_dishes_sold': cat['dish_count']
-                })
-            
-            return Response({
-                'date': target_date.isoformat(),
-                'categories': results,
-                'total_revenue': str(total_revenue)
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in CategoryPerformanceView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# HOURLY TRENDS VIEW
-# ==========================================
-class HourlyTrendsView(APIView):
-    """
-    Hour-by-hour sales analysis for afternoon and night shifts
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            date_str = request.GET.get('date')
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            target_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else timezone.now().astimezone(tz).date()
-            
-            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
-            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
-            
-            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-            night_start_utc = night_start.astimezone(pytz.UTC)
-            night_end_utc = night_end.astimezone(pytz.UTC)
-            
-            # Hourly breakdown
-            hourly_data = Order.objects.filter(
-                Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
-                Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
-            ).annotate(
-                hour=TruncHour('created_at')
-            ).values('hour').annotate(
-                order_count=Count('id'),
-                total_revenue=Sum('total_amount')
-            ).order_by('hour')
-            
-            results = []
-            for item in hourly_data:
-                hour_time = item['hour'].astimezone(tz)
-                results.append({
-                    'hour': hour_time.strftime('%I:00 %p'),
-                    'hour_24': hour_time.hour,
-                    'order_count': item['order_count'],
-                    'revenue': str(item['total_revenue'])
-                })
-            
-            return Response({
-                'date': target_date.isoformat(),
-                'hourly_data': results
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in HourlyTrendsView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# COMPARISON VIEW
-# ==========================================
-class ComparisonView(APIView):
-    """
-    Compare today vs yesterday
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            today = timezone.now().astimezone(tz).date()
-            yesterday = today - timedelta(days=1)
-            
-            # Today shifts
-            today_afternoon_start = tz.localize(datetime.combine(today, time(10, 0)))
-            today_afternoon_end = tz.localize(datetime.combine(today, time(16, 0)))
-            today_night_start = tz.localize(datetime.combine(today, time(16, 0)))
-            today_night_end = tz.localize(datetime.combine(today + timedelta(days=1), time(4, 0)))
-            
-            # Yesterday shifts
-            yesterday_afternoon_start = tz.localize(datetime.combine(yesterday, time(10, 0)))
-            yesterday_afternoon_end = tz.localize(datetime.combine(yesterday, time(16, 0)))
-            yesterday_night_start = tz.localize(datetime.combine(yesterday, time(16, 0)))
-            yesterday_night_end = tz.localize(datetime.combine(yesterday + timedelta(days=1), time(4, 0)))
-            
-            # Convert to UTC
-            today_afternoon_start_utc = today_afternoon_start.astimezone(pytz.UTC)
-            today_afternoon_end_utc = today_afternoon_end.astimezone(pytz.UTC)
-            today_night_start_utc = today_night_start.astimezone(pytz.UTC)
-            today_night_end_utc = today_night_end.astimezone(pytz.UTC)
-            
-            yesterday_afternoon_start_utc = yesterday_afternoon_start.astimezone(pytz.UTC)
-            yesterday_afternoon_end_utc = yesterday_afternoon_end.astimezone(pytz.UTC)
-            yesterday_night_start_utc = yesterday_night_start.astimezone(pytz.UTC)
-            yesterday_night_end_utc = yesterday_night_end.astimezone(pytz.UTC)
-            
-            # Today data
-            today_revenue = Order.objects.filter(
-                Q(created_at__gte=today_afternoon_start_utc, created_at__lt=today_afternoon_end_utc) |
-                Q(created_at__gte=today_night_start_utc, created_at__lt=today_night_end_utc)
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            today_orders = Order.objects.filter(
-                Q(created_at__gte=today_afternoon_start_utc, created_at__lt=today_afternoon_end_utc) |
-                Q(created_at__gte=today_night_start_utc, created_at__lt=today_night_end_utc)
-            ).count()
-            
-            # Yesterday data
-            yesterday_revenue = Order.objects.filter(
-                Q(created_at__gte=yesterday_afternoon_start_utc, created_at__lt=yesterday_afternoon_end_utc) |
-                Q(created_at__gte=yesterday_night_start_utc, created_at__lt=yesterday_night_end_utc)
-            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-            
-            yesterday_orders = Order.objects.filter(
-                Q(created_at__gte=yesterday_afternoon_start_utc, created_at__lt=yesterday_afternoon_end_utc) |
-                Q(created_at__gte=yesterday_night_start_utc, created_at__lt=yesterday_night_end_utc)
-            ).count()
-            
-            revenue_change = ((today_revenue - yesterday_revenue) / yesterday_revenue * 100) if yesterday_revenue > 0 else Decimal('0')
-            orders_change = ((today_orders - yesterday_orders) / yesterday_orders * 100) if yesterday_orders > 0 else 0
-            
-            return Response({
-                'comparison_type': 'day',
-                'current': {
-                    'date': today.isoformat(),
-                    'revenue': str(today_revenue),
-                    'orders': today_orders
-                },
-                'previous': {
-                    'date': yesterday.isoformat(),
-                    'revenue': str(yesterday_revenue),
-                    'orders': yesterday_orders
-                },
-                'change': {
-                    'revenue_percentage': str(round(revenue_change, 2)),
-                    'orders_percentage': str(round(orders_change, 2)),
-                    'revenue_difference': str(today_revenue - yesterday_revenue),
-                    'orders_difference': today_orders - yesterday_orders
-                }
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in ComparisonView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# LOW PERFORMING DISHES VIEW
-# ==========================================
-class LowPerformingDishesView(APIView):
-    """
-    Identify dishes with low sales
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            days = int(request.GET.get('days', 7))
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            end_date = timezone.now().astimezone(tz)
-            start_date = end_date - timedelta(days=days)
-            
-            start_date_utc = start_date.astimezone(pytz.UTC)
-            end_date_utc = end_date.astimezone(pytz.UTC)
-            
-            # Get dishes with low sales
-            dishes_with_sales = OrderItem.objects.filter(
-                order__created_at__gte=start_date_utc,
-                order__created_at__lt=end_date_utc
-            ).values(
-                'dish__id',
-                'dish__name',
-                'dish__secondary_name',
-                'dish__category',
-                'dish__price'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField())
-            ).order_by('total_quantity')[:10]
-            
-            # Dishes with zero sales
-            sold_dish_ids = OrderItem.objects.filter(
-                order__created_at__gte=start_date_utc,
-                order__created_at__lt=end_date_utc
-            ).values_list('dish__id', flat=True).distinct()
-            
-            zero_sales_dishes = Dish.objects.filter(
-                is_active=True
-            ).exclude(
-                id__in=sold_dish_ids
-            ).values(
-                'id',
-                'name',
-                'secondary_name',
-                'category',
-                'price'
-            )[:10]
-            
-            return Response({
-                'period_days': days,
-                'start_date': start_date.date().isoformat(),
-                'end_date': end_date.date().isoformat(),
-                'low_sales_dishes': [
-                    {
-                        'dish_id': dish['dish__id'],
-                        'name': dish['dish__name'],
-                        'secondary_name': dish['dish__secondary_name'],
-                        'category': dish['dish__category'],
-                        'price': str(dish['dish__price']),
-                        'quantity_sold': dish['total_quantity'],
-                        'total_revenue': str(dish['total_revenue'])
-                    }
-                    for dish in dishes_with_sales
-                ],
-                'zero_sales_dishes': [
-                    {
-                        'dish_id': dish['id'],
-                        'name': dish['name'],
-                        'secondary_name': dish['secondary_name'],
-                        'category': dish['category'],
-                        'price': str(dish['price'])
-                    }
-                    for dish in zero_sales_dishes
-                ]
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in LowPerformingDishesView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# WORKER EXPENSE BREAKDOWN VIEW
-# ==========================================
-class WorkerExpenseBreakdownView(APIView):
-    """
-    Detailed worker expense analysis
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            date_str = request.GET.get('date')
-            filter_type = request.GET.get('filter', 'today')
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            if filter_type == 'today' or not date_str:
-                target_date = timezone.now().astimezone(tz).date()
-            elif filter_type == 'yesterday':
-                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
-            else:
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
-            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
-            
-            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-            night_start_utc = night_start.astimezone(pytz.UTC)
-            night_end_utc = night_end.astimezone(pytz.UTC)
-            
-            # Worker-wise expenses
-            worker_expenses = Expense.objects.filter(
-                expense_type='worker'
-            ).filter(
-                Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
-                Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
-            ).values(
-                'worker__id',
-                'worker__name',
-                'worker__role',
-                'worker_category'
-            ).annotate(
-                total_amount=Sum('total_amount'),
-                transaction_count=Count('id')
-            ).order_by('-total_amount')
-            
-            # Category-wise breakdown
-            category_breakdown = Expense.objects.filter(
-                expense_type='worker'
-            ).filter(
-                Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
-                Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
-            ).values('worker_category').annotate(
-                total=Sum('total_amount'),
-                count=Count('id')
-            ).order_by('-total')
-            
-            total_worker_expense = sum(item['total_amount'] for item in worker_expenses)
-            
-            return Response({
-                'date': target_date.isoformat(),
-                'total_worker_expense': str(total_worker_expense),
-                'worker_breakdown': [
-                    {
-                        'worker_id': item['worker__id'],
-                        'worker_name': item['worker__name'],
-                        'worker_role': item['worker__role'],
-                        'category': item['worker_category'],
-                        'total_amount': str(item['total_amount']),
-                        'transaction_count': item['transaction_count']
-                    }
-                    for item in worker_expenses
-                ],
-                'category_breakdown': [
-                    {
-                        'category': item['worker_category'],
-                        'total': str(item['total']),
-                        'count': item['count']
-                    }
-                    for item in category_breakdown
-                ]
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in WorkerExpenseBreakdownView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# MATERIAL EXPENSE BREAKDOWN VIEW
-# ==========================================
-class MaterialExpenseBreakdownView(APIView):
-    """
-    Detailed material expense analysis
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            date_str = request.GET.get('date')
-            filter_type = request.GET.get('filter', 'today')
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            if filter_type == 'today' or not date_str:
-                target_date = timezone.now().astimezone(tz).date()
-            elif filter_type == 'yesterday':
-                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
-            else:
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
-            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
-            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
-            
-            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-            night_start_utc = night_start.astimezone(pytz.UTC)
-            night_end_utc = night_end.astimezone(pytz.UTC)
-            
-            # Material-wise expenses
-            material_expenses = ExpenseItem.objects.filter(
-                expense__expense_type='material'
-            ).filter(
-                Q(expense__timestamp__gte=afternoon_start_utc, expense__timestamp__lt=afternoon_end_utc) |
-                Q(expense__timestamp__gte=night_start_utc, expense__timestamp__lt=night_end_utc)
-            ).values(
-                'material__id',
-                'material__name',
-                'material__unit'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_amount=Sum('subtotal'),
-                purchase_count=Count('expense', distinct=True),
-                avg_unit_price=Avg('unit_price')
-            ).order_by('-total_amount')
-            
-            total_material_expense = sum(item['total_amount'] for item in material_expenses)
-            
-            return Response({
-                'date': target_date.isoformat(),
-                'total_material_expense': str(total_material_expense),
-                'material_breakdown': [
-                    {
-                        'material_id': item['material__id'],
-                        'material_name': item['material__name'],
-                        'unit': item['material__unit'],
-                        'total_quantity': str(item['total_quantity']),
-                        'total_amount': str(item['total_amount']),
-                        'purchase_count': item['purchase_count'],
-                        'avg_unit_price': str(item['avg_unit_price'])
-                    }
-                    for item in material_expenses
-                ]
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in MaterialExpenseBreakdownView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-# ==========================================
-# WEEKLY SUMMARY VIEW
-# ==========================================
-class WeeklySummaryView(APIView):
-    """
-    7-day summary report
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
-            
-            try:
-                tz = pytz.timezone(tz_str)
-            except:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            end_date = timezone.now().astimezone(tz).date()
-            start_date = end_date - timedelta(days=6)
-            
-            daily_summary = []
-            total_revenue = Decimal('0.00')
-            total_expenses = Decimal('0.00')
-            total_orders = 0
-            
-            current_date = start_date
-            while current_date <= end_date:
-                afternoon_start = tz.localize(datetime.combine(current_date, time(10, 0)))
-                afternoon_end = tz.localize(datetime.combine(current_date, time(16, 0)))
-                night_start = tz.localize(datetime.combine(current_date, time(16, 0)))
-                night_end = tz.localize(datetime.combine(current_date + timedelta(days=1), time(4, 0)))
-                
-                afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
-                afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
-                night_start_utc = night_start.astimezone(pytz.UTC)
-                night_end_utc = night_end.astimezone(pytz.UTC)
-                
-                day_revenue = Order.objects.filter(
-                    Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
-                    Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
-                ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-                
-                day_expenses = Expense.objects.filter(
-                    Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
-                    Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
-                ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
-                
-                day_orders = Order.objects.filter(
-                    Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
-                    Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
-                ).count()
-                
-                daily_summary.append({
-                    'date': current_date.isoformat(),
-                    'day_name': current_date.strftime('%A'),
-                    'revenue': str(day_revenue),
-                    'expenses': str(day_expenses),
-                    'profit': str(day_revenue - day_expenses),
-                    'orders': day_orders
-                })
-                
-                total_revenue += day_revenue
-                total_expenses += day_expenses
-                total_orders += day_orders
-                
-                current_date += timedelta(days=1)
-            
-            # Best day
-            best_day = max(daily_summary, key=lambda x: Decimal(x['revenue'])) if daily_summary else None
-            
-            return Response({
-                'period': f"{start_date.isoformat()} to {end_date.isoformat()}",
-                'summary': {
-                    'total_revenue': str(total_revenue),
-                    'total_expenses': str(total_expenses),
-                    'total_profit': str(total_revenue - total_expenses),
-                    'total_orders': total_orders,
-                    'avg_daily_revenue': str(total_revenue / 7),
-                    'avg_daily_orders': round(total_orders / 7, 2)
-                },
-                'daily_breakdown': daily_summary,
-                'best_day': best_day
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print("Error in WeeklySummaryView:")
-            print(traceback.format_exc())
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-## report ====================
-
-
-class ShiftReportView(APIView):
-    """
-    API View to get shift-wise income and expense report with CATEGORY BREAKDOWN
-    Only Afternoon and Night shifts
-    """
-    
-    def get(self, request):
-        try:
-            # Get query parameters
-            date_str = request.query_params.get('date', None)
-            shift_filter = request.query_params.get('shift', 'all')
-            tz_str = request.query_params.get('timezone', 'Asia/Kolkata')
-            
-            # Validate and set timezone
-            try:
-                tz = pytz.timezone(tz_str)
-            except pytz.exceptions.UnknownTimeZoneError:
-                tz = pytz.timezone('Asia/Kolkata')
-            
-            # Parse date
-            if date_str:
-                try:
-                    target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    return Response(
-                        {'error': 'Invalid date format. Use YYYY-MM-DD'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            else:
-                target_date = timezone.now().astimezone(tz).date()
-            
-            # Validate shift filter
-            valid_shifts = ['afternoon', 'night', 'all']
-            if shift_filter not in valid_shifts:
-                return Response(
-                    {'error': f'Invalid shift type. Choose from: {", ".join(valid_shifts)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Generate shifts data
-            if shift_filter == 'all':
-                shifts_to_process = ['afternoon', 'night']
-            else:
-                shifts_to_process = [shift_filter]
-            
-            shifts_data = []
-            for shift in shifts_to_process:
-                shift_data = self._calculate_shift_report(target_date, shift, tz)
-                shifts_data.append(shift_data)
-            
-            # Calculate daily totals
-            daily_total_income = sum(Decimal(shift['total_income']) for shift in shifts_data)
-            daily_total_expense = sum(Decimal(shift['total_expense']) for shift in shifts_data)
-            daily_total_labour = sum(Decimal(shift['worker_expense']) for shift in shifts_data)
-            daily_total_material = sum(Decimal(shift['material_expense']) for shift in shifts_data)
-            daily_profit = daily_total_income - daily_total_expense
-            
-            response_data = {
-                'date': target_date.strftime('%Y-%m-%d'),
-                'shifts': shifts_data,
-                'daily_total_income': str(daily_total_income),
-                'daily_total_labour': str(daily_total_labour),
-                'daily_total_material': str(daily_total_material),
-                'daily_total_expense': str(daily_total_expense),
-                'daily_profit': str(daily_profit)
-            }
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            print("=" * 80)
-            print("ERROR in ShiftReportView:")
-            print(traceback.format_exc())
-            print("=" * 80)
-            return Response(
-                {'error': f'Internal server error: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    def _get_shift_times(self, target_date, shift_type, tz):
-        """Calculate shift start/end times"""
-        try:
-            if shift_type == 'afternoon':
-                shift_start = tz.localize(datetime.combine(target_date, time(10, 0, 0)))
-                shift_end = tz.localize(datetime.combine(target_date, time(16, 0, 0)))
-            elif shift_type == 'night':
-                shift_start = tz.localize(datetime.combine(target_date, time(16, 0, 0)))
-                next_day = target_date + timedelta(days=1)
-                shift_end = tz.localize(datetime.combine(next_day, time(4, 0, 0)))
-            else:
-                raise ValueError(f"Invalid shift type: {shift_type}")
-            
-            shift_start_utc = shift_start.astimezone(pytz.UTC)
-            shift_end_utc = shift_end.astimezone(pytz.UTC)
-            return shift_start, shift_end, shift_start_utc, shift_end_utc
-            
-        except (pytz.exceptions.NonExistentTimeError, pytz.exceptions.AmbiguousTimeError):
-            # Fallback with explicit is_dst=False
-            if shift_type == 'afternoon':
-                shift_start = tz.localize(datetime.combine(target_date, time(10, 0, 0)), is_dst=False)
-                shift_end = tz.localize(datetime.combine(target_date, time(16, 0, 0)), is_dst=False)
-            else:  # night
-                shift_start = tz.localize(datetime.combine(target_date, time(16, 0, 0)), is_dst=False)
-                next_day = target_date + timedelta(days=1)
-                shift_end = tz.localize(datetime.combine(next_day, time(4, 0, 0)), is_dst=False)
-            
-            shift_start_utc = shift_start.astimezone(pytz.UTC)
-            shift_end_utc = shift_end.astimezone(pytz.UTC)
-            return shift_start, shift_end, shift_start_utc, shift_end_utc
-    
-    def _calculate_shift_report(self, target_date, shift_type, tz):
-        """Calculate complete report for a single shift"""
-        shift_start, shift_end, shift_start_utc, shift_end_utc = self._get_shift_times(
-            target_date, shift_type, tz
-        )
-        
-        # ===== INCOME: Orders in shift time =====
-        orders = Order.objects.filter(
-            created_at__gte=shift_start_utc,
-            created_at__lt=shift_end_utc
-        )
-        
-        total_income = orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-        order_count = orders.count()
-        
-        # Payment type totals
-        cash_income = orders.filter(payment_type='cash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-        upi_income = orders.filter(payment_type='upi').aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-        card_income = orders.filter(payment_type='card').aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-        
-        # ✅ FIXED: Category breakdown via OrderItem → Dish
-        def get_category_breakdown(payment_type):
-            category_totals = OrderItem.objects.filter(
-                order__created_at__gte=shift_start_utc,
-                order__created_at__lt=shift_end_utc,
-                order__payment_type=payment_type
-            ).values('dish__category').annotate(
-                total_amount=Sum('price'),
-                item_count=Count('id')
-            ).order_by('-total_amount')
-            
-            return [
-                {
-                    'category_display': cat['dish__category'] or 'Uncategorized',
-                    'amount': str(cat['total_amount'] or Decimal('0.00')),
-                    'item_count': cat['item_count'] or 0
-                }
-                for cat in category_totals
-            ]
-        
-        cash_category_breakdown = get_category_breakdown('cash')
-        upi_category_breakdown = get_category_breakdown('upi')
-        card_category_breakdown = get_category_breakdown('card')
-        
-        # ===== EXPENSES =====
-        from .models import Expense, ExpenseItem  # Adjust import path
-        
-        expenses = Expense.objects.filter(
-            timestamp__gte=shift_start_utc,
-            timestamp__lt=shift_end_utc
-        )
-        total_expense = expenses.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-        
-        # Worker expenses
-        worker_expenses = expenses.filter(expense_type='worker')
-        worker_expense_total = worker_expenses.aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-        
-        worker_expenses_list = []
-        for exp in worker_expenses:
-            worker_expenses_list.append({
-                'worker_name': getattr(exp.worker, 'name', 'Unknown'),
-                'category': getattr(exp, 'get_worker_category_display', lambda: 'Other')(),
-                'description': exp.description or '',
-                'amount': float(exp.total_amount),
-                'time': exp.timestamp.astimezone(tz).strftime('%I:%M %p')
-            })
-        
-        # Material expenses
-        material_expenses = expenses.filter(expense_type='material')
-        material_expense_total = material_expenses.aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-        
-        material_items_list = []
-        for exp in material_expenses:
-            items = ExpenseItem.objects.filter(expense=exp)
-            expense_time = exp.timestamp.astimezone(tz).strftime('%I:%M %p')
-            for item in items:
-                material_items_list.append({
-                    'material_name': item.material.name,
-                    'quantity': float(item.quantity),
-                    'unit': getattr(item.material, 'get_unit_display', lambda: '')(),
-                    'unit_price': float(item.unit_price),
-                    'amount': float(item.subtotal),
-                    'time': expense_time
-                })
-        
-        # Profit
-        profit = total_income - total_expense
-        profit_margin = float((profit / total_income * 100)) if total_income > 0 else 0.0
-        
-        return {
-            'shift_type': shift_type,
-            'shift_start': shift_start.strftime('%I:%M %p'),
-            'shift_end': shift_end.strftime('%I:%M %p'),
-            'total_income': str(total_income),
-            'order_count': order_count,
-            'cash_income': str(cash_income),
-            'upi_income': str(upi_income),
-            'card_income': str(card_income),
-            # ✅ PERFECT CATEGORY BREAKDOWNS
-            'cash_category_breakdown': cash_category_breakdown,
-            'upi_category_breakdown': upi_category_breakdown,
-            'card_category_breakdown': card_category_breakdown,
-            'total_expense': str(total_expense),
-            'worker_expense': str(worker_expense_total),
-            'material_expense': str(material_expense_total),
-            'worker_expenses_list': worker_expenses_list,
-            'material_expenses_list': material_items_list,
-            'profit': str(profit),
-            'profit_margin': str(profit_margin)
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views import View
+from django.utils.decorators import method_decorator
+
+from django.db.models import F, Sum, DecimalField, Count, Q, Max, Case, When, Value
+from .models import *
+import json
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from datetime import date, datetime, timedelta
+from rest_framework.views import APIView
+from decimal import Decimal
+from django.db import IntegrityError, InterfaceError, OperationalError, transaction
+import json
+from django.http import JsonResponse
+from django.views import View
+from django.db.models import Sum, Count, F, Q, DecimalField, Avg
+from django.db.models.functions import Coalesce, TruncHour, TruncDate
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from collections import defaultdict
+from .models import Order, OrderItem, Dish, Expense, Worker, Material, ExpenseItem
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+import pytz
+import traceback
+from .models import Order, OrderItem, Expense, ExpenseItem, Dish, Worker, Material
+from .serializers import ShiftReportSerializer, DailyReportSerializer
+
+import base64
+import bisect
+import csv
+import hashlib
+import io
+import uuid
+from decimal import InvalidOperation, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import never_cache
+
+from .bill_renderer import render_bill
+from .display_orders import check_display_orders
+from .menu_cache import (
+    changed_dish_ids, display_order_key, get_availability_version, get_menu_snapshot,
+    get_sold_out, invalidate_menu, mark_sold_out, menu_conditional_get, menu_response,
+    wait_for_menu_change,
+)
+from .menu_rules import get_menu_rules
+from .order_journal import journal_enabled, journal_order
+from .price_book import get_price_book
+from .print_queue import enqueue_kots, enqueue_print
+from .search_index import dish_search_index
+
+
+def encode_cursor(key):
+    """Opaque pagination cursor for a list sort key"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+# ==========================================
+# DISH LIST VIEW - WITH EXTRAS ISOLATION
+# ==========================================
+@method_decorator(menu_conditional_get, name='get')
+class DishListView(View):
+    # Fields a client can request with ?fields= ('order' only when ordered by display order)
+    LIST_FIELDS = (
+        'id', 'name', 'secondary_name', 'price', 'meal_type', 'meal_type_display',
+        'category', 'category_display', 'image', 'is_active', 'is_sold_out', 'created_at', 'order',
+    )
+    MAX_PAGE_SIZE = 200
+    
+    def get(self, request):
+        try:
+            # Get filter parameters
+            meal_type = request.GET.get('meal_type', None)
+            category = request.GET.get('category', None)
+            group_by_meal = request.GET.get('group_by_meal', 'false').lower() == 'true'
+            group_by_category = request.GET.get('group_by_category', 'false').lower() == 'true'
+            get_available_categories = request.GET.get('get_available_categories', 'false').lower() == 'true'
+            
+            # Return available categories for a meal type
+            if get_available_categories:
+                if not meal_type:
+                    return JsonResponse({
+                        "error": "meal_type parameter is required when get_available_categories=true"
+                    }, status=400)
+                
+                return menu_response(
+                    request,
+                    ('available_categories', meal_type),
+                    lambda snapshot: self.available_categories_data(meal_type)
+                )
+            
+            # If group_by_category=true, return grouped by category (EXCLUDES EXTRAS)
+            if group_by_category:
+                return self.get_grouped_by_category(request, meal_type)
+            
+            # If group_by_meal=true, return grouped data for ordering page
+            if group_by_meal:
+                return self.get_grouped_by_meal_type(request)
+            
+            # Validate filters before serving the cached payload
+            rules = get_menu_rules()
+            if category and category != 'extras':
+                if category not in rules.valid_categories:
+                    return JsonResponse({
+                        "error": f"Invalid category. Must be one of: {', '.join(rules.categories)}"
+                    }, status=400)
+            
+            if meal_type and category != 'extras':
+                if meal_type not in rules.valid_meal_types:
+                    return JsonResponse({
+                        "error": f"Invalid meal_type. Must be one of: {', '.join(rules.meal_types)}"
+                        }, status=400)
+            
+            # Optional projection: ?fields=id,name,price
+            fields = request.GET.get('fields')
+            if fields:
+                fields = tuple(field.strip() for field in fields.split(',') if field.strip())
+                invalid_fields = [field for field in fields if field not in self.LIST_FIELDS]
+                if invalid_fields:
+                    return JsonResponse({
+                        "error": f"Invalid fields: {', '.join(invalid_fields)}. "
+                                 f"Must be any of: {', '.join(self.LIST_FIELDS)}"
+                    }, status=400)
+            
+            # Optional keyset pagination: ?limit=50&cursor=<next from previous page>
+            limit = request.GET.get('limit')
+            cursor = request.GET.get('cursor')
+            if limit or cursor:
+                try:
+                    limit = min(max(int(limit or self.MAX_PAGE_SIZE), 1), self.MAX_PAGE_SIZE)
+                except ValueError:
+                    return JsonResponse({"error": "limit must be an integer"}, status=400)
+                try:
+                    cursor_key = decode_cursor(cursor) if cursor else None
+                except ValueError:
+                    return JsonResponse({"error": "Invalid cursor"}, status=400)
+                
+                return self.get_page(request, meal_type, category, fields, limit, cursor_key)
+            
+            return menu_response(
+                request,
+                ('list', meal_type, category, fields),
+                lambda snapshot: self.dish_list_data(request, snapshot, meal_type, category, fields)
+            )
+        
+        except Exception as e:
+            import traceback
+            print("Error in DishListView:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+    
+    def available_categories_data(self, meal_type):
+        """
+        Categories available for a meal type, excluding extras
+        """
+        rules = get_menu_rules()
+        
+        return [
+            {
+                'code': cat_code,
+                'display': rules.category_display[cat_code]
+            }
+            for cat_code in rules.available_categories_for_meal(meal_type)
+            if cat_code != 'extras'
+        ]
+    
+    def sorted_dishes(self, snapshot, meal_type, category):
+        """
+        (dishes, sort keys, with_order) for a list variant, memoized on the
+        snapshot; sort keys are the keyset used for cursor pagination
+        """
+        def build():
+            dishes = snapshot.dishes
+            
+            # CRITICAL: If category is explicitly 'extras', show only extras
+            if category == 'extras':
+                dishes = [dish for dish in dishes if dish['category'] == 'extras']
+            else:
+                # For all other queries, EXCLUDE extras by default
+                dishes = [dish for dish in dishes if dish['category'] != 'extras']
+                
+                # Filter by specific category if provided (and it's not extras)
+                if category:
+                    dishes = [dish for dish in dishes if dish['category'] == category]
+            
+            # Filter by meal_type if provided (doesn't apply to extras)
+            # 'all' doesn't filter; otherwise show the meal_type OR dishes marked as 'all'
+            if meal_type and meal_type != 'all' and category != 'extras':
+                dishes = [dish for dish in dishes if dish['meal_type'] in (meal_type, 'all')]
+            
+            # Order results - UNIFIED ORDERING LOGIC
+            # (category, display order, id) or (category, name, id)
+            with_order = bool(meal_type and meal_type != 'all' and category != 'extras')
+            if with_order:
+                sort_key = lambda dish: (dish['category'],) + display_order_key(dish)
+            else:
+                sort_key = lambda dish: (dish['category'], dish['name'], dish['id'])
+            dishes = sorted(dishes, key=sort_key)
+            
+            return dishes, [sort_key(dish) for dish in dishes], with_order
+        
+        return snapshot.memoize(('list', meal_type, category), build)
+    
+    def serialize_dish(self, request, dish, with_order, fields=None):
+        if fields:
+            # Projection: only build the requested values (no image URL unless asked)
+            dish_data = {}
+            for field in fields:
+                if field == 'price':
+                    dish_data['price'] = float(dish['price'])
+                elif field == 'image':
+                    dish_data['image'] = request.build_absolute_uri(dish['image']) if dish['image'] else None
+                elif field == 'order':
+                    if with_order:
+                        dish_data['order'] = dish['order'] if dish['order'] is not None else 0
+                elif field == 'is_sold_out':
+                    dish_data['is_sold_out'] = dish['id'] in get_sold_out()
+                else:
+                    dish_data[field] = dish[field]
+            return dish_data
+        
+        dish_data = {
+            'id': dish['id'],
+            'name': dish['name'],
+            'secondary_name': dish['secondary_name'],
+            'price': float(dish['price']),
+            'meal_type': dish['meal_type'],
+            'meal_type_display': dish['meal_type_display'],
+            'category': dish['category'],
+            'category_display': dish['category_display'],
+            'image': request.build_absolute_uri(dish['image']) if dish['image'] else None,
+            'is_active': dish['is_active'],
+            'is_sold_out': dish['id'] in get_sold_out(),
+            'created_at': dish['created_at'],
+        }
+        
+        if with_order:
+            # Default to 0 for consistency
+            dish_data['order'] = dish['order'] if dish['order'] is not None else 0
+        
+        return dish_data
+    
+    def dish_list_data(self, request, snapshot, meal_type, category, fields=None):
+        """
+        Flat dish list from the menu snapshot (filters already validated)
+        """
+        dishes, _, with_order = self.sorted_dishes(snapshot, meal_type, category)
+        return [self.serialize_dish(request, dish, with_order, fields) for dish in dishes]
+    
+    def get_page(self, request, meal_type, category, fields, limit, cursor_key):
+        """
+        One page of the flat list, starting after cursor_key
+        Returns {"results": [...], "next": <cursor or null>}
+        """
+        dishes, keys, with_order = self.sorted_dishes(get_menu_snapshot(), meal_type, category)
+        
+        try:
+            start = bisect.bisect_right(keys, cursor_key) if cursor_key is not None else 0
+        except TypeError:
+            # Cursor from a differently ordered listing
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        
+        page = dishes[start:start + limit]
+        has_more = start + limit < len(dishes)
+        
+        return JsonResponse({
+            "results": [self.serialize_dish(request, dish, with_order, fields) for dish in page],
+            "next": encode_cursor(keys[start + limit - 1]) if has_more else None,
+        })
+    
+    def get_grouped_by_category(self, request, meal_type=None):
+        """
+        Get dishes grouped by category for restaurant page
+        Called when ?group_by_category=true
+        ALWAYS EXCLUDES 'extras' category
+        """
+        try:
+            return menu_response(
+                request,
+                ('group_by_category', meal_type),
+                lambda snapshot: self.grouped_by_category_data(request, snapshot, meal_type)
+            )
+        
+        except Exception as e:
+            import traceback
+            print("Error in get_grouped_by_category:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+    
+    def grouped_by_category_data(self, request, snapshot, meal_type=None):
+        categories_data = []
+        
+        rules = get_menu_rules()
+        
+        # Handle meal_type filtering - extras are always excluded
+        if meal_type and meal_type != 'all':
+            # Show dishes for specific meal_type OR dishes marked as 'all'
+            dishes_by_category = snapshot.grouped('category', meal_types=(meal_type, 'all'))
+            available_categories = rules.available_categories_for_meal(meal_type)
+        else:
+            dishes_by_category = snapshot.grouped('category')
+            available_categories = rules.categories
+        
+        sold_out = get_sold_out()
+        
+        # Only iterate through available categories (excluding extras)
+        for category_code in available_categories:
+            # Skip extras category completely
+            if category_code == 'extras':
+                continue
+            
+            category_name = rules.category_display[category_code]
+            
+            dishes_data = []
+            for dish in dishes_by_category.get(category_code, ()):
+                dishes_data.append({
+                    'id': dish['id'],
+                    'name': dish['name'],
+                    'secondary_name': dish['secondary_name'],
+                    'price': float(dish['price']),
+                    'meal_type': dish['meal_type'],
+                    'meal_type_display': dish['meal_type_display'],
+                    'order': dish['order'] if dish['order'] is not None else 0,
+                    'image': request.build_absolute_uri(dish['image']) if dish['image'] else None,
+                    'is_sold_out': dish['id'] in sold_out
+                })
+            
+            # Only add category if it has dishes
+            if dishes_data:
+                categories_data.append({
+                    'category': category_code,
+                    'category_display': category_name,
+                    'dishes': dishes_data,
+                    'total_dishes': len(dishes_data)
+                })
+        
+        return categories_data
+    
+    def get_grouped_by_meal_type(self, request):
+        """
+        Get all dishes grouped by meal_type for the ordering page UI
+        Called when ?group_by_meal=true
+        EXCLUDES extras from this view
+        """
+        try:
+            return menu_response(
+                request,
+                ('group_by_meal',),
+                lambda snapshot: self.grouped_by_meal_type_data(request, snapshot)
+            )
+        
+        except Exception as e:
+            import traceback
+            print("Error in get_grouped_by_meal_type:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+    
+    def grouped_by_meal_type_data(self, request, snapshot):
+        meal_types_data = []
+        
+        # Dishes per meal_type in display order, EXCLUDING extras
+        dishes_by_meal = snapshot.grouped('meal_type')
+        sold_out = get_sold_out()
+        
+        for meal_code, meal_name in Dish.MEAL_TYPE_CHOICES:
+            dishes_data = []
+            for dish in dishes_by_meal.get(meal_code, ()):
+                dishes_data.append({
+                    'id': dish['id'],
+                    'name': dish['name'],
+                    'secondary_name': dish['secondary_name'],
+                    'price': float(dish['price']),
+                    'category': dish['category'],
+                    'category_display': dish['category_display'],
+                    'order': dish['order'] if dish['order'] is not None else 0,
+                    'image': request.build_absolute_uri(dish['image']) if dish['image'] else None,
+                    'is_sold_out': dish['id'] in sold_out
+                })
+            
+            meal_types_data.append({
+                'meal_type': meal_code,
+                'meal_type_display': meal_name,
+                'dishes': dishes_data,
+                'total_dishes': len(dishes_data)
+            })
+        
+        return meal_types_data
+
+
+# ==========================================
+# GET DISHES FOR ORDERING (GROUPED BY MEAL TYPE AND CATEGORY)
+# ==========================================
+@method_decorator(menu_conditional_get, name='get')
+class GetDishesForOrderingView(View):
+    def get(self, request):
+        try:
+            return menu_response(request, ('for_ordering',), self.ordering_data)
+
+        except Exception as e:
+            import traceback
+            print("Error in GetDishesForOrderingView:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+
+    def ordering_data(self, snapshot):
+        """
+        Build the meal -> category -> dishes tree in one pass over the
+        display-ordered snapshot (excludes 'extras' and the 'all' meal type)
+        """
+        tree = {}
+        sold_out = get_sold_out()
+        for dish in snapshot.ordered:
+            if dish['category'] == 'extras' or dish['meal_type'] == 'all':
+                continue
+            tree.setdefault(dish['meal_type'], {}).setdefault(dish['category'], []).append({
+                'id': dish['id'],
+                'name': dish['name'],
+                'secondary_name': dish['secondary_name'],
+                'price': str(dish['price']),
+                'image': dish['image'],
+                'category': dish['category'],
+                'category_display': dish['category_display'],
+                'current_order': dish['order'] if dish['order'] is not None else 0,
+                'is_sold_out': dish['id'] in sold_out
+            })
+
+        meal_types_data = []
+        for meal_code, meal_name in Dish.MEAL_TYPE_CHOICES:
+            categories = tree.get(meal_code)
+            if not categories:
+                continue
+
+            categories_data = []
+            total_dishes_count = 0
+
+            # Categories sorted by code, as the old ORDER BY category did
+            for category in sorted(categories):
+                dishes_list = categories[category]
+                categories_data.append({
+                    'category': category,
+                    'category_display': dishes_list[0]['category_display'],
+                    'dishes': dishes_list,
+                    'total_dishes': len(dishes_list)
+                })
+                total_dishes_count += len(dishes_list)
+
+            meal_types_data.append({
+                'meal_type': meal_code,
+                'meal_type_display': meal_name,
+                'categories': categories_data,
+                'total_dishes': total_dishes_count
+            })
+
+        return meal_types_data
+
+# ==========================================
+# DISH REORDER VIEW (FIXED)
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class DishReorderView(View):
+    def put(self, request):
+        try:
+            data = json.loads(request.body)
+            meal_type = data.get('meal_type')
+            category = data.get('category')
+            dishes_order = data.get('dishes', [])
+
+            # Validate meal_type
+            rules = get_menu_rules()
+            valid_meal_types = rules.orderable_meal_types
+            if not meal_type:
+                return JsonResponse({
+                    "error": "meal_type is required"
+                }, status=400)
+
+            if meal_type not in valid_meal_types:
+                return JsonResponse({
+                    "error": f"Invalid meal_type '{meal_type}'. Must be one of: {', '.join(valid_meal_types)}"
+                }, status=400)
+
+            # Validate category
+            valid_categories = rules.orderable_categories
+            if not category:
+                return JsonResponse({
+                    "error": "category is required"
+                }, status=400)
+
+            if category not in valid_categories:
+                return JsonResponse({
+                    "error": f"Invalid category '{category}'. Must be one of: {', '.join(valid_categories)}"
+                }, status=400)
+
+            # Validate dishes array
+            if not dishes_order or not isinstance(dishes_order, list):
+                return JsonResponse({
+                    "error": "dishes array is required and must be a list"
+                }, status=400)
+
+            # Validate each dish item
+            for item in dishes_order:
+                if not isinstance(item, dict) or 'dish_id' not in item or 'order' not in item:
+                    return JsonResponse({
+                        "error": "Each dish must have 'dish_id' and 'order' keys"
+                    }, status=400)
+                if not isinstance(item['order'], int) or isinstance(item['order'], bool) or item['order'] < 0:
+                    return JsonResponse({
+                        "error": f"Invalid order for dish {item['dish_id']}. Must be a non-negative integer"
+                    }, status=400)
+
+            dish_ids = [item['dish_id'] for item in dishes_order]
+            if len(set(dish_ids)) != len(dish_ids):
+                return JsonResponse({
+                    "error": "Each dish may appear only once"
+                }, status=400)
+            if len({item['order'] for item in dishes_order}) != len(dishes_order):
+                return JsonResponse({
+                    "error": "Order values must be unique"
+                }, status=400)
+
+            # Update orders in transaction
+            with transaction.atomic():
+                # Verify all dishes exist and belong to the meal_type and category
+                found_ids = set(Dish.objects.filter(
+                    id__in=dish_ids,
+                    meal_type=meal_type,
+                    category=category,
+                    is_active=True
+                ).exclude(category='extras').values_list('id', flat=True))
+
+                if len(found_ids) != len(dish_ids):
+                    missing_ids = set(dish_ids) - found_ids
+                    return JsonResponse({
+                        "error": f"Some dishes not found or don't belong to this meal_type/category. Missing IDs: {list(missing_ids)}"
+                    }, status=400)
+
+                # Park + bulk_update existing rows, bulk_create missing ones
+                updated, created = DishDisplayOrder.reorder_category(
+                    meal_type,
+                    category,
+                    [(item['dish_id'], item['order']) for item in dishes_order]
+                )
+                updated_count = updated + created
+
+            return JsonResponse({
+                "success": True,
+                "message": f"Successfully reordered {updated_count} dishes for {category} in {meal_type}",
+                "meal_type": meal_type,
+                "category": category,
+                "updated_count": updated_count
+            })
+
+        except json.JSONDecodeError:
+            return JsonResponse({
+                "error": "Invalid JSON payload"
+            }, status=400)
+        except Exception as e:
+            import traceback
+            print("❌ Error in DishReorderView:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+
+
+# ==========================================
+# MOVE SINGLE DISH (BEFORE / AFTER ANOTHER)
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class DishMoveView(View):
+    """
+    POST body: { "dish_id": 12, "before": 7 } or { "dish_id": 12, "after": 7 }
+    Both dishes must share meal_type and category. Only the moved dish's
+    display order row is written unless the group has to be respaced.
+    """
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            dish_id = data.get('dish_id')
+            before_id = data.get('before')
+            after_id = data.get('after')
+
+            if not isinstance(dish_id, int):
+                return JsonResponse({"error": "dish_id is required"}, status=400)
+
+            if (before_id is None) == (after_id is None):
+                return JsonResponse({
+                    "error": "Provide exactly one of 'before' or 'after'"
+                }, status=400)
+
+            if not isinstance(before_id if before_id is not None else after_id, int):
+                return JsonResponse({"error": "'before' / 'after' must be a dish id"}, status=400)
+
+            order, rebalanced = DishDisplayOrder.move_dish(dish_id, before_id=before_id, after_id=after_id)
+
+            return JsonResponse({
+                "success": True,
+                "dish_id": dish_id,
+                "order": order,
+                "rebalanced": rebalanced
+            })
+
+        except DishDisplayOrder.DoesNotExist:
+            return JsonResponse({"error": "Target dish has no display order"}, status=404)
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Dish not found"}, status=404)
+        except ValidationError as e:
+            return JsonResponse({"error": " ".join(e.messages)}, status=400)
+        except IntegrityError:
+            # Another terminal moved a dish into the same gap
+            return JsonResponse({"error": "Display order changed concurrently, please retry"}, status=409)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON payload"}, status=400)
+        except Exception as e:
+            import traceback
+            print("❌ Error in DishMoveView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# INITIALIZE DISH ORDERS VIEW
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class InitializeDishOrdersView(View):
+    """
+    Number active dishes by id within each meal_type + category, ORDER_GAP
+    apart (DishDisplayOrder.spaced_order) so later moves have room
+
+    Reads all active dishes and existing display orders once, diffs them in
+    memory and writes only the rows that change (apply_orders). Rows of
+    inactive or moved dishes still in a group are kept after the active
+    ones so the group stays unique.
+
+    ?dry_run=true (or "dry_run": true in the body) reports the changes
+    without writing them.
+    """
+    def post(self, request):
+        try:
+            dry_run = request.GET.get('dry_run', 'false').lower() == 'true'
+            if request.content_type == 'application/json' and request.body:
+                try:
+                    data = json.loads(request.body)
+                    dry_run = dry_run or (isinstance(data, dict) and bool(data.get('dry_run')))
+                except json.JSONDecodeError:
+                    return JsonResponse({"error": "Invalid JSON payload"}, status=400)
+
+            with transaction.atomic():
+                assignments, changes, unchanged_count = self.plan()
+
+                created_count = sum(1 for change in changes if change['action'] == 'create')
+                updated_count = len(changes) - created_count
+
+                if not dry_run:
+                    DishDisplayOrder.apply_orders(assignments)
+
+            response = {
+                "success": True,
+                "message": "Dry run: no changes written" if dry_run else "Initialized dish orders",
+                "dry_run": dry_run,
+                "created": created_count,
+                "updated": updated_count,
+                "unchanged": unchanged_count,
+                "details": "Orders grouped by meal_type and category (extras excluded)"
+            }
+            if dry_run:
+                response["changes"] = changes
+            return JsonResponse(response)
+
+        except Exception as e:
+            import traceback
+            print("Error in InitializeDishOrdersView:")
+            print(traceback.format_exc())
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+
+    def plan(self):
+        """
+        Return (assignments for apply_orders, change report, unchanged count)
+        """
+        rules = get_menu_rules()
+        meal_types = [code for code in rules.meal_types if code != 'all']
+        categories = rules.orderable_categories
+
+        dishes = Dish.objects.filter(
+            is_active=True,
+            meal_type__in=meal_types,
+            category__in=categories
+        ).order_by('id').values_list('id', 'meal_type', 'category')
+
+        existing = {
+            row['dish_id']: row
+            for row in DishDisplayOrder.objects.values('dish_id', 'meal_type', 'category', 'order')
+        }
+
+        groups = defaultdict(list)
+        for dish_id, meal_type, category in dishes:
+            groups[(meal_type, category)].append(dish_id)
+
+        # Rows in these groups that are not for an active dish of the group
+        leftovers = defaultdict(list)
+        placed = {dish_id for group in groups.values() for dish_id in group}
+        for row in existing.values():
+            group = (row['meal_type'], row['category'])
+            if group in groups and row['dish_id'] not in placed:
+                leftovers[group].append((row['order'], row['dish_id']))
+
+        assignments = []
+        changes = []
+        unchanged_count = 0
+        for (meal_type, category), dish_ids in groups.items():
+            dish_ids = dish_ids + [dish_id for _, dish_id in sorted(leftovers[(meal_type, category)])]
+            for index, dish_id in enumerate(dish_ids):
+                order = DishDisplayOrder.spaced_order(index)
+                row = existing.get(dish_id)
+                if row is not None and (row['meal_type'], row['category'], row['order']) == (meal_type, category, order):
+                    unchanged_count += 1
+                    continue
+                assignments.append((dish_id, meal_type, category, order))
+                changes.append({
+                    "dish_id": dish_id,
+                    "action": "create" if row is None else "update",
+                    "meal_type": meal_type,
+                    "category": category,
+                    "old_order": None if row is None else row['order'],
+                    "new_order": order
+                })
+
+        return assignments, changes, unchanged_count
+
+
+# ==========================================
+# DISPLAY ORDER INTEGRITY CHECK (ADMIN)
+# ==========================================
+class DisplayOrderCheckView(APIView):
+    """
+    GET  - report display-order anomalies
+    POST - repair them and respace every group to ORDER_GAP multiples
+    Same as: python manage.py check_display_orders [--fix]
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        try:
+            return Response(check_display_orders(fix=False))
+        except Exception as e:
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def post(self, request):
+        try:
+            return Response(check_display_orders(fix=True))
+        except Exception as e:
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# GET DISH CATEGORIES
+# ==========================================
+@method_decorator(menu_conditional_get, name='get')
+class DishCategoriesView(View):
+    def get(self, request):
+        try:
+            meal_type = request.GET.get('meal_type', None)
+            include_extras = request.GET.get('include_extras', 'false').lower() == 'true'
+
+            rules = get_menu_rules()
+            if meal_type:
+                available_categories = rules.available_categories_for_meal(meal_type)
+            else:
+                available_categories = rules.categories
+            
+            categories = [
+                {
+                    'value': code,
+                    'label': rules.category_display[code]
+                }
+                for code in available_categories
+            ]
+
+            if not include_extras:
+                categories = [cat for cat in categories if cat['value'] != 'extras']
+
+            return JsonResponse(categories, safe=False)
+        except Exception as e:
+            import traceback
+            print("Error in DishCategoriesView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+# ==========================================
+# GET SINGLE DISH BY ID
+# ==========================================
+@method_decorator(menu_conditional_get, name='get')
+class DishDetailView(View):
+    def get(self, request, dish_id):
+        try:
+            dish = Dish.objects.get(id=dish_id)
+            data = {
+                "id": dish.id,
+                "name": dish.name,
+                "secondary_name": dish.secondary_name,
+                "price": float(dish.price),
+                "meal_type": dish.meal_type,
+                "meal_type_display": dish.get_meal_type_display(),
+                "category": dish.category,
+                "category_display": dish.get_category_display(),
+                "image": request.build_absolute_uri(dish.image.url) if dish.image else None,
+                "is_active": dish.is_active,
+                "is_sold_out": dish.is_sold_out,
+                "created_at": dish.created_at.isoformat(),
+                "updated_at": dish.updated_at.isoformat(),
+            }
+            return JsonResponse(data)
+        
+        except Dish.DoesNotExist:
+            return JsonResponse({
+                "error": "Dish not found"
+            }, status=404)
+        
+        except Exception as e:
+            return JsonResponse({
+                "error": str(e)
+            }, status=500)
+
+
+# ==========================================
+# MENU DELTA SYNC (LONG-POLL)
+# ==========================================
+@method_decorator(never_cache, name='dispatch')
+class DishChangesView(View):
+    """
+    ?since=<version>&wait=<seconds>[&availability=<availability_version>]
+    Returns the dishes changed since a menu version, blocking up to `wait`
+    seconds for the next change when there is nothing new yet.
+    full=true means the change log could not answer and `dishes` is the
+    whole active menu.
+    sold_out is always the full list of sold-out dish ids; pass the last
+    availability_version to also wake on sold-out toggles.
+    """
+    MAX_WAIT_SECONDS = 25
+
+    def get(self, request):
+        try:
+            since = request.GET.get('since')
+            try:
+                since = int(since) if since else None
+                wait = float(request.GET.get('wait', 0))
+                availability = request.GET.get('availability')
+                availability = int(availability) if availability else None
+            except ValueError:
+                return JsonResponse({
+                    "error": "since and availability must be integer versions and wait a number of seconds"
+                }, status=400)
+
+            wait = max(0.0, min(wait, self.MAX_WAIT_SECONDS))
+            if since is not None and wait:
+                wait_for_menu_change(since, wait, availability_since=availability)
+
+            availability_version = get_availability_version()
+            sold_out = get_sold_out()
+            snapshot = get_menu_snapshot()
+            dish_ids = changed_dish_ids(since, snapshot.version) if since is not None else None
+
+            if dish_ids is None:
+                dishes = snapshot.dishes
+                removed = []
+            else:
+                dishes = [snapshot.dishes_by_id[dish_id] for dish_id in sorted(dish_ids)
+                          if dish_id in snapshot.dishes_by_id]
+                # Deactivated or deleted dishes
+                removed = sorted(dish_id for dish_id in dish_ids if dish_id not in snapshot.dishes_by_id)
+
+            return JsonResponse({
+                "version": snapshot.version,
+                "full": dish_ids is None,
+                "dishes": [
+                    {
+                        'id': dish['id'],
+                        'name': dish['name'],
+                        'secondary_name': dish['secondary_name'],
+                        'price': float(dish['price']),
+                        'meal_type': dish['meal_type'],
+                        'category': dish['category'],
+                        'image': request.build_absolute_uri(dish['image']) if dish['image'] else None,
+                        'order': dish['order'] if dish['order'] is not None else 0,
+                        'is_sold_out': dish['id'] in sold_out,
+                    }
+                    for dish in dishes
+                ],
+                "removed": removed,
+                "availability_version": availability_version,
+                "sold_out": sorted(sold_out),
+            })
+
+        except Exception as e:
+            import traceback
+            print("Error in DishChangesView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# DISH SEARCH
+# ==========================================
+class DishSearchView(View):
+    """
+    ?q=<text> - ranked prefix/trigram search over active dish names and
+    Tamil secondary names
+    ?limit=20 - maximum results (up to 100)
+    """
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        try:
+            query = request.GET.get('q', '').strip()
+            try:
+                limit = min(max(int(request.GET.get('limit', 20)), 1), self.MAX_LIMIT)
+            except ValueError:
+                return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+            if not query:
+                return JsonResponse([], safe=False)
+
+            results = dish_search_index.search(query, limit=limit)
+            dishes_by_id = get_menu_snapshot().dishes_by_id
+
+            data = []
+            for dish_id, score in results:
+                dish = dishes_by_id.get(dish_id)
+                if dish is None:
+                    continue
+                data.append({
+                    'id': dish['id'],
+                    'name': dish['name'],
+                    'secondary_name': dish['secondary_name'],
+                    'price': float(dish['price']),
+                    'meal_type': dish['meal_type'],
+                    'meal_type_display': dish['meal_type_display'],
+                    'category': dish['category'],
+                    'category_display': dish['category_display'],
+                    'image': request.build_absolute_uri(dish['image']) if dish['image'] else None,
+                    'is_sold_out': dish['id'] in get_sold_out(),
+                    'score': round(score, 2),
+                })
+
+            return JsonResponse(data, safe=False)
+
+        except Exception as e:
+            import traceback
+            print("Error in DishSearchView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CreateDishView(View):
+    def post(self, request):
+        try:
+            name = request.POST.get('name', '').strip()
+            secondary_name = request.POST.get('secondary_name', '').strip()
+            price = request.POST.get('price', '').strip()
+            meal_type = request.POST.get('meal_type', 'afternoon').strip()
+            category = request.POST.get('category', 'rice').strip()
+            image = request.FILES.get('image')
+            
+            # Validation - required fields
+            if not name:
+                return JsonResponse({"error": "Dish name is required"}, status=400)
+            
+            if not price:
+                return JsonResponse({"error": "Price is required"}, status=400)
+            
+            # Validate price
+            try:
+                price_float = float(price)
+                if price_float < 0:
+                    raise ValueError("Price cannot be negative")
+            except ValueError:
+                return JsonResponse({
+                    "error": "Price must be a valid positive number"
+                }, status=400)
+            
+            # Validate meal_type
+            rules = get_menu_rules()
+            if meal_type not in rules.valid_meal_types:
+                return JsonResponse({
+                    "error": f"Invalid meal_type. Must be one of: {', '.join(rules.meal_types)}"
+                }, status=400)
+            
+            # Validate category
+            if category not in rules.valid_categories:
+                return JsonResponse({
+                    "error": f"Invalid category. Must be one of: {', '.join(rules.categories)}"
+                }, status=400)
+            
+            # Check if category is allowed for this meal type (skip for extras)
+            if category != 'extras':
+                if not rules.is_category_available_for_meal(category, meal_type):
+                    return JsonResponse({
+                        "error": f"Category '{category}' is not available for meal type '{meal_type}'"
+                    }, status=400)
+            
+            # Use transaction to ensure atomicity
+            with transaction.atomic():
+                # Create dish
+                dish = Dish.objects.create(
+                    name=name,
+                    secondary_name=secondary_name if secondary_name else None,
+                    price=price_float,
+                    meal_type=meal_type,
+                    category=category,
+                    image=image
+                )
+                
+                # Extras don't need display orders (available at all times).
+                # DishDisplayOrder is one row per dish, in the dish's own
+                # meal_type + category; save() takes the next order from
+                # DisplayOrderCounter under a row lock.
+                if category != 'extras':
+                    DishDisplayOrder.objects.create(dish=dish)
+            
+            return JsonResponse({
+                "message": "Dish created successfully!",
+                "dish": {
+                    "id": dish.id,
+                    "name": dish.name,
+                    "secondary_name": dish.secondary_name or "",
+                    "price": float(dish.price),
+                    "meal_type": dish.meal_type,
+                    "meal_type_display": dish.get_meal_type_display(),
+                    "category": dish.category,
+                    "category_display": dish.get_category_display(),
+                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
+                }
+            }, status=201)
+        
+        except ValidationError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except Exception as e:
+            print(f"❌ Dish creation error: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return JsonResponse({
+                "error": "Failed to create dish",
+                "details": str(e)
+            }, status=500)
+
+
+# ==========================================
+# BULK DISH IMPORT / EXPORT
+# ==========================================
+DISH_TRANSFER_COLUMNS = [
+    'id', 'name', 'secondary_name', 'price', 'meal_type', 'category',
+    'image', 'is_active', 'order',
+]
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DishImportView(View):
+    """
+    Create many dishes in one request
+
+    Body: JSON ({"dishes": [{...}, ...]} or a bare list), or CSV with a
+    header row (uploaded as 'file' or sent as text/csv). Columns/keys:
+    name, secondary_name, price, meal_type, category, image, is_active,
+    order. 'image' references a file already in media storage (e.g.
+    "dishes/dosa.jpg", as written by the export); 'id' is ignored.
+
+    Every row is validated before anything is written. By default one bad
+    row rejects the whole import; ?skip_invalid=true imports the valid rows.
+    New dishes are appended to the end of their meal_type + category display
+    order, keeping the relative 'order' given in the rows.
+    """
+    MAX_ROWS = 5000
+    BATCH_SIZE = 500
+
+    def post(self, request):
+        try:
+            skip_invalid = request.GET.get('skip_invalid', 'false').lower() == 'true'
+
+            try:
+                rows = self.parse_rows(request)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+            if not rows:
+                return JsonResponse({"error": "No dishes to import"}, status=400)
+
+            if len(rows) > self.MAX_ROWS:
+                return JsonResponse({
+                    "error": f"Too many rows. At most {self.MAX_ROWS} dishes per import"
+                }, status=400)
+
+            dishes, requested_orders, errors = self.validate_rows(rows)
+
+            if errors and not skip_invalid:
+                return JsonResponse({
+                    "error": f"{len(errors)} row(s) failed validation. Nothing was imported",
+                    "errors": errors
+                }, status=400)
+
+            with transaction.atomic():
+                created = Dish.objects.bulk_create(
+                    [dish for _, dish in dishes], batch_size=self.BATCH_SIZE
+                )
+                orders = self.assign_display_orders(dishes, requested_orders)
+
+                # bulk_create sends no post_save signals
+                dish_ids = [dish.id for dish in created]
+                transaction.on_commit(lambda: invalidate_menu(dish_ids))
+
+            return JsonResponse({
+                "success": True,
+                "message": f"Imported {len(dishes)} dishes",
+                "created": len(dishes),
+                "skipped": len(errors),
+                "dishes": [
+                    {
+                        "row": row_number,
+                        "id": dish.id,
+                        "name": dish.name,
+                        "meal_type": dish.meal_type,
+                        "category": dish.category,
+                        "order": orders.get(dish.id)
+                    }
+                    for row_number, dish in dishes
+                ],
+                "errors": errors
+            }, status=201)
+
+        except Exception as e:
+            import traceback
+            print("Error in DishImportView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+    def parse_rows(self, request):
+        """Return the import rows as a list of dicts"""
+        upload = request.FILES.get('file')
+        content_type = request.content_type or ''
+
+        if upload is not None or content_type == 'text/csv':
+            raw = upload.read() if upload is not None else request.body
+            try:
+                text = raw.decode('utf-8-sig')  # Excel writes a BOM
+            except UnicodeDecodeError:
+                raise ValueError("CSV must be UTF-8 encoded")
+            return list(csv.DictReader(io.StringIO(text)))
+
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON")
+
+        if isinstance(data, dict):
+            data = data.get('dishes')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError("Expected a list of dishes")
+        return data
+
+    def validate_rows(self, rows):
+        """
+        Build unsaved Dish objects and validate them in memory
+
+        Returns ([(row_number, dish), ...], {row_number: order},
+        [{"row": n, "errors": {...}}, ...]). Row numbers start at 1.
+        """
+        rules = get_menu_rules()
+        image_exists = {}
+
+        dishes = []
+        requested_orders = {}
+        errors = []
+
+        for row_number, row in enumerate(rows, start=1):
+            row_errors = {}
+
+            def text(key, default=''):
+                value = row.get(key)
+                return default if value is None else str(value).strip()
+
+            price = text('price')
+            if not price:
+                row_errors['price'] = ["Price is required"]
+            else:
+                try:
+                    price = Decimal(price)
+                    if not price.is_finite() or price < 0:
+                        raise InvalidOperation
+                except InvalidOperation:
+                    row_errors['price'] = ["Price must be a valid positive number"]
+
+            meal_type = text('meal_type') or 'afternoon'
+            if meal_type not in rules.valid_meal_types:
+                row_errors['meal_type'] = [f"Must be one of: {', '.join(rules.meal_types)}"]
+
+            category = text('category') or 'rice'
+            if category not in rules.valid_categories:
+                row_errors['category'] = [f"Must be one of: {', '.join(rules.categories)}"]
+
+            is_active = text('is_active', 'true').lower()
+            if is_active not in ('true', 'false', '1', '0', 'yes', 'no', ''):
+                row_errors['is_active'] = ["Must be true or false"]
+
+            image = self.image_name(text('image'))
+            if image:
+                if image not in image_exists:
+                    image_exists[image] = default_storage.exists(image)
+                if not image_exists[image]:
+                    row_errors['image'] = [f"Image '{image}' not found in media storage"]
+
+            order = text('order')
+            if order:
+                try:
+                    requested_orders[row_number] = int(order)
+                except ValueError:
+                    row_errors['order'] = ["Order must be a whole number"]
+
+            dish = Dish(
+                name=text('name'),
+                secondary_name=text('secondary_name') or None,
+                price=price if 'price' not in row_errors else 0,
+                meal_type=meal_type,
+                category=category,
+                image=image or None,
+                is_active=is_active in ('true', '1', 'yes', ''),
+            )
+
+            # Same model validation as Dish.save() (required fields, meal restrictions)
+            try:
+                dish.full_clean(exclude=list(row_errors))
+            except ValidationError as e:
+                for field, messages in e.message_dict.items():
+                    # Keep the more specific message already recorded
+                    row_errors.setdefault(field, messages)
+
+            if row_errors:
+                errors.append({"row": row_number, "name": dish.name, "errors": row_errors})
+            else:
+                dishes.append((row_number, dish))
+
+        return dishes, requested_orders, errors
+
+    @staticmethod
+    def image_name(reference):
+        """Storage name for an image reference (name or media URL)"""
+        reference = reference.split('?', 1)[0]
+        if '://' in reference:
+            reference = '/' + reference.split('://', 1)[1].partition('/')[2]
+        if settings.MEDIA_URL and reference.startswith(settings.MEDIA_URL):
+            reference = reference[len(settings.MEDIA_URL):]
+        return reference.lstrip('/')
+
+    def assign_display_orders(self, dishes, requested_orders):
+        """
+        Append the new dishes to their meal_type + category display order
+
+        Each group reserves its block of orders from DisplayOrderCounter and
+        one bulk_create writes all the rows. Returns {dish_id: order}.
+        """
+        groups = defaultdict(list)
+        for row_number, dish in dishes:
+            # Extras are always available and never ordered
+            if dish.category == 'extras':
+                continue
+            order = requested_orders.get(row_number)
+            groups[(dish.meal_type, dish.category)].append(
+                ((order is None, order or 0, row_number), dish)
+            )
+
+        if not groups:
+            return {}
+
+        display_orders = []
+        # Sorted so concurrent imports lock the counters in the same order
+        for group in sorted(groups):
+            members = sorted(groups[group], key=lambda member: member[0])
+            next_order = DisplayOrderCounter.allocate(*group, count=len(members))
+            for offset, (_, dish) in enumerate(members):
+                display_orders.append(DishDisplayOrder(
+                    dish=dish,
+                    meal_type=dish.meal_type,
+                    category=dish.category,
+                    order=next_order + offset * DishDisplayOrder.ORDER_GAP
+                ))
+
+        DishDisplayOrder.objects.bulk_create(display_orders, batch_size=self.BATCH_SIZE)
+        return {display_order.dish_id: display_order.order for display_order in display_orders}
+
+
+class _Echo:
+    """File-like object whose write() returns the line for streaming"""
+    def write(self, value):
+        return value
+
+
+class DishExportView(View):
+    """
+    Stream the full dish catalog, inactive dishes included
+
+    ?format=csv (default) or ?format=ndjson (one JSON object per line)
+    ?active_only=true - only active dishes
+
+    Columns match DishImportView, so an export can be imported into another
+    outlet. 'image' is the media storage name and 'order' the display order.
+    """
+    CHUNK_SIZE = 2000
+
+    def get(self, request):
+        try:
+            export_format = request.GET.get('format', 'csv').lower()
+            if export_format not in ('csv', 'ndjson'):
+                return JsonResponse({"error": "format must be csv or ndjson"}, status=400)
+
+            dishes = Dish.objects.all()
+            if request.GET.get('active_only', 'false').lower() == 'true':
+                dishes = dishes.filter(is_active=True)
+
+            # Display order (not id) so a re-import keeps each group's order
+            rows = dishes.order_by(
+                'meal_type', 'category', F('display_order_info__order').asc(nulls_last=True), 'id'
+            ).values(
+                *DISH_TRANSFER_COLUMNS[:-1], order=F('display_order_info__order')
+            ).iterator(chunk_size=self.CHUNK_SIZE)
+
+            filename = f"dishes-{timezone.localdate().isoformat()}"
+            if export_format == 'csv':
+                response = StreamingHttpResponse(self.csv_lines(rows), content_type='text/csv')
+                response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+            else:
+                response = StreamingHttpResponse(self.ndjson_lines(rows), content_type='application/x-ndjson')
+                response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+            return response
+
+        except Exception as e:
+            import traceback
+            print("Error in DishExportView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+    @staticmethod
+    def csv_lines(rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(DISH_TRANSFER_COLUMNS)
+        for row in rows:
+            row['secondary_name'] = row['secondary_name'] or ''
+            row['image'] = row['image'] or ''
+            row['is_active'] = 'true' if row['is_active'] else 'false'
+            yield writer.writerow([
+                '' if row[column] is None else row[column] for column in DISH_TRANSFER_COLUMNS
+            ])
+
+    @staticmethod
+    def ndjson_lines(rows):
+        for row in rows:
+            row['image'] = row['image'] or None
+            yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+# ==========================================
+# UPDATE DISH
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class UpdateDishView(View):
+    def put(self, request, dish_id):
+        try:
+            dish = Dish.objects.get(id=dish_id)
+            data = json.loads(request.body)
+            
+            # Only the fields sent are written, so a concurrent change to
+            # another field (e.g. a sold-out toggle) is not overwritten
+            update_fields = ['updated_at']
+            
+            # Update fields if provided
+            if 'name' in data:
+                dish.name = data['name'].strip()
+                update_fields.append('name')
+            
+            if 'secondary_name' in data:
+                dish.secondary_name = data['secondary_name'].strip() or None
+                update_fields.append('secondary_name')
+            
+            if 'price' in data:
+                try:
+                    price = float(data['price'])
+                    if price < 0:
+                        raise ValueError("Price cannot be negative")
+                    dish.price = price
+                    update_fields.append('price')
+                except ValueError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
+            
+            rules = get_menu_rules()
+            
+            if 'meal_type' in data:
+                meal_type = data['meal_type']
+                if meal_type not in rules.valid_meal_types:
+                    return JsonResponse({
+                        "error": f"Invalid meal_type. Must be one of: {', '.join(rules.meal_types)}"
+                    }, status=400)
+                dish.meal_type = meal_type
+                update_fields.append('meal_type')
+            
+            if 'category' in data:
+                category = data['category']
+                if category not in rules.valid_categories:
+                    return JsonResponse({
+                        "error": f"Invalid category. Must be one of: {', '.join(rules.categories)}"
+                    }, status=400)
+                
+                # Check if category is allowed for meal type (skip for extras)
+                if category != 'extras' and not rules.is_category_available_for_meal(category, dish.meal_type):
+                    return JsonResponse({
+                        "error": f"Category '{category}' is not available for meal type '{dish.meal_type}'"
+                    }, status=400)
+                
+                dish.category = category
+                update_fields.append('category')
+            
+            if 'is_active' in data:
+                dish.is_active = bool(data['is_active'])
+                update_fields.append('is_active')
+            
+            dish.save(update_fields=update_fields)
+            
+            return JsonResponse({
+                "message": "Dish updated successfully!",
+                "dish": {
+                    "id": dish.id,
+                    "name": dish.name,
+                    "secondary_name": dish.secondary_name,
+                    "price": float(dish.price),
+                    "meal_type": dish.meal_type,
+                    "meal_type_display": dish.get_meal_type_display(),
+                    "category": dish.category,
+                    "category_display": dish.get_category_display(),
+                    "is_active": dish.is_active,
+                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
+                }
+            })
+        
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Dish not found"}, status=404)
+        except ValidationError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# DELETE DISH
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class DeleteDishView(View):
+    def delete(self, request, dish_id):
+        try:
+            dish = Dish.objects.get(id=dish_id)
+            dish.is_active = False  # Soft delete
+            dish.save()
+            
+            return JsonResponse({
+                "message": "Dish deleted successfully!"
+            })
+        
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Dish not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# UPDATE DISH PRICE
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class UpdateDishPriceView(View):
+    def patch(self, request, dish_id):
+        try:
+            dish = Dish.objects.get(id=dish_id)
+            data = json.loads(request.body)
+            new_price = data.get('price')
+            
+            if new_price is None:
+                return JsonResponse({
+                    "error": "price is required"
+                }, status=400)
+            
+            try:
+                new_price = float(new_price)
+                if new_price < 0:
+                    raise ValueError("Price cannot be negative")
+            except (ValueError, TypeError):
+                return JsonResponse({
+                    "error": "Invalid price format"
+                }, status=400)
+            
+            dish.price = new_price
+            dish.save()
+            
+            return JsonResponse({
+                "message": "Dish price updated successfully!",
+                "dish": {
+                    "id": dish.id,
+                    "name": dish.name,
+                    "price": float(dish.price),
+                    "category": dish.category,
+                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
+                }
+            })
+            
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Dish not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# SOLD OUT (86) TOGGLE
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class DishSoldOutView(View):
+    """
+    GET   dishes/sold-out/        - sold-out dish ids
+    PATCH dishes/<id>/sold-out/   - {"sold_out": true|false}
+    PATCH dishes/sold-out/        - {"dish_ids": [...], "sold_out": true|false}
+    
+    Marks dishes unavailable for the rest of service without deactivating
+    them. Only the flag and the shared sold-out set change: the menu
+    snapshot is kept, menu responses show is_sold_out on the next poll and
+    long-polling terminals wake up at once; orders/create/ rejects the dish.
+    """
+    def get(self, request):
+        try:
+            return JsonResponse({
+                "availability_version": get_availability_version(),
+                "sold_out": sorted(get_sold_out())
+            })
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+    
+    def patch(self, request, dish_id=None):
+        try:
+            data = json.loads(request.body)
+            sold_out = data.get('sold_out')
+            if not isinstance(sold_out, bool):
+                return JsonResponse({"error": "sold_out must be true or false"}, status=400)
+            
+            if dish_id is not None:
+                dish_ids = {dish_id}
+            else:
+                dish_ids = data.get('dish_ids')
+                if not isinstance(dish_ids, list) or not dish_ids:
+                    return JsonResponse({"error": "dish_ids must be a non-empty list"}, status=400)
+                try:
+                    dish_ids = {int(value) for value in dish_ids}
+                except (TypeError, ValueError):
+                    return JsonResponse({"error": "dish_ids must be integers"}, status=400)
+            
+            with transaction.atomic():
+                found = set(Dish.objects.filter(id__in=dish_ids).values_list('id', flat=True))
+                if dish_id is not None and not found:
+                    return JsonResponse({"error": "Dish not found"}, status=404)
+                
+                # update() sends no signals, so the menu version and snapshot
+                # stay; only the sold-out set moves
+                Dish.objects.filter(id__in=found).update(is_sold_out=sold_out)
+                transaction.on_commit(lambda: mark_sold_out(found, sold_out))
+            
+            return JsonResponse({
+                "message": f"{len(found)} dish(es) marked {'sold out' if sold_out else 'available'}",
+                "sold_out": sold_out,
+                "dish_ids": sorted(found),
+                "not_found": sorted(dish_ids - found),
+                "availability_version": get_availability_version()
+            })
+        
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# BULK PRICE REVISION
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class BulkUpdateDishPriceView(View):
+    """
+    Revise many dish prices in one transaction
+
+    Explicit prices:
+        {"prices": [{"dish_id": 1, "price": 45}, ...]}
+    Or a rule over active dishes (category and/or meal_type select them):
+        {"rule": {"category": "gravy", "meal_type": "night",
+                  "percent": 5 | "amount": -2,
+                  "round_to": 1, "rounding": "nearest" | "up" | "down"}}
+    round_to defaults to 0.01 (paise). "dry_run": true returns the diff
+    without saving.
+
+    All changed prices are written with a single UPDATE ... CASE statement
+    and the menu version is bumped once.
+    """
+    ROUNDING_MODES = {
+        'nearest': ROUND_HALF_UP,
+        'up': ROUND_CEILING,
+        'down': ROUND_FLOOR,
+    }
+    MAX_PRICE = Decimal('99999999.99')  # Dish.price max_digits=10, decimal_places=2
+
+    def patch(self, request):
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                return JsonResponse({"error": "Expected a JSON object"}, status=400)
+            dry_run = data.get('dry_run', False)
+            if not isinstance(dry_run, bool):
+                return JsonResponse({"error": "dry_run must be true or false"}, status=400)
+
+            if ('prices' in data) == ('rule' in data):
+                return JsonResponse({
+                    "error": "Provide either 'prices' or 'rule'"
+                }, status=400)
+
+            try:
+                if 'prices' in data:
+                    explicit_prices = self.parse_prices(data['prices'])
+                    dishes = Dish.objects.filter(id__in=explicit_prices)
+                    compute = lambda dish_id, price: explicit_prices[dish_id]
+                else:
+                    dishes, compute = self.parse_rule(data['rule'])
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+            with transaction.atomic():
+                # Lock the rows so the "before" prices are the ones replaced
+                current = list(
+                    dishes.select_for_update().order_by('id').values_list('id', 'name', 'price')
+                )
+
+                if 'prices' in data:
+                    missing = set(explicit_prices) - {dish_id for dish_id, _, _ in current}
+                    if missing:
+                        return JsonResponse({
+                            "error": "Dishes not found",
+                            "dish_ids": sorted(missing)
+                        }, status=404)
+
+                changes = []
+                invalid = []
+                for dish_id, name, price in current:
+                    new_price = compute(dish_id, price)
+                    if new_price is None or new_price < 0 or new_price > self.MAX_PRICE:
+                        invalid.append({
+                            "dish_id": dish_id,
+                            "name": name,
+                            "new_price": None if new_price is None else float(new_price)
+                        })
+                    elif new_price != price:
+                        changes.append((dish_id, name, price, new_price))
+
+                if invalid:
+                    return JsonResponse({
+                        "error": "Revision would produce invalid prices. Nothing was changed",
+                        "dishes": invalid
+                    }, status=400)
+
+                if changes and not dry_run:
+                    Dish.objects.filter(id__in=[dish_id for dish_id, _, _, _ in changes]).update(
+                        price=Case(
+                            *[When(id=dish_id, then=Value(new_price)) for dish_id, _, _, new_price in changes],
+                            output_field=DecimalField(max_digits=10, decimal_places=2)
+                        ),
+                        # update() skips auto_now
+                        updated_at=timezone.now()
+                    )
+                    # queryset.update() sends no signals; bump the menu version once
+                    changed_ids = [dish_id for dish_id, _, _, _ in changes]
+                    transaction.on_commit(lambda: invalidate_menu(changed_ids))
+
+            return JsonResponse({
+                "success": True,
+                "message": (
+                    f"{len(changes)} price(s) would change" if dry_run
+                    else f"Updated {len(changes)} price(s)"
+                ),
+                "dry_run": dry_run,
+                "matched": len(current),
+                "updated": 0 if dry_run else len(changes),
+                "changes": [
+                    {
+                        "dish_id": dish_id,
+                        "name": name,
+                        "old_price": float(old_price),
+                        "new_price": float(new_price)
+                    }
+                    for dish_id, name, old_price, new_price in changes
+                ]
+            })
+
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            import traceback
+            print("Error in BulkUpdateDishPriceView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+    def to_decimal(self, value, label):
+        """
+        Parse a finite number no larger in magnitude than MAX_PRICE, so the
+        arithmetic and quantize() on it stay within the decimal context
+        """
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid {label}")
+        try:
+            value = Decimal(str(value))
+        except (InvalidOperation, TypeError):
+            raise ValueError(f"Invalid {label}")
+        if not value.is_finite():
+            raise ValueError(f"Invalid {label}")
+        if abs(value) > self.MAX_PRICE:
+            raise ValueError(f"Invalid {label}: out of range (max {self.MAX_PRICE})")
+        return value
+
+    def parse_prices(self, prices):
+        """{dish_id: Decimal price} from the explicit price list"""
+        if not isinstance(prices, list) or not prices:
+            raise ValueError("'prices' must be a non-empty list of {dish_id, price}")
+
+        parsed = {}
+        for item in prices:
+            if not isinstance(item, dict):
+                raise ValueError("'prices' must be a non-empty list of {dish_id, price}")
+            try:
+                dish_id = int(item.get('dish_id'))
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid dish_id: {item.get('dish_id')}")
+            price = self.to_decimal(item.get('price'), f"price for dish {dish_id}")
+            try:
+                parsed[dish_id] = price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                raise ValueError(f"Invalid price for dish {dish_id}")
+        return parsed
+
+    def parse_rule(self, rule):
+        """Return (dishes queryset, compute(dish_id, price) -> new price)"""
+        if not isinstance(rule, dict):
+            raise ValueError("'rule' must be an object")
+
+        rules = get_menu_rules()
+        dishes = Dish.objects.filter(is_active=True)
+
+        category = rule.get('category')
+        meal_type = rule.get('meal_type')
+        if category is None and meal_type is None:
+            raise ValueError("Rule needs a category and/or meal_type")
+        if category is not None:
+            if category not in rules.valid_categories:
+                raise ValueError(f"Invalid category. Must be one of: {', '.join(rules.categories)}")
+            dishes = dishes.filter(category=category)
+        if meal_type is not None:
+            if meal_type not in rules.valid_meal_types:
+                raise ValueError(f"Invalid meal_type. Must be one of: {', '.join(rules.meal_types)}")
+            dishes = dishes.filter(meal_type=meal_type)
+
+        if ('percent' in rule) == ('amount' in rule):
+            raise ValueError("Rule needs either 'percent' or 'amount'")
+        if 'percent' in rule:
+            factor = 1 + self.to_decimal(rule['percent'], 'percent') / 100
+            adjust = lambda price: price * factor
+        else:
+            amount = self.to_decimal(rule['amount'], 'amount')
+            adjust = lambda price: price + amount
+
+        step = self.to_decimal(rule.get('round_to', '0.01'), 'round_to')
+        if step <= 0:
+            raise ValueError("round_to must be positive")
+        step = max(step, Decimal('0.01'))
+
+        mode = self.ROUNDING_MODES.get(rule.get('rounding', 'nearest'))
+        if mode is None:
+            raise ValueError(f"rounding must be one of: {', '.join(self.ROUNDING_MODES)}")
+
+        def compute(dish_id, price):
+            """New price, or None when it cannot be represented"""
+            try:
+                steps = (adjust(price) / step).to_integral_value(rounding=mode)
+                return (steps * step).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                return None
+
+        return dishes, compute
+
+
+# ==========================================
+# UPDATE DISH IMAGE
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class UpdateDishImageView(View):
+    def patch(self, request, dish_id):
+        try:
+            dish = Dish.objects.get(id=dish_id)
+            image = request.FILES.get('image')
+            
+            if not image:
+                return JsonResponse({
+                    "error": "Image file is required"
+                }, status=400)
+            
+            # Delete old image if exists
+            if dish.image:
+                dish.image.delete(save=False)
+            
+            dish.image = image
+            dish.save()
+            
+            return JsonResponse({
+                "message": "Dish image updated successfully!",
+                "dish": {
+                    "id": dish.id,
+                    "name": dish.name,
+                    "price": float(dish.price),
+                    "image": request.build_absolute_uri(dish.image.url) if dish.image else None
+                }
+            })
+        
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Dish not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# CREATE ORDER - WITH EXTRAS SUPPORT
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class CreateOrderView(View):
+    """
+    POST - create an order, queue its bill and kitchen tickets
+    
+    Send an Idempotency-Key header (e.g. a UUID per order on the POS) to
+    make retries safe: a repeated key returns the original response with
+    an Idempotent-Replayed header, without creating or printing again.
+    
+    With settings.ORDER_JOURNAL_PATH set, a valid order is written to the
+    local order journal and acknowledged with 202 before it reaches the
+    database (see order_journal.py); the bill number is assigned when the
+    journal is applied. The Idempotency-Key is still recorded in the
+    request (with the 202 response), so replays, the 422 for a reused key
+    and the key TTL behave as above; only when the database cannot be
+    reached is the key just folded into the journal entry's client_id,
+    which stores retries of the same key and body once.
+    """
+    # Order.total_amount / OrderItem.price: max_digits=10, decimal_places=2
+    MAX_AMOUNT = Decimal('99999999.99')
+    MAX_QUANTITY = 9999  # per order line
+    
+    def post(self, request):
+        try:
+            idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+            request_hash = hashlib.sha256(request.body).hexdigest()
+            if idempotency_key:
+                if len(idempotency_key) > 255:
+                    return JsonResponse({"error": "Idempotency-Key must be at most 255 characters"}, status=400)
+                try:
+                    replay = self.replay(idempotency_key, request_hash)
+                except (OperationalError, InterfaceError):
+                    if not journal_enabled():
+                        raise
+                    # Journal mode keeps accepting orders with the database down
+                    replay = None
+                if replay is not None:
+                    return replay
+            
+            data = json.loads(request.body)
+            items_data = data.get('items', [])
+            frontend_total = self.parse_amount(data.get('total_amount', 0))
+            order_type = data.get('order_type', 'dine-in')
+            payment_type = data.get('payment_type', 'cash')
+            addons = data.get('addons', [])
+            
+            self.validate_order_fields(items_data, addons, order_type, payment_type)
+            lines = self.parse_lines(items_data, addons)
+            
+            sold_out = get_sold_out()
+            for dish_id, _, _ in lines:
+                if dish_id in sold_out:
+                    raise ValueError(f"Dish {dish_id} is sold out")
+            
+            # Priced from the in-memory price book: no dish queries
+            dishes = get_price_book().dishes({dish_id for dish_id, _, _ in lines})
+            order_items, backend_total = self.price_lines(lines, dishes, frontend_total)
+            
+            if journal_enabled():
+                order = Order(
+                    total_amount=backend_total,
+                    order_type=order_type,
+                    payment_type=payment_type,
+                    addons=addons,
+                    created_at=timezone.now()
+                )
+                return self.accept_journaled(order, order_items, idempotency_key, request_hash)
+            
+            # Create order with transaction
+            with transaction.atomic():
+                order = Order.objects.create(
+                    total_amount=backend_total,
+                    order_type=order_type,
+                    payment_type=payment_type,
+                    addons=addons  # This might not be needed if you're creating OrderItems for addons
+                )
+                
+                for order_item in order_items:
+                    order_item.order = order
+                OrderItem.objects.bulk_create(order_items)
+                
+                # 🖨️ Queue the bill and the kitchen tickets; background workers
+                # print them after commit, so a slow or offline printer never
+                # delays the order
+                print_job = enqueue_print(order)
+                kot_jobs = enqueue_kots(order, order_items)
+                
+                response_data = self.response_data(order, order_items, print_job, kot_jobs)
+                
+                # Same transaction as the order: a concurrent retry with this
+                # key fails on the unique index, rolls back and replays
+                if idempotency_key:
+                    IdempotencyKey.objects.create(
+                        key=idempotency_key,
+                        request_hash=request_hash,
+                        response=response_data,
+                        status_code=201,
+                        expires_at=timezone.now() + timedelta(seconds=self.idempotency_ttl())
+                    )
+            
+            return JsonResponse(response_data, status=201)
+            
+        except IntegrityError as e:
+            replay = self.replay(idempotency_key, request_hash) if idempotency_key else None
+            if replay is not None:
+                return replay
+            print(f"❌ Order creation error: {str(e)}")
+            return JsonResponse({"error": str(e)}, status=500)
+        except Dish.DoesNotExist:
+            return JsonResponse({"error": "Invalid dish ID"}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            print(f"❌ Order creation error: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return JsonResponse({"error": str(e)}, status=500)
+
+    @staticmethod
+    def response_data(order, order_items, print_job=None, kot_jobs=()):
+        # Build response from the in-memory items (dishes already loaded)
+        order_items = [
+            {
+                "dish_name": item.dish.name,
+                "secondary_name": item.dish.secondary_name,
+                "category": item.dish.get_category_display(),
+                "quantity": item.quantity,
+                "price": float(item.price),
+                "is_extra": item.dish.category == 'extras'
+            }
+            for item in order_items
+        ]
+        
+        # Separate regular items and extras for response
+        regular_items = [item for item in order_items if not item['is_extra']]
+        extras_list = [item for item in order_items if item['is_extra']]
+        
+        order_data = {
+            "id": order.id,
+            "order_type": order.get_order_type_display(),
+            "payment_type": order.get_payment_type_display(),
+            "created_at": order.created_at.isoformat(),
+            "total_amount": float(order.total_amount),
+            "items": regular_items,
+            "extras": extras_list,
+            # success: the bill was queued; poll print-jobs/<job_id>/ for the outcome
+            "print_status": {
+                "success": True,
+                "queued": True,
+                "job_id": print_job.id,
+                "status": print_job.status,
+                "kot_jobs": [
+                    {"job_id": job.id, "station": job.station.name}
+                    for job in kot_jobs
+                ],
+                "error": None
+            } if print_job is not None else {
+                # Journaled: the bill is queued once the order reaches the database
+                "success": True,
+                "queued": False,
+                "journaled": True,
+                "job_id": None,
+                "status": "journaled",
+                "kot_jobs": [],
+                "error": None
+            }
+        }
+        
+        return {
+            "message": "Order created successfully! Bill queued for printing.",
+            "order": order_data
+        }
+
+    def accept_journaled(self, order, order_items, idempotency_key, request_hash):
+        """
+        Journal a priced, unsaved order and acknowledge it with 202
+
+        The Idempotency-Key is recorded before the order is journaled (and
+        removed again if journaling fails). If the database cannot be
+        reached the key is not recorded; the entry's client_id is derived
+        from the key and body instead, so retries during the outage are
+        stored once.
+        """
+        order.client_id = f"journal-{uuid.uuid4().hex}"
+        response_data = self.response_data(order, order_items)
+        response_data["message"] = "Order accepted! It will be saved and printed shortly."
+        response_data["order"]["client_id"] = order.client_id
+        
+        key_record = None
+        if idempotency_key:
+            try:
+                key_record = IdempotencyKey.objects.create(
+                    key=idempotency_key,
+                    request_hash=request_hash,
+                    response=response_data,
+                    status_code=202,
+                    expires_at=timezone.now() + timedelta(seconds=self.idempotency_ttl())
+                )
+            except (OperationalError, InterfaceError):
+                order.client_id = "idem-" + hashlib.sha256(
+                    f"{idempotency_key}:{request_hash}".encode()
+                ).hexdigest()
+                response_data["order"]["client_id"] = order.client_id
+        
+        try:
+            journal_order(order, order_items, order.client_id)
+        except Exception:
+            if key_record is not None:
+                key_record.delete()
+            raise
+        return JsonResponse(response_data, status=202)
+
+    @staticmethod
+    def idempotency_ttl():
+        return getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', 24 * 60 * 60)
+
+    @staticmethod
+    def replay(idempotency_key, request_hash):
+        """Stored response for a live key, or None when the request is new"""
+        stored = IdempotencyKey.objects.filter(key=idempotency_key).first()
+        if stored is None:
+            return None
+        
+        if stored.expires_at <= timezone.now():
+            # Not purged yet: the key is free again
+            stored.delete()
+            return None
+        
+        if stored.request_hash != request_hash:
+            return JsonResponse({
+                "error": "Idempotency-Key was already used for a different order"
+            }, status=422)
+        
+        response = JsonResponse(stored.response, status=stored.status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    @staticmethod
+    def validate_order_fields(items_data, addons, order_type, payment_type):
+        # ✅ FIXED: Allow orders with ONLY addons/extras
+        if not items_data and not addons:
+            raise ValueError("Order must contain at least one item or extra")
+        
+        # Validate order_type
+        valid_order_types = [choice[0] for choice in Order.ORDER_TYPE_CHOICES]
+        if order_type not in valid_order_types:
+            raise ValueError(f"Invalid order_type. Must be one of: {', '.join(valid_order_types)}")
+        
+        # Validate payment_type
+        valid_payment_types = [choice[0] for choice in Order.PAYMENT_TYPE_CHOICES]
+        if payment_type not in valid_payment_types:
+            raise ValueError(f"Invalid payment_type. Must be one of: {', '.join(valid_payment_types)}")
+
+    @classmethod
+    def parse_lines(cls, items_data, addons):
+        """Order lines as (dish_id, quantity, is_addon)"""
+        lines = []
+        for item in items_data:
+            dish_id = item.get('dish_id')
+            quantity = int(item.get('quantity', 1))
+            
+            if quantity <= 0 or quantity > cls.MAX_QUANTITY:
+                raise ValueError(f"Invalid quantity for dish {dish_id}")
+            
+            lines.append((cls.parse_dish_id(dish_id), quantity, False))
+        
+        # ✅ IMPROVED: Handle addons/extras (even if no main items)
+        for addon in addons:
+            addon_quantity = int(addon.get('quantity', 0))
+            if addon_quantity > cls.MAX_QUANTITY:
+                raise ValueError(f"Invalid quantity for dish {addon.get('dish_id')}")
+            if addon_quantity > 0:
+                lines.append((cls.parse_dish_id(addon.get('dish_id')), addon_quantity, True))
+        return lines
+
+    @classmethod
+    def parse_amount(cls, value):
+        """A money amount from JSON (number or string) as an exact Decimal"""
+        try:
+            # Through str(): Decimal(25.1) would keep the float's binary error
+            amount = Decimal(str(value))
+            if not amount.is_finite() or abs(amount) > cls.MAX_AMOUNT:
+                raise ValueError
+            return amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        except (InvalidOperation, ValueError):
+            raise ValueError("Invalid total_amount")
+
+    @classmethod
+    def price_lines(cls, lines, dishes, frontend_total, allow_inactive=False):
+        """
+        Unsaved OrderItems and the backend total for parsed lines, priced
+        from `dishes` ({id: Dish}, e.g. from the price book); raises if the
+        frontend total (a Decimal) disagrees
+        """
+        backend_total = Decimal('0.00')
+        order_items = []
+        for dish_id, quantity, is_addon in lines:
+            dish = dishes.get(dish_id)
+            if dish is None:
+                raise Dish.DoesNotExist
+            if not dish.is_active and not allow_inactive:
+                raise ValueError(f"Dish {dish_id} is no longer available")
+            # Verify addons are actually extras
+            if is_addon and dish.category != 'extras':
+                raise ValueError(f"Dish {dish_id} is not an extra item")
+            
+            line_price = dish.price * quantity
+            backend_total += line_price
+            order_items.append(OrderItem(dish=dish, quantity=quantity, price=line_price))
+        
+        if backend_total > cls.MAX_AMOUNT:
+            raise ValueError(f"Order total exceeds ₹{cls.MAX_AMOUNT}")
+        
+        # Verify total (even if only extras), to the paisa
+        if frontend_total != backend_total:
+            raise ValueError(
+                f"Total mismatch! Frontend sent ₹{frontend_total}, "
+                f"backend calculated ₹{backend_total}"
+            )
+        return order_items, backend_total
+
+    @staticmethod
+    def parse_dish_id(dish_id):
+        try:
+            return int(dish_id)
+        except (TypeError, ValueError):
+            raise Dish.DoesNotExist
+
+# ==========================================
+# OFFLINE ORDER SYNC
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class OrderSyncView(View):
+    """
+    POST - store orders a terminal queued while the backend was unreachable
+    
+    {"orders": [{"client_id": "...", "created_at": "<ISO 8601>", "items": [...],
+                 "addons": [...], "total_amount": ..., "order_type": ..., "payment_type": ...}]}
+    
+    Orders are validated like orders/create/, priced from one snapshot of
+    the referenced dishes, and inserted with bulk_create in chunks keeping
+    the terminal's created_at. Bills are not printed. Results come back per
+    order, in request order: created, duplicate (client_id already stored)
+    or error; invalid orders do not stop the others.
+    """
+    MAX_ORDERS = 1000
+    CHUNK_SIZE = 200
+    # Terminal clocks drift; later timestamps are rejected
+    MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            orders_data = data.get('orders')
+            if not isinstance(orders_data, list) or not orders_data:
+                return JsonResponse({"error": "orders must be a non-empty list"}, status=400)
+            if len(orders_data) > self.MAX_ORDERS:
+                return JsonResponse({
+                    "error": f"At most {self.MAX_ORDERS} orders per sync"
+                }, status=400)
+            
+            results = [None] * len(orders_data)
+            client_ids = {
+                str(entry.get('client_id')).strip()
+                for entry in orders_data
+                if isinstance(entry, dict) and entry.get('client_id')
+            }
+            stored = dict(
+                Order.objects.filter(client_id__in=client_ids).values_list('client_id', 'id')
+            )
+            
+            # Pass 1: validate and parse every order
+            parsed = []  # (index, client_id, created_at, entry, lines)
+            first_index = {}  # client_id -> index of its first occurrence in this batch
+            for index, entry in enumerate(orders_data):
+                client_id = None
+                try:
+                    if not isinstance(entry, dict):
+                        raise ValueError("Each order must be an object")
+                    client_id = str(entry.get('client_id') or '').strip()
+                    if not client_id:
+                        raise ValueError("client_id is required")
+                    if len(client_id) > 100:
+                        raise ValueError("client_id must be at most 100 characters")
+                    
+                    if client_id in stored or client_id in first_index:
+                        results[index] = {
+                            "client_id": client_id,
+                            "status": "duplicate",
+                            "order_id": stored.get(client_id)
+                        }
+                        continue
+                    first_index[client_id] = index
+                    
+                    items_data = entry.get('items', [])
+                    addons = entry.get('addons', [])
+                    CreateOrderView.validate_order_fields(
+                        items_data, addons,
+                        entry.get('order_type', 'dine-in'),
+                        entry.get('payment_type', 'cash')
+                    )
+                    parsed.append((
+                        index,
+                        client_id,
+                        self.parse_created_at(entry.get('created_at')),
+                        entry,
+                        CreateOrderView.parse_lines(items_data, addons)
+                    ))
+                except Dish.DoesNotExist:
+                    results[index] = self.error(client_id, "Invalid dish ID")
+                except (ValueError, TypeError, AttributeError) as e:
+                    results[index] = self.error(client_id, str(e))
+            
+            # Pass 2: price against one snapshot (the price book) of every
+            # referenced dish; dishes removed since the order was taken
+            # offline are still accepted
+            dishes = get_price_book().dishes({
+                dish_id for _, _, _, _, lines in parsed for dish_id, _, _ in lines
+            })
+            pending = []  # (index, order, created_at, order_items)
+            for index, client_id, created_at, entry, lines in parsed:
+                try:
+                    order_items, total = CreateOrderView.price_lines(
+                        lines, dishes,
+                        CreateOrderView.parse_amount(entry.get('total_amount', 0)),
+                        allow_inactive=True
+                    )
+                except Dish.DoesNotExist:
+                    results[index] = self.error(client_id, "Invalid dish ID")
+                    continue
+                except (ValueError, TypeError) as e:
+                    results[index] = self.error(client_id, str(e))
+                    continue
+                
+                order = Order(
+                    total_amount=total,
+                    order_type=entry.get('order_type', 'dine-in'),
+                    payment_type=entry.get('payment_type', 'cash'),
+                    addons=entry.get('addons', []),
+                    client_id=client_id
+                )
+                pending.append((index, order, created_at, order_items))
+            
+            # Pass 3: insert everything valid in one transaction
+            if pending:
+                orders = [order for _, order, _, _ in pending]
+                with transaction.atomic():
+                    Order.objects.bulk_create(orders, batch_size=self.CHUNK_SIZE)
+                    
+                    # created_at is auto_now_add, so bulk_create stamped it
+                    # with now; restore the terminal's times for analytics
+                    for _, order, created_at, _ in pending:
+                        order.created_at = created_at
+                    Order.objects.bulk_update(orders, ['created_at'], batch_size=self.CHUNK_SIZE)
+                    
+                    all_items = []
+                    for _, order, _, order_items in pending:
+                        for order_item in order_items:
+                            order_item.order = order
+                        all_items.extend(order_items)
+                    OrderItem.objects.bulk_create(all_items, batch_size=self.CHUNK_SIZE)
+                
+                for index, order, _, _ in pending:
+                    results[index] = {
+                        "client_id": order.client_id,
+                        "status": "created",
+                        "order_id": order.id
+                    }
+            
+            # Repeats within the batch point at the order their first copy made
+            for result in results:
+                if result["status"] == "duplicate" and result["order_id"] is None:
+                    first = results[first_index[result["client_id"]]]
+                    result["order_id"] = first.get("order_id")
+            
+            counts = defaultdict(int)
+            for result in results:
+                counts[result["status"]] += 1
+            
+            return JsonResponse({
+                "created": counts["created"],
+                "duplicates": counts["duplicate"],
+                "errors": counts["error"],
+                "results": results
+            })
+            
+        except IntegrityError:
+            # Another sync stored one of these client_ids first; a retry
+            # reports it as a duplicate
+            return JsonResponse({
+                "error": "Some orders were synced concurrently; retry the batch"
+            }, status=409)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            print(f"❌ Order sync error: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return JsonResponse({"error": str(e)}, status=500)
+
+    @classmethod
+    def parse_created_at(cls, value):
+        created_at = parse_datetime(value) if isinstance(value, str) else None
+        if created_at is None:
+            raise ValueError("created_at must be an ISO 8601 datetime")
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        if created_at > timezone.now() + cls.MAX_CLOCK_SKEW:
+            raise ValueError("created_at is in the future")
+        return created_at
+
+    @staticmethod
+    def error(client_id, message):
+        return {"client_id": client_id or None, "status": "error", "error": message}
+
+
+# ==========================================
+# PRINT JOBS (REPRINT / STATUS)
+# ==========================================
+def print_job_data(job):
+    return {
+        "id": job.id,
+        "order_id": job.order_id,
+        "kind": job.kind,
+        "station": job.station.name if job.station_id else None,
+        "backend": job.backend,
+        "status": job.status,
+        "attempts": job.attempts,
+        "last_error": job.last_error or None,
+        "next_attempt_at": job.next_attempt_at.isoformat() if job.status == 'queued' else None,
+        "printed_at": job.printed_at.isoformat() if job.printed_at else None,
+        "created_at": job.created_at.isoformat()
+    }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class OrderPrintView(View):
+    """
+    GET  - print jobs of an order, newest first
+    POST - reprint the bill (queues a new job); {"kind": "kot"} reprints
+           the kitchen order tickets instead
+    """
+    def get(self, request, order_id):
+        try:
+            if not Order.objects.filter(id=order_id).exists():
+                return JsonResponse({"error": "Order not found"}, status=404)
+
+            jobs = PrintJob.objects.filter(order_id=order_id).select_related('station').order_by('-created_at', '-id')
+            return JsonResponse({
+                "order_id": order_id,
+                "jobs": [print_job_data(job) for job in jobs]
+            })
+
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+    def post(self, request, order_id):
+        try:
+            data = json.loads(request.body) if request.content_type == 'application/json' and request.body else {}
+            kind = data.get('kind', 'bill')
+            order = Order.objects.get(id=order_id)
+
+            if kind == 'kot':
+                with transaction.atomic():
+                    jobs = enqueue_kots(order, list(order.items.select_related('dish')))
+                return JsonResponse({
+                    "message": f"Reprint of {len(jobs)} kitchen ticket(s) for Order #{order.id} queued",
+                    "jobs": [print_job_data(job) for job in jobs]
+                }, status=202)
+            if kind != 'bill':
+                return JsonResponse({"error": "Invalid kind. Must be one of: bill, kot"}, status=400)
+
+            job = enqueue_print(order)
+
+            return JsonResponse({
+                "message": f"Reprint of Bill #{order.id} queued",
+                "job": print_job_data(job)
+            }, status=202)
+
+        except Order.DoesNotExist:
+            return JsonResponse({"error": "Order not found"}, status=404)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+class OrderBillView(View):
+    """
+    Rendered bill of an order (same layout the printers get)
+    ?format=text (default) | png | escpos
+    """
+    CONTENT_TYPES = {
+        'text': 'text/plain; charset=utf-8',
+        'png': 'image/png',
+        'escpos': 'application/octet-stream',
+    }
+
+    def get(self, request, order_id):
+        try:
+            fmt = request.GET.get('format', 'text').lower()
+            if fmt not in self.CONTENT_TYPES:
+                return JsonResponse({
+                    "error": f"Invalid format. Must be one of: {', '.join(self.CONTENT_TYPES)}"
+                }, status=400)
+
+            order = Order.objects.get(id=order_id)
+            response = HttpResponse(render_bill(order, fmt), content_type=self.CONTENT_TYPES[fmt])
+            if fmt == 'escpos':
+                response['Content-Disposition'] = f'attachment; filename="bill-{order.id}.bin"'
+            return response
+
+        except Order.DoesNotExist:
+            return JsonResponse({"error": "Order not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+class PrintJobDetailView(View):
+    def get(self, request, job_id):
+        try:
+            job = PrintJob.objects.get(id=job_id)
+            return JsonResponse(print_job_data(job))
+
+        except PrintJob.DoesNotExist:
+            return JsonResponse({"error": "Print job not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# ORDER HISTORY VIEW
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class OrderHistoryView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            start_time = data.get('start_time')
+            end_time = data.get('end_time')
+            
+            if not start_time or not end_time:
+                return JsonResponse({
+                    "error": "start_time and end_time are required"
+                }, status=400)
+            
+            # Parse datetime strings
+            try:
+                start_date = parse_datetime(start_time)
+                end_date = parse_datetime(end_time)
+                
+                if not start_date or not end_date:
+                    raise ValueError("Invalid datetime format")
+                
+                # Make timezone aware if needed
+                if timezone.is_naive(start_date):
+                    start_date = timezone.make_aware(start_date)
+                if timezone.is_naive(end_date):
+                    end_date = timezone.make_aware(end_date)
+                    
+            except Exception as e:
+                return JsonResponse({
+                    'error': f'Invalid datetime format: {str(e)}'
+                }, status=400)
+            
+            # Query orders in date range
+            orders = Order.objects.filter(
+                created_at__gte=start_date,
+                created_at__lte=end_date
+            ).prefetch_related('items__dish').order_by('-created_at')
+            
+            # Build response
+            data = []
+            for order in orders:
+                order_items = []
+                for item in order.items.all():
+                    order_items.append({
+                        "dish_name": item.dish.name,
+                        "secondary_name": item.dish.secondary_name,
+                        "category": item.dish.get_category_display(),
+                        "quantity": item.quantity,
+                        "price": float(item.price)
+                    })
+                
+                order_info = {
+                    "id": order.id,
+                    "order_type": order.get_order_type_display(),
+                    "payment_type": order.get_payment_type_display(),
+                    "created_at": order.created_at.isoformat(),
+                    "total_amount": float(order.total_amount),
+                    "items": order_items,
+                    "addons": order.addons or []
+                }
+                data.append(order_info)
+            
+            # Calculate summary
+            total_orders = orders.count()
+            total_revenue = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+            
+            return JsonResponse({
+                "orders": data,
+                "summary": {
+                    "total_orders": total_orders,
+                    "total_revenue": float(total_revenue),
+                    "start_time": start_date.isoformat(),
+                    "end_time": end_date.isoformat()
+                }
+            }, safe=False)
+            
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+# ==========================================
+# GET ORDER DETAILS BY ID
+# ==========================================
+class OrderDetailView(View):
+    def get(self, request, order_id):
+        try:
+            order = Order.objects.prefetch_related('items__dish').get(id=order_id)
+            
+            order_items = []
+            for item in order.items.all():
+                order_items.append({
+                    "dish_id": item.dish.id,
+                    "dish_name": item.dish.name,
+                    "secondary_name": item.dish.secondary_name,
+                    "category": item.dish.get_category_display(),
+                    "quantity": item.quantity,
+                    "unit_price": float(item.dish.price),
+                    "subtotal": float(item.price)
+                })
+            
+            order_data = {
+                "id": order.id,
+                "order_type": order.get_order_type_display(),
+                "payment_type": order.get_payment_type_display(),
+                "created_at": order.created_at.isoformat(),
+                "total_amount": float(order.total_amount),
+                "items": order_items,
+                "addons": order.addons or []
+            }
+            
+            return JsonResponse(order_data)
+        
+        except Order.DoesNotExist:
+            return JsonResponse({"error": "Order not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+
+# ==========================================
+# DISH SALES IN PERIOD
+# ==========================================
+@csrf_exempt
+def dish_sales_in_period(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST method allowed'}, status=405)
+
+    try:
+        body = json.loads(request.body)
+        start = body.get('start')
+        end = body.get('end')
+        dish_id = body.get('dish_id')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON format'}, status=400)
+
+    if not start or not end:
+        return JsonResponse({'error': 'Missing required fields: start and end'}, status=400)
+
+    try:
+        start_date = parse_datetime(start)
+        end_date = parse_datetime(end)
+        if not start_date or not end_date:
+            raise ValueError
+    except Exception:
+        return JsonResponse({'error': 'Invalid datetime format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS)'}, status=400)
+
+    # ORM aggregation to count sold quantity
+    total_sales = (
+        OrderItem.objects
+        .filter(dish_id=dish_id, order__created_at__range=[start_date, end_date])
+        .aggregate(total_quantity=Sum('quantity'))['total_quantity']
+    ) or 0
+
+    return JsonResponse({
+        'dish_id': dish_id,
+        'start': start,
+        'end': end,
+        'total_quantity_sold': total_sales
+    })
+
+# expenditure
+
+def get_date_range(filter_type, start_date_str=None, end_date_str=None):
+    today = timezone.now().date()
+    if filter_type == 'today':
+        return today,  today 
+    elif filter_type == 'week':
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+        return start, end
+    elif filter_type == 'month':
+        start = today.replace(day=1)
+        end = today
+        return start, end
+    elif start_date_str and end_date_str:
+        return parse_date(start_date_str), parse_date(end_date_str)
+    else:
+        return None, None
+
+# ==========================================
+# WORKER VIEWS
+# ==========================================
+class WorkerListView(View):
+    def get(self, request):
+        try:
+            workers = Worker.objects.filter(is_active=True).order_by('name')
+            
+            data = [{
+                'id': worker.id,
+                'name': worker.name,
+                'role': worker.role,
+                'role_display': worker.get_role_display(),
+                'contact': worker.contact,
+                'joined_date': worker.joined_date.isoformat() if worker.joined_date else None,
+            } for worker in workers]
+            
+            return JsonResponse(data, safe=False)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WorkerCreateView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            
+            worker = Worker.objects.create(
+                name=data.get('name'),
+                role=data.get('role', 'worker'),
+                contact=data.get('contact', '')
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'worker': {
+                    'id': worker.id,
+                    'name': worker.name,
+                    'role': worker.role,
+                    'role_display': worker.get_role_display()
+                }
+            })
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+
+# ==========================================
+# MATERIAL VIEWS
+# ==========================================
+class MaterialListView(View):
+    def get(self, request):
+        try:
+            materials = Material.objects.filter(is_active=True).order_by('name')
+            
+            data = [{
+                'id': material.id,
+                'name': material.name,
+                'unit': material.unit,
+                'unit_display': material.get_unit_display(),
+                'description': material.description,
+            } for material in materials]
+            
+            return JsonResponse(data, safe=False)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MaterialCreateView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            
+            material = Material.objects.create(
+                name=data.get('name'),
+                unit=data.get('unit', 'piece'),
+                description=data.get('description', '')
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'material': {
+                    'id': material.id,
+                    'name': material.name,
+                    'unit': material.unit,
+                    'unit_display': material.get_unit_display()
+                }
+            })
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+
+# ==========================================
+# EXPENSE VIEWS
+# ==========================================
+@method_decorator(csrf_exempt, name='dispatch')
+class ExpenseFilterView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            filter_type = data.get('filter_type', 'today')
+            expense_type = data.get('expense_type', 'all')  # 'all', 'worker', 'material'
+            
+            # Date filtering
+            today = datetime.now().date()
+            if filter_type == 'today':
+                start_date = today
+                end_date = today
+            elif filter_type == 'week':
+                start_date = today - timedelta(days=today.weekday())
+                end_date = today
+            elif filter_type == 'month':
+                start_date = today.replace(day=1)
+                end_date = today
+            elif filter_type == 'custom':
+                start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
+                end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
+            else:
+                start_date = today
+                end_date = today
+            
+            # Query expenses
+            expenses = Expense.objects.filter(
+                timestamp__date__gte=start_date,
+                timestamp__date__lte=end_date
+            )
+            
+            # Filter by expense type
+            if expense_type == 'worker':
+                expenses = expenses.filter(expense_type='worker')
+            elif expense_type == 'material':
+                expenses = expenses.filter(expense_type='material')
+            
+            expenses = expenses.select_related('worker').prefetch_related('items__material')
+            
+            # Build response
+            expenses_data = []
+            for expense in expenses:
+                expense_dict = {
+                    'id': expense.id,
+                    'expense_type': expense.expense_type,
+                    'expense_type_display': expense.get_expense_type_display(),
+                    'description': expense.description,
+                    'total_amount': str(expense.total_amount),
+                    'timestamp': expense.timestamp.isoformat(),
+                    'notes': expense.notes,
+                }
+                
+                if expense.expense_type == 'worker' and expense.worker:
+                    expense_dict.update({
+                        'worker': expense.worker.name,
+                        'worker_id': expense.worker.id,
+                        'worker_role': expense.worker.get_role_display(),
+                        'category': expense.worker_category,
+                        'category_display': expense.get_worker_category_display() if expense.worker_category else 'N/A',
+                    })
+                elif expense.expense_type == 'material':
+                    items = [{
+                        'material': item.material.name,
+                        'material_id': item.material.id,
+                        'quantity': str(item.quantity),
+                        'unit': item.material.get_unit_display(),
+                        'unit_price': str(item.unit_price),
+                        'subtotal': str(item.subtotal),
+                    } for item in expense.items.all()]
+                    expense_dict['items'] = items
+                
+                expenses_data.append(expense_dict)
+            
+            # Calculate summaries
+            total_amount = expenses.aggregate(total=Sum('total_amount'))['total'] or 0
+            
+            worker_total = expenses.filter(expense_type='worker').aggregate(
+                total=Sum('total_amount'))['total'] or 0
+            
+            material_total = expenses.filter(expense_type='material').aggregate(
+                total=Sum('total_amount'))['total'] or 0
+            
+            # Worker-wise summary
+            worker_summary = {}
+            for expense in expenses.filter(expense_type='worker'):
+                if expense.worker:
+                    worker_name = expense.worker.name
+                    if worker_name not in worker_summary:
+                        worker_summary[worker_name] = {
+                            'worker_id': expense.worker.id,
+                            'role': expense.worker.get_role_display(),
+                            'total': 0,
+                            'count': 0
+                        }
+                    worker_summary[worker_name]['total'] += float(expense.total_amount)
+                    worker_summary[worker_name]['count'] += 1
+            
+            # Material-wise summary
+            material_summary = {}
+            for expense in expenses.filter(expense_type='material'):
+                for item in expense.items.all():
+                    material_name = item.material.name
+                    if material_name not in material_summary:
+                        material_summary[material_name] = {
+                            'material_id': item.material.id,
+                            'unit': item.material.get_unit_display(),
+                            'total_quantity': 0,
+                            'total_amount': 0,
+                            'count': 0
+                        }
+                    material_summary[material_name]['total_quantity'] += float(item.quantity)
+                    material_summary[material_name]['total_amount'] += float(item.subtotal)
+                    material_summary[material_name]['count'] += 1
+            
+            return JsonResponse({
+                'expenses': expenses_data,
+                'summary': {
+                    'total_amount': str(total_amount),
+                    'worker_total': str(worker_total),
+                    'material_total': str(material_total),
+                    'total_count': len(expenses_data),
+                    'worker_count': len([e for e in expenses_data if e['expense_type'] == 'worker']),
+                    'material_count': len([e for e in expenses_data if e['expense_type'] == 'material']),
+                },
+                'worker_summary': worker_summary,
+                'material_summary': material_summary,
+                'date_range': {
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat(),
+                    'filter_type': filter_type
+                }
+            })
+        
+        except Exception as e:
+            import traceback
+            print("Error in ExpenseFilterView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AddWorkerExpenseView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            
+            worker_id = data.get('worker_id')
+            category = data.get('category', 'wage')
+            description = data.get('description', '')
+            amount = data.get('amount')
+            
+            if not worker_id or not amount:
+                return JsonResponse({"error": "Worker and amount are required"}, status=400)
+            
+            worker = Worker.objects.get(id=worker_id)
+            
+            expense = Expense.objects.create(
+                expense_type='worker',
+                worker=worker,
+                worker_category=category,
+                description=description or f"{category.title()} - {worker.name}",
+                total_amount=amount
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'expense': {
+                    'id': expense.id,
+                    'worker': worker.name,
+                    'category': expense.get_worker_category_display(),
+                    'amount': str(expense.total_amount)
+                }
+            })
+        
+        except Worker.DoesNotExist:
+            return JsonResponse({"error": "Worker not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AddMaterialExpenseView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            
+            description = data.get('description', 'Material Purchase')
+            items_data = data.get('items', [])
+            
+            if not items_data:
+                return JsonResponse({"error": "At least one material item is required"}, status=400)
+            
+            with transaction.atomic():
+                # Create expense
+                expense = Expense.objects.create(
+                    expense_type='material',
+                    description=description,
+                    total_amount=0  # Will be calculated from items
+                )
+                
+                # Create expense items
+                for item_data in items_data:
+                    material = Material.objects.get(id=item_data['material_id'])
+                    
+                    ExpenseItem.objects.create(
+                        expense=expense,
+                        material=material,
+                        quantity=item_data['quantity'],
+                        unit_price=item_data['unit_price']
+                    )
+                
+                # Recalculate total
+                expense.save()
+                
+                return JsonResponse({
+                    'success': True,
+                    'expense': {
+                        'id': expense.id,
+                        'description': expense.description,
+                        'total_amount': str(expense.total_amount),
+                        'items_count': len(items_data)
+                    }
+                })
+        
+        except Material.DoesNotExist:
+            return JsonResponse({"error": "Material not found"}, status=404)
+        except Exception as e:
+            import traceback
+            print("Error in AddMaterialExpenseView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=400)
+        
+# delete api for the expense and material , worker
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WorkerDeleteView(View):
+    def delete(self, request, worker_id):
+        try:
+            worker = Worker.objects.get(id=worker_id, is_active=True)
+            
+            # Soft delete - set is_active to False
+            worker.is_active = False
+            worker.save()
+            
+            return JsonResponse({
+                'success': True,
+                'message': f'Worker {worker.name} deleted successfully'
+            })
+        
+        except Worker.DoesNotExist:
+            return JsonResponse({"error": "Worker not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MaterialDeleteView(View):
+    def delete(self, request, material_id):
+        try:
+            material = Material.objects.get(id=material_id, is_active=True)
+            
+            # Check if material is used in any expense items
+            expense_items_count = ExpenseItem.objects.filter(material=material).count()
+            
+            if expense_items_count > 0:
+                # Soft delete if material is referenced
+                material.is_active = False
+                material.save()
+                return JsonResponse({
+                    'success': True,
+                    'message': f'Material {material.name} marked as inactive (used in {expense_items_count} expense items)'
+                })
+            else:
+                # Hard delete if not referenced
+                material_name = material.name
+                material.delete()
+                return JsonResponse({
+                    'success': True,
+                    'message': f'Material {material_name} deleted successfully'
+                })
+        
+        except Material.DoesNotExist:
+            return JsonResponse({"error": "Material not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ExpenseDeleteView(View):
+    def delete(self, request, expense_id):
+        try:
+            expense = Expense.objects.get(id=expense_id)
+            
+            with transaction.atomic():
+                # Delete related expense items first (if material expense)
+                if expense.expense_type == 'material':
+                    expense.items.all().delete()
+                
+                # Delete the expense
+                expense_type = expense.get_expense_type_display()
+                expense_desc = expense.description
+                expense.delete()
+                
+                return JsonResponse({
+                    'success': True,
+                    'message': f'{expense_type} expense "{expense_desc}" deleted successfully'
+                })
+        
+        except Expense.DoesNotExist:
+            return JsonResponse({"error": "Expense not found"}, status=404)
+        except Exception as e:
+            import traceback
+            print("Error in ExpenseDeleteView:")
+            print(traceback.format_exc())
+            return JsonResponse({"error": str(e)}, status=400)
+
+
+# ==========================================
+# COMPLETE ANALYTICS DASHBOARD VIEW
+# ==========================================
+class AnalyticsDashboardView(APIView):
+    """
+    Complete analytics dashboard with shift-wise analysis
+    Afternoon: 10:00 AM - 4:00 PM
+    Night: 4:00 PM - 4:00 AM (next day)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            # Get date parameters
+            date_str = request.GET.get('date')
+            filter_type = request.GET.get('filter', 'today')
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            # Determine target date
+            if filter_type == 'today' or not date_str:
+                target_date = timezone.now().astimezone(tz).date()
+            elif filter_type == 'yesterday':
+                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
+            else:
+                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            
+            # Shift times
+            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
+            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
+            
+            # Convert to UTC for queries
+            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+            night_start_utc = night_start.astimezone(pytz.UTC)
+            night_end_utc = night_end.astimezone(pytz.UTC)
+            
+            # Previous night closing for opening balance
+            previous_date = target_date - timedelta(days=1)
+            previous_night_start = tz.localize(datetime.combine(previous_date, time(16, 0)))
+            previous_night_end = tz.localize(datetime.combine(target_date, time(4, 0)))
+            previous_night_start_utc = previous_night_start.astimezone(pytz.UTC)
+            previous_night_end_utc = previous_night_end.astimezone(pytz.UTC)
+            
+            previous_revenue = Order.objects.filter(
+                created_at__gte=previous_night_start_utc,
+                created_at__lt=previous_night_end_utc
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            previous_expenses = Expense.objects.filter(
+                timestamp__gte=previous_night_start_utc,
+                timestamp__lt=previous_night_end_utc
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            opening_balance = previous_revenue - previous_expenses
+            
+            # AFTERNOON SHIFT
+            afternoon_orders = Order.objects.filter(
+                created_at__gte=afternoon_start_utc,
+                created_at__lt=afternoon_end_utc
+            )
+            
+            afternoon_revenue = afternoon_orders.aggregate(
+                total=Coalesce(Sum('total_amount'), Decimal('0.00'))
+            )['total']
+            afternoon_order_count = afternoon_orders.count()
+            
+            afternoon_expenses = Expense.objects.filter(
+                timestamp__gte=afternoon_start_utc,
+                timestamp__lt=afternoon_end_utc
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            afternoon_profit = afternoon_revenue - afternoon_expenses
+            afternoon_closing = opening_balance + afternoon_profit
+            
+            # Afternoon top dishes
+            afternoon_top_dishes = OrderItem.objects.filter(
+                order__created_at__gte=afternoon_start_utc,
+                order__created_at__lt=afternoon_end_utc
+            ).values(
+                'dish__id',
+                'dish__name',
+                'dish__secondary_name',
+                'dish__category',
+                'dish__meal_type',
+                'dish__price'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+                order_count=Count('order', distinct=True)
+            ).order_by('-total_quantity')[:10]
+            
+            # NIGHT SHIFT
+            night_orders = Order.objects.filter(
+                created_at__gte=night_start_utc,
+                created_at__lt=night_end_utc
+            )
+            
+            night_revenue = night_orders.aggregate(
+                total=Coalesce(Sum('total_amount'), Decimal('0.00'))
+            )['total']
+            night_order_count = night_orders.count()
+            
+            night_expenses = Expense.objects.filter(
+                timestamp__gte=night_start_utc,
+                timestamp__lt=night_end_utc
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            night_profit = night_revenue - night_expenses
+            night_opening = afternoon_closing
+            night_closing = night_opening + night_profit
+            
+            # Night top dishes
+            night_top_dishes = OrderItem.objects.filter(
+                order__created_at__gte=night_start_utc,
+                order__created_at__lt=night_end_utc
+            ).values(
+                'dish__id',
+                'dish__name',
+                'dish__secondary_name',
+                'dish__category',
+                'dish__meal_type',
+                'dish__price'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+                order_count=Count('order', distinct=True)
+            ).order_by('-total_quantity')[:10]
+            
+            # OVERALL
+            total_revenue = afternoon_revenue + night_revenue
+            total_expenses = afternoon_expenses + night_expenses
+            total_profit = total_revenue - total_expenses
+            total_orders = afternoon_order_count + night_order_count
+            
+            # Overall top dishes
+            overall_top_dishes = OrderItem.objects.filter(
+                Q(order__created_at__gte=afternoon_start_utc, order__created_at__lt=afternoon_end_utc) |
+                Q(order__created_at__gte=night_start_utc, order__created_at__lt=night_end_utc)
+            ).values(
+                'dish__id',
+                'dish__name',
+                'dish__secondary_name',
+                'dish__category',
+                'dish__meal_type',
+                'dish__price'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+                order_count=Count('order', distinct=True)
+            ).order_by('-total_quantity')[:10]
+            
+            # Expense breakdown
+            afternoon_expense_breakdown = Expense.objects.filter(
+                timestamp__gte=afternoon_start_utc,
+                timestamp__lt=afternoon_end_utc
+            ).values('expense_type').annotate(total=Sum('total_amount'))
+            
+            night_expense_breakdown = Expense.objects.filter(
+                timestamp__gte=night_start_utc,
+                timestamp__lt=night_end_utc
+            ).values('expense_type').annotate(total=Sum('total_amount'))
+            
+            # Payment breakdown
+            afternoon_payment_breakdown = afternoon_orders.values('payment_type').annotate(
+                count=Count('id'),
+                total=Sum('total_amount')
+            )
+            
+            night_payment_breakdown = night_orders.values('payment_type').annotate(
+                count=Count('id'),
+                total=Sum('total_amount')
+            )
+            
+            # Order type breakdown
+            afternoon_order_type = afternoon_orders.values('order_type').annotate(
+                count=Count('id'),
+                total=Sum('total_amount')
+            )
+            
+            night_order_type = night_orders.values('order_type').annotate(
+                count=Count('id'),
+                total=Sum('total_amount')
+            )
+            
+            # Average order value
+            afternoon_avg_order = afternoon_revenue / afternoon_order_count if afternoon_order_count > 0 else Decimal('0.00')
+            night_avg_order = night_revenue / night_order_count if night_order_count > 0 else Decimal('0.00')
+            
+            return Response({
+                'date': target_date.isoformat(),
+                'filter_type': filter_type,
+                'opening_balance': str(opening_balance),
+                
+                'afternoon_shift': {
+                    'name': 'Afternoon Shift',
+                    'start_time': afternoon_start.strftime('%I:%M %p'),
+                    'end_time': afternoon_end.strftime('%I:%M %p'),
+                    'opening_balance': str(opening_balance),
+                    'revenue': str(afternoon_revenue),
+                    'expenses': str(afternoon_expenses),
+                    'profit': str(afternoon_profit),
+                    'closing_balance': str(afternoon_closing),
+                    'order_count': afternoon_order_count,
+                    'avg_order_value': str(afternoon_avg_order),
+                    'top_dishes': [
+                        {
+                            'dish_id': dish['dish__id'],
+                            'name': dish['dish__name'],
+                            'secondary_name': dish['dish__secondary_name'],
+                            'category': dish['dish__category'],
+                            'meal_type': dish['dish__meal_type'],
+                            'price': str(dish['dish__price']),
+                            'quantity_sold': dish['total_quantity'],
+                            'total_revenue': str(dish['total_revenue']),
+                            'order_count': dish['order_count']
+                        }
+                        for dish in afternoon_top_dishes
+                    ],
+                    'expense_breakdown': {
+                        item['expense_type']: str(item['total'])
+                        for item in afternoon_expense_breakdown
+                    },
+                    'payment_breakdown': [
+                        {
+                            'payment_type': item['payment_type'],
+                            'count': item['count'],
+                            'total': str(item['total'])
+                        }
+                        for item in afternoon_payment_breakdown
+                    ],
+                    'order_type_breakdown': [
+                        {
+                            'order_type': item['order_type'],
+                            'count': item['count'],
+                            'total': str(item['total'])
+                        }
+                        for item in afternoon_order_type
+                    ]
+                },
+                
+                'night_shift': {
+                    'name': 'Night Shift',
+                    'start_time': night_start.strftime('%I:%M %p'),
+                    'end_time': night_end.strftime('%I:%M %p'),
+                    'opening_balance': str(night_opening),
+                    'revenue': str(night_revenue),
+                    'expenses': str(night_expenses),
+                    'profit': str(night_profit),
+                    'closing_balance': str(night_closing),
+                    'order_count': night_order_count,
+                    'avg_order_value': str(night_avg_order),
+                    'top_dishes': [
+                        {
+                            'dish_id': dish['dish__id'],
+                            'name': dish['dish__name'],
+                            'secondary_name': dish['dish__secondary_name'],
+                            'category': dish['dish__category'],
+                            'meal_type': dish['dish__meal_type'],
+                            'price': str(dish['dish__price']),
+                            'quantity_sold': dish['total_quantity'],
+                            'total_revenue': str(dish['total_revenue']),
+                            'order_count': dish['order_count']
+                        }
+                        for dish in night_top_dishes
+                    ],
+                    'expense_breakdown': {
+                        item['expense_type']: str(item['total'])
+                        for item in night_expense_breakdown
+                    },
+                    'payment_breakdown': [
+                        {
+                            'payment_type': item['payment_type'],
+                            'count': item['count'],
+                            'total': str(item['total'])
+                        }
+                        for item in night_payment_breakdown
+                    ],
+                    'order_type_breakdown': [
+                        {
+                            'order_type': item['order_type'],
+                            'count': item['count'],
+                            'total': str(item['total'])
+                        }
+                        for item in night_order_type
+                    ]
+                },
+                
+                'overall': {
+                    'total_revenue': str(total_revenue),
+                    'total_expenses': str(total_expenses),
+                    'total_profit': str(total_profit),
+                    'total_orders': total_orders,
+                    'final_closing_balance': str(night_closing),
+                    'avg_order_value': str(total_revenue / total_orders) if total_orders > 0 else '0.00',
+                    'top_dishes': [
+                        {
+                            'dish_id': dish['dish__id'],
+                            'name': dish['dish__name'],
+                            'secondary_name': dish['dish__secondary_name'],
+                            'category': dish['dish__category'],
+                            'meal_type': dish['dish__meal_type'],
+                            'price': str(dish['dish__price']),
+                            'quantity_sold': dish['total_quantity'],
+                            'total_revenue': str(dish['total_revenue']),
+                            'order_count': dish['order_count']
+                        }
+                        for dish in overall_top_dishes
+                    ]
+                }
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in AnalyticsDashboardView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# CATEGORY PERFORMANCE VIEW
+# ==========================================
+class CategoryPerformanceView(APIView):
+    """
+    Analyze sales performance by dish category
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            date_str = request.GET.get('date')
+            filter_type = request.GET.get('filter', 'today')
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            if filter_type == 'today' or not date_str:
+                target_date = timezone.now().astimezone(tz).date()
+            elif filter_type == 'yesterday':
+                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
+            else:
+                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            
+            # Afternoon: 10 AM - 4 PM
+            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
+            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
+            
+            # Night: 4 PM - 4 AM next day
+            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
+            
+            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+            night_start_utc = night_start.astimezone(pytz.UTC)
+            night_end_utc = night_end.astimezone(pytz.UTC)
+            
+            # Category-wise performance for full day
+            category_stats = OrderItem.objects.filter(
+                Q(order__created_at__gte=afternoon_start_utc, order__created_at__lt=afternoon_end_utc) |
+                Q(order__created_at__gte=night_start_utc, order__created_at__lt=night_end_utc)
+            ).values(
+                'dish__category'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
+                order_count=Count('order', distinct=True),
+                dish_count=Count('dish', distinct=True)
+            ).order_by('-total_revenue')
+            
+            # Calculate percentages
+            total_revenue = sum(Decimal(str(cat['total_revenue'])) for cat in category_stats)
+            
+            results = []
+            for cat in category_stats:
+                revenue = Decimal(str(cat['total_revenue']))
+                percentage = (revenue / total_revenue * 100) if total_revenue > 0 else Decimal('0')
+                
+                results.append({
+                    'category': cat['dish__category'],
+                    'category_display': dict(Dish.CATEGORY_CHOICES).get(cat['dish__category'], cat['dish__category']),
+                    'total_quantity': cat['total_quantity'],
+                    'total_revenue': str(revenue),
+                    'revenue_percentage': str(round(percentage, 2)),
+                    'order_count': cat['order_count'],
+                    'unique_dishes_sold': cat['dish_count']
+                })
+            
+            return Response({
+                'date': target_date.isoformat(),
+                'categories': results,
+                'total_revenue': str(total_revenue)
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in CategoryPerformanceView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# HOURLY TRENDS VIEW
+# ==========================================
+class HourlyTrendsView(APIView):
+    """
+    Hour-by-hour sales analysis for afternoon and night shifts
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            date_str = request.GET.get('date')
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else timezone.now().astimezone(tz).date()
+            
+            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
+            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
+            
+            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+            night_start_utc = night_start.astimezone(pytz.UTC)
+            night_end_utc = night_end.astimezone(pytz.UTC)
+            
+            # Hourly breakdown
+            hourly_data = Order.objects.filter(
+                Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
+                Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
+            ).annotate(
+                hour=TruncHour('created_at')
+            ).values('hour').annotate(
+                order_count=Count('id'),
+                total_revenue=Sum('total_amount')
+            ).order_by('hour')
+            
+            results = []
+            for item in hourly_data:
+                hour_time = item['hour'].astimezone(tz)
+                results.append({
+                    'hour': hour_time.strftime('%I:00 %p'),
+                    'hour_24': hour_time.hour,
+                    'order_count': item['order_count'],
+                    'revenue': str(item['total_revenue'])
+                })
+            
+            return Response({
+                'date': target_date.isoformat(),
+                'hourly_data': results
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in HourlyTrendsView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# COMPARISON VIEW
+# ==========================================
+class ComparisonView(APIView):
+    """
+    Compare today vs yesterday
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            today = timezone.now().astimezone(tz).date()
+            yesterday = today - timedelta(days=1)
+            
+            # Today shifts
+            today_afternoon_start = tz.localize(datetime.combine(today, time(10, 0)))
+            today_afternoon_end = tz.localize(datetime.combine(today, time(16, 0)))
+            today_night_start = tz.localize(datetime.combine(today, time(16, 0)))
+            today_night_end = tz.localize(datetime.combine(today + timedelta(days=1), time(4, 0)))
+            
+            # Yesterday shifts
+            yesterday_afternoon_start = tz.localize(datetime.combine(yesterday, time(10, 0)))
+            yesterday_afternoon_end = tz.localize(datetime.combine(yesterday, time(16, 0)))
+            yesterday_night_start = tz.localize(datetime.combine(yesterday, time(16, 0)))
+            yesterday_night_end = tz.localize(datetime.combine(yesterday + timedelta(days=1), time(4, 0)))
+            
+            # Convert to UTC
+            today_afternoon_start_utc = today_afternoon_start.astimezone(pytz.UTC)
+            today_afternoon_end_utc = today_afternoon_end.astimezone(pytz.UTC)
+            today_night_start_utc = today_night_start.astimezone(pytz.UTC)
+            today_night_end_utc = today_night_end.astimezone(pytz.UTC)
+            
+            yesterday_afternoon_start_utc = yesterday_afternoon_start.astimezone(pytz.UTC)
+            yesterday_afternoon_end_utc = yesterday_afternoon_end.astimezone(pytz.UTC)
+            yesterday_night_start_utc = yesterday_night_start.astimezone(pytz.UTC)
+            yesterday_night_end_utc = yesterday_night_end.astimezone(pytz.UTC)
+            
+            # Today data
+            today_revenue = Order.objects.filter(
+                Q(created_at__gte=today_afternoon_start_utc, created_at__lt=today_afternoon_end_utc) |
+                Q(created_at__gte=today_night_start_utc, created_at__lt=today_night_end_utc)
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            today_orders = Order.objects.filter(
+                Q(created_at__gte=today_afternoon_start_utc, created_at__lt=today_afternoon_end_utc) |
+                Q(created_at__gte=today_night_start_utc, created_at__lt=today_night_end_utc)
+            ).count()
+            
+            # Yesterday data
+            yesterday_revenue = Order.objects.filter(
+                Q(created_at__gte=yesterday_afternoon_start_utc, created_at__lt=yesterday_afternoon_end_utc) |
+                Q(created_at__gte=yesterday_night_start_utc, created_at__lt=yesterday_night_end_utc)
+            ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+            
+            yesterday_orders = Order.objects.filter(
+                Q(created_at__gte=yesterday_afternoon_start_utc, created_at__lt=yesterday_afternoon_end_utc) |
+                Q(created_at__gte=yesterday_night_start_utc, created_at__lt=yesterday_night_end_utc)
+            ).count()
+            
+            revenue_change = ((today_revenue - yesterday_revenue) / yesterday_revenue * 100) if yesterday_revenue > 0 else Decimal('0')
+            orders_change = ((today_orders - yesterday_orders) / yesterday_orders * 100) if yesterday_orders > 0 else 0
+            
+            return Response({
+                'comparison_type': 'day',
+                'current': {
+                    'date': today.isoformat(),
+                    'revenue': str(today_revenue),
+                    'orders': today_orders
+                },
+                'previous': {
+                    'date': yesterday.isoformat(),
+                    'revenue': str(yesterday_revenue),
+                    'orders': yesterday_orders
+                },
+                'change': {
+                    'revenue_percentage': str(round(revenue_change, 2)),
+                    'orders_percentage': str(round(orders_change, 2)),
+                    'revenue_difference': str(today_revenue - yesterday_revenue),
+                    'orders_difference': today_orders - yesterday_orders
+                }
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in ComparisonView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# LOW PERFORMING DISHES VIEW
+# ==========================================
+class LowPerformingDishesView(APIView):
+    """
+    Identify dishes with low sales
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            days = int(request.GET.get('days', 7))
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            end_date = timezone.now().astimezone(tz)
+            start_date = end_date - timedelta(days=days)
+            
+            start_date_utc = start_date.astimezone(pytz.UTC)
+            end_date_utc = end_date.astimezone(pytz.UTC)
+            
+            # Get dishes with low sales
+            dishes_with_sales = OrderItem.objects.filter(
+                order__created_at__gte=start_date_utc,
+                order__created_at__lt=end_date_utc
+            ).values(
+                'dish__id',
+                'dish__name',
+                'dish__secondary_name',
+                'dish__category',
+                'dish__price'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField())
+            ).order_by('total_quantity')[:10]
+            
+            # Dishes with zero sales
+            sold_dish_ids = OrderItem.objects.filter(
+                order__created_at__gte=start_date_utc,
+                order__created_at__lt=end_date_utc
+            ).values_list('dish__id', flat=True).distinct()
+            
+            zero_sales_dishes = Dish.objects.filter(
+                is_active=True
+            ).exclude(
+                id__in=sold_dish_ids
+            ).values(
+                'id',
+                'name',
+                'secondary_name',
+                'category',
+                'price'
+            )[:10]
+            
+            return Response({
+                'period_days': days,
+                'start_date': start_date.date().isoformat(),
+                'end_date': end_date.date().isoformat(),
+                'low_sales_dishes': [
+                    {
+                        'dish_id': dish['dish__id'],
+                        'name': dish['dish__name'],
+                        'secondary_name': dish['dish__secondary_name'],
+                        'category': dish['dish__category'],
+                        'price': str(dish['dish__price']),
+                        'quantity_sold': dish['total_quantity'],
+                        'total_revenue': str(dish['total_revenue'])
+                    }
+                    for dish in dishes_with_sales
+                ],
+                'zero_sales_dishes': [
+                    {
+                        'dish_id': dish['id'],
+                        'name': dish['name'],
+                        'secondary_name': dish['secondary_name'],
+                        'category': dish['category'],
+                        'price': str(dish['price'])
+                    }
+                    for dish in zero_sales_dishes
+                ]
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in LowPerformingDishesView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# WORKER EXPENSE BREAKDOWN VIEW
+# ==========================================
+class WorkerExpenseBreakdownView(APIView):
+    """
+    Detailed worker expense analysis
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            date_str = request.GET.get('date')
+            filter_type = request.GET.get('filter', 'today')
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            if filter_type == 'today' or not date_str:
+                target_date = timezone.now().astimezone(tz).date()
+            elif filter_type == 'yesterday':
+                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
+            else:
+                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            
+            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
+            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
+            
+            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+            night_start_utc = night_start.astimezone(pytz.UTC)
+            night_end_utc = night_end.astimezone(pytz.UTC)
+            
+            # Worker-wise expenses
+            worker_expenses = Expense.objects.filter(
+                expense_type='worker'
+            ).filter(
+                Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
+                Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
+            ).values(
+                'worker__id',
+                'worker__name',
+                'worker__role',
+                'worker_category'
+            ).annotate(
+                total_amount=Sum('total_amount'),
+                transaction_count=Count('id')
+            ).order_by('-total_amount')
+            
+            # Category-wise breakdown
+            category_breakdown = Expense.objects.filter(
+                expense_type='worker'
+            ).filter(
+                Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
+                Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
+            ).values('worker_category').annotate(
+                total=Sum('total_amount'),
+                count=Count('id')
+            ).order_by('-total')
+            
+            total_worker_expense = sum(item['total_amount'] for item in worker_expenses)
+            
+            return Response({
+                'date': target_date.isoformat(),
+                'total_worker_expense': str(total_worker_expense),
+                'worker_breakdown': [
+                    {
+                        'worker_id': item['worker__id'],
+                        'worker_name': item['worker__name'],
+                        'worker_role': item['worker__role'],
+                        'category': item['worker_category'],
+                        'total_amount': str(item['total_amount']),
+                        'transaction_count': item['transaction_count']
+                    }
+                    for item in worker_expenses
+                ],
+                'category_breakdown': [
+                    {
+                        'category': item['worker_category'],
+                        'total': str(item['total']),
+                        'count': item['count']
+                    }
+                    for item in category_breakdown
+                ]
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in WorkerExpenseBreakdownView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# MATERIAL EXPENSE BREAKDOWN VIEW
+# ==========================================
+class MaterialExpenseBreakdownView(APIView):
+    """
+    Detailed material expense analysis
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            date_str = request.GET.get('date')
+            filter_type = request.GET.get('filter', 'today')
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            if filter_type == 'today' or not date_str:
+                target_date = timezone.now().astimezone(tz).date()
+            elif filter_type == 'yesterday':
+                target_date = (timezone.now().astimezone(tz) - timedelta(days=1)).date()
+            else:
+                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            
+            afternoon_start = tz.localize(datetime.combine(target_date, time(10, 0)))
+            afternoon_end = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_start = tz.localize(datetime.combine(target_date, time(16, 0)))
+            night_end = tz.localize(datetime.combine(target_date + timedelta(days=1), time(4, 0)))
+            
+            afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+            afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+            night_start_utc = night_start.astimezone(pytz.UTC)
+            night_end_utc = night_end.astimezone(pytz.UTC)
+            
+            # Material-wise expenses
+            material_expenses = ExpenseItem.objects.filter(
+                expense__expense_type='material'
+            ).filter(
+                Q(expense__timestamp__gte=afternoon_start_utc, expense__timestamp__lt=afternoon_end_utc) |
+                Q(expense__timestamp__gte=night_start_utc, expense__timestamp__lt=night_end_utc)
+            ).values(
+                'material__id',
+                'material__name',
+                'material__unit'
+            ).annotate(
+                total_quantity=Sum('quantity'),
+                total_amount=Sum('subtotal'),
+                purchase_count=Count('expense', distinct=True),
+                avg_unit_price=Avg('unit_price')
+            ).order_by('-total_amount')
+            
+            total_material_expense = sum(item['total_amount'] for item in material_expenses)
+            
+            return Response({
+                'date': target_date.isoformat(),
+                'total_material_expense': str(total_material_expense),
+                'material_breakdown': [
+                    {
+                        'material_id': item['material__id'],
+                        'material_name': item['material__name'],
+                        'unit': item['material__unit'],
+                        'total_quantity': str(item['total_quantity']),
+                        'total_amount': str(item['total_amount']),
+                        'purchase_count': item['purchase_count'],
+                        'avg_unit_price': str(item['avg_unit_price'])
+                    }
+                    for item in material_expenses
+                ]
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in MaterialExpenseBreakdownView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ==========================================
+# WEEKLY SUMMARY VIEW
+# ==========================================
+class WeeklySummaryView(APIView):
+    """
+    7-day summary report
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            tz_str = request.GET.get('timezone', 'Asia/Kolkata')
+            
+            try:
+                tz = pytz.timezone(tz_str)
+            except:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            end_date = timezone.now().astimezone(tz).date()
+            start_date = end_date - timedelta(days=6)
+            
+            daily_summary = []
+            total_revenue = Decimal('0.00')
+            total_expenses = Decimal('0.00')
+            total_orders = 0
+            
+            current_date = start_date
+            while current_date <= end_date:
+                afternoon_start = tz.localize(datetime.combine(current_date, time(10, 0)))
+                afternoon_end = tz.localize(datetime.combine(current_date, time(16, 0)))
+                night_start = tz.localize(datetime.combine(current_date, time(16, 0)))
+                night_end = tz.localize(datetime.combine(current_date + timedelta(days=1), time(4, 0)))
+                
+                afternoon_start_utc = afternoon_start.astimezone(pytz.UTC)
+                afternoon_end_utc = afternoon_end.astimezone(pytz.UTC)
+                night_start_utc = night_start.astimezone(pytz.UTC)
+                night_end_utc = night_end.astimezone(pytz.UTC)
+                
+                day_revenue = Order.objects.filter(
+                    Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
+                    Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
+                ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+                
+                day_expenses = Expense.objects.filter(
+                    Q(timestamp__gte=afternoon_start_utc, timestamp__lt=afternoon_end_utc) |
+                    Q(timestamp__gte=night_start_utc, timestamp__lt=night_end_utc)
+                ).aggregate(total=Coalesce(Sum('total_amount'), Decimal('0.00')))['total']
+                
+                day_orders = Order.objects.filter(
+                    Q(created_at__gte=afternoon_start_utc, created_at__lt=afternoon_end_utc) |
+                    Q(created_at__gte=night_start_utc, created_at__lt=night_end_utc)
+                ).count()
+                
+                daily_summary.append({
+                    'date': current_date.isoformat(),
+                    'day_name': current_date.strftime('%A'),
+                    'revenue': str(day_revenue),
+                    'expenses': str(day_expenses),
+                    'profit': str(day_revenue - day_expenses),
+                    'orders': day_orders
+                })
+                
+                total_revenue += day_revenue
+                total_expenses += day_expenses
+                total_orders += day_orders
+                
+                current_date += timedelta(days=1)
+            
+            # Best day
+            best_day = max(daily_summary, key=lambda x: Decimal(x['revenue'])) if daily_summary else None
+            
+            return Response({
+                'period': f"{start_date.isoformat()} to {end_date.isoformat()}",
+                'summary': {
+                    'total_revenue': str(total_revenue),
+                    'total_expenses': str(total_expenses),
+                    'total_profit': str(total_revenue - total_expenses),
+                    'total_orders': total_orders,
+                    'avg_daily_revenue': str(total_revenue / 7),
+                    'avg_daily_orders': round(total_orders / 7, 2)
+                },
+                'daily_breakdown': daily_summary,
+                'best_day': best_day
+            }, status=status.HTTP_200_OK)
+        
+        except Exception as e:
+            import traceback
+            print("Error in WeeklySummaryView:")
+            print(traceback.format_exc())
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+## report ====================
+
+
+class ShiftReportView(APIView):
+    """
+    API View to get shift-wise income and expense report with CATEGORY BREAKDOWN
+    Only Afternoon and Night shifts
+    """
+    
+    def get(self, request):
+        try:
+            # Get query parameters
+            date_str = request.query_params.get('date', None)
+            shift_filter = request.query_params.get('shift', 'all')
+            tz_str = request.query_params.get('timezone', 'Asia/Kolkata')
+            
+            # Validate and set timezone
+            try:
+                tz = pytz.timezone(tz_str)
+            except pytz.exceptions.UnknownTimeZoneError:
+                tz = pytz.timezone('Asia/Kolkata')
+            
+            # Parse date
+            if date_str:
+                try:
+                    target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                except ValueError:
+                    return Response(
+                        {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            else:
+                target_date = timezone.now().astimezone(tz).date()
+            
+            # Validate shift filter
+            valid_shifts = ['afternoon', 'night', 'all']
+            if shift_filter not in valid_shifts:
+                return Response(
+                    {'error': f'Invalid shift type. Choose from: {", ".join(valid_shifts)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Generate shifts data
+            if shift_filter == 'all':
+                shifts_to_process = ['afternoon', 'night']
+            else:
+                shifts_to_process = [shift_filter]
+            
+            shifts_data = []
+            for shift in shifts_to_process:
+                shift_data = self._calculate_shift_report(target_date, shift, tz)
+                shifts_data.append(shift_data)
+            
+            # Calculate daily totals
+            daily_total_income = sum(Decimal(shift['total_income']) for shift in shifts_data)
+            daily_total_expense = sum(Decimal(shift['total_expense']) for shift in shifts_data)
+            daily_total_labour = sum(Decimal(shift['worker_expense']) for shift in shifts_data)
+            daily_total_material = sum(Decimal(shift['material_expense']) for shift in shifts_data)
+            daily_profit = daily_total_income - daily_total_expense
+            
+            response_data = {
+                'date': target_date.strftime('%Y-%m-%d'),
+                'shifts': shifts_data,
+                'daily_total_income': str(daily_total_income),
+                'daily_total_labour': str(daily_total_labour),
+                'daily_total_material': str(daily_total_material),
+                'daily_total_expense': str(daily_total_expense),
+                'daily_profit': str(daily_profit)
+            }
+            
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            print("=" * 80)
+            print("ERROR in ShiftReportView:")
+            print(traceback.format_exc())
+            print("=" * 80)
+            return Response(
+                {'error': f'Internal server error: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def _get_shift_times(self, target_date, shift_type, tz):
+        """Calculate shift start/end times"""
+        try:
+            if shift_type == 'afternoon':
+                shift_start = tz.localize(datetime.combine(target_date, time(10, 0, 0)))
+                shift_end = tz.localize(datetime.combine(target_date, time(16, 0, 0)))
+            elif shift_type == 'night':
+                shift_start = tz.localize(datetime.combine(target_date, time(16, 0, 0)))
+                next_day = target_date + timedelta(days=1)
+                shift_end = tz.localize(datetime.combine(next_day, time(4, 0, 0)))
+            else:
+                raise ValueError(f"Invalid shift type: {shift_type}")
+            
+            shift_start_utc = shift_start.astimezone(pytz.UTC)
+            shift_end_utc = shift_end.astimezone(pytz.UTC)
+            return shift_start, shift_end, shift_start_utc, shift_end_utc
+            
+        except (pytz.exceptions.NonExistentTimeError, pytz.exceptions.AmbiguousTimeError):
+            # Fallback with explicit is_dst=False
+            if shift_type == 'afternoon':
+                shift_start = tz.localize(datetime.combine(target_date, time(10, 0, 0)), is_dst=False)
+                shift_end = tz.localize(datetime.combine(target_date, time(16, 0, 0)), is_dst=False)
+            else:  # night
+                shift_start = tz.localize(datetime.combine(target_date, time(16, 0, 0)), is_dst=False)
+                next_day = target_date + timedelta(days=1)
+                shift_end = tz.localize(datetime.combine(next_day, time(4, 0, 0)), is_dst=False)
+            
+            shift_start_utc = shift_start.astimezone(pytz.UTC)
+            shift_end_utc = shift_end.astimezone(pytz.UTC)
+            return shift_start, shift_end, shift_start_utc, shift_end_utc
+    
+    def _calculate_shift_report(self, target_date, shift_type, tz):
+        """Calculate complete report for a single shift"""
+        shift_start, shift_end, shift_start_utc, shift_end_utc = self._get_shift_times(
+            target_date, shift_type, tz
+        )
+        
+        # ===== INCOME: Orders in shift time =====
+        orders = Order.objects.filter(
+            created_at__gte=shift_start_utc,
+            created_at__lt=shift_end_utc
+        )
+        
+        total_income = orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+        order_count = orders.count()
+        
+        # Payment type totals
+        cash_income = orders.filter(payment_type='cash').aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0.00')
+        upi_income = orders.filter(payment_type='upi').aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0.00')
+        card_income = orders.filter(payment_type='card').aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0.00')
+        
+        # ✅ FIXED: Category breakdown via OrderItem → Dish
+        def get_category_breakdown(payment_type):
+            category_totals = OrderItem.objects.filter(
+                order__created_at__gte=shift_start_utc,
+                order__created_at__lt=shift_end_utc,
+                order__payment_type=payment_type
+            ).values('dish__category').annotate(
+                total_amount=Sum('price'),
+                item_count=Count('id')
+            ).order_by('-total_amount')
+            
+            return [
+                {
+                    'category_display': cat['dish__category'] or 'Uncategorized',
+                    'amount': str(cat['total_amount'] or Decimal('0.00')),
+                    'item_count': cat['item_count'] or 0
+                }
+                for cat in category_totals
+            ]
+        
+        cash_category_breakdown = get_category_breakdown('cash')
+        upi_category_breakdown = get_category_breakdown('upi')
+        card_category_breakdown = get_category_breakdown('card')
+        
+        # ===== EXPENSES =====
+        from .models import Expense, ExpenseItem  # Adjust import path
+        
+        expenses = Expense.objects.filter(
+            timestamp__gte=shift_start_utc,
+            timestamp__lt=shift_end_utc
+        )
+        total_expense = expenses.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+        
+        # Worker expenses
+        worker_expenses = expenses.filter(expense_type='worker')
+        worker_expense_total = worker_expenses.aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0.00')
+        
+        worker_expenses_list = []
+        for exp in worker_expenses:
+            worker_expenses_list.append({
+                'worker_name': getattr(exp.worker, 'name', 'Unknown'),
+                'category': getattr(exp, 'get_worker_category_display', lambda: 'Other')(),
+                'description': exp.description or '',
+                'amount': float(exp.total_amount),
+                'time': exp.timestamp.astimezone(tz).strftime('%I:%M %p')
+            })
+        
+        # Material expenses
+        material_expenses = expenses.filter(expense_type='material')
+        material_expense_total = material_expenses.aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0.00')
+        
+        material_items_list = []
+        for exp in material_expenses:
+            items = ExpenseItem.objects.filter(expense=exp)
+            expense_time = exp.timestamp.astimezone(tz).strftime('%I:%M %p')
+            for item in items:
+                material_items_list.append({
+                    'material_name': item.material.name,
+                    'quantity': float(item.quantity),
+                    'unit': getattr(item.material, 'get_unit_display', lambda: '')(),
+                    'unit_price': float(item.unit_price),
+                    'amount': float(item.subtotal),
+                    'time': expense_time
+                })
+        
+        # Profit
+        profit = total_income - total_expense
+        profit_margin = float((profit / total_income * 100)) if total_income > 0 else 0.0
+        
+        return {
+            'shift_type': shift_type,
+            'shift_start': shift_start.strftime('%I:%M %p'),
+            'shift_end': shift_end.strftime('%I:%M %p'),
+            'total_income': str(total_income),
+            'order_count': order_count,
+            'cash_income': str(cash_income),
+            'upi_income': str(upi_income),
+            'card_income': str(card_income),
+            # ✅ PERFECT CATEGORY BREAKDOWNS
+            'cash_category_breakdown': cash_category_breakdown,
+            'upi_category_breakdown': upi_category_breakdown,
+            'card_category_breakdown': card_category_breakdown,
+            'total_expense': str(total_expense),
+            'worker_expense': str(worker_expense_total),
+            'material_expense': str(material_expense_total),
+            'worker_expenses_list': worker_expenses_list,
+            'material_expenses_list': material_items_list,
+            'profit': str(profit),
+            'profit_margin': str(profit_margin)
         }
\ No newline at end of file
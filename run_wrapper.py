@@ -102,10 +102,20 @@ def main():
 
         run_migrations_if_needed()
 
+        # Resume bills queued before the last shutdown
+        from billing_app.print_queue import start_print_workers
+        start_print_workers()
+
+        # Apply orders left in the order journal (when ORDER_JOURNAL_PATH is set)
+        from billing_app.order_journal import start_order_journal
+        start_order_journal()
+
         # Small delay can help in some cases where DB is just created / file locks etc.
         time.sleep(0.2)
 
-        start_server(host="127.0.0.1", port=8000, threads=4)
+        # Terminals long-poll /bill/dishes/changes/ (up to 25s each), so keep
+        # spare threads for order requests
+        start_server(host="127.0.0.1", port=8000, threads=8)
 
     except Exception as e:
         log.exception("Backend crashed: %s", e)